@@ -0,0 +1,128 @@
+"""
+AdBlock telemetry as counters instead of one row per page view.
+
+Every detection bumps a per-day Redis hash field (page template + device
+type) and adds the visitor to a HyperLogLog for the same cell. The
+flush_adblock_stats task copies the day's totals into AdBlockDailyStats;
+the counters are absolute, so the flush is an idempotent upsert.
+
+Raw AdBlockDetection rows are still written for a random sample of
+detections (settings.AD_ADBLOCK_RAW_SAMPLE_RATE, 0 disables them).
+"""
+
+import logging
+import random
+import re
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .fraud import describe_user_agent
+
+logger = logging.getLogger(__name__)
+
+ADBLOCK_KEY_PREFIX = 'news:ads:adblock'
+# Gece yarısından sonra gelen geç olaylar için önceki gün de aktarılır
+ADBLOCK_KEY_TTL = 3 * 24 * 60 * 60
+ADBLOCK_FLUSH_DAYS = 2
+
+TEMPLATE_RE = re.compile(r'^[a-z0-9-]{1,40}$')
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def page_template(page_url):
+    """
+    Sayfa URL'sinden şablon adı: ilk yol parçası ('home', 'articles', ...)
+
+    Rastgele yollar sayaç sayısını şişirmesin diye kalıba uymayanlar 'other' olur.
+    """
+    segment = urlsplit(page_url or '').path.strip('/').split('/')[0].lower()
+    if not segment:
+        return 'home'
+    return segment if TEMPLATE_RE.match(segment) else 'other'
+
+
+def counter_key(day):
+    return f'{ADBLOCK_KEY_PREFIX}:{day.isoformat()}'
+
+
+def visitors_key(day, cell):
+    return f'{ADBLOCK_KEY_PREFIX}:hll:{day.isoformat()}:{cell}'
+
+
+def should_sample():
+    """Bu tespit için ham AdBlockDetection satırı da yazılmalı mı"""
+    rate = getattr(settings, 'AD_ADBLOCK_RAW_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+def record(visitor, page_url, user_agent, now=None):
+    """
+    Tespiti günlük sayaçlara ve tekil ziyaretçi HyperLogLog'una ekler
+
+    Args:
+        visitor: frequency.visitor_id() çıktısı
+        page_url: Tespitin yapıldığı sayfa
+        user_agent: Cihaz tipi sunucu tarafında buradan belirlenir
+    """
+    day = (now or timezone.now()).date()
+    device = describe_user_agent(user_agent or '')['device_type'] or 'unknown'
+    cell = f'{page_template(page_url)}|{device}'
+
+    pipe = _redis().pipeline(transaction=False)
+    pipe.hincrby(counter_key(day), cell, 1)
+    pipe.expire(counter_key(day), ADBLOCK_KEY_TTL)
+    pipe.pfadd(visitors_key(day, cell), visitor)
+    pipe.expire(visitors_key(day, cell), ADBLOCK_KEY_TTL)
+    pipe.execute()
+
+
+def flush(now=None):
+    """
+    Son ADBLOCK_FLUSH_DAYS günün sayaçlarını AdBlockDailyStats'a yazar
+
+    Returns:
+        int: Güncellenen satır sayısı
+    """
+    from .models import AdBlockDailyStats
+
+    r = _redis()
+    today = (now or timezone.now()).date()
+    rows = []
+
+    for offset in range(ADBLOCK_FLUSH_DAYS):
+        day = today - timedelta(days=offset)
+        counters = r.hgetall(counter_key(day))
+        if not counters:
+            continue
+
+        pipe = r.pipeline(transaction=False)
+        cells = [cell.decode() if isinstance(cell, bytes) else cell for cell in counters]
+        for cell in cells:
+            pipe.pfcount(visitors_key(day, cell))
+        unique_counts = pipe.execute()
+
+        for (cell, detections), unique_visitors in zip(zip(cells, counters.values()), unique_counts):
+            template, device = cell.split('|', 1)
+            rows.append(AdBlockDailyStats(
+                date=day,
+                page_template=template,
+                device_type=device,
+                detections=int(detections),
+                unique_visitors=unique_visitors,
+            ))
+
+    AdBlockDailyStats.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['date', 'page_template', 'device_type'],
+        update_fields=['detections', 'unique_visitors', 'updated_at'],
+    )
+    return len(rows)
@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     AdvertisementZone, Advertiser, Campaign, Advertisement,
-    AdImpression, AdClick, AdConversion, AdBlockDetection
+    AdImpression, AdClick, AdConversion, AdBlockDetection, AdBlockDailyStats, AdDailyStats,
+    QuarantinedAdEvent, RevenueLedgerEntry
 )
 
 
@@ -51,7 +52,7 @@ class CampaignAdmin(admin.ModelAdmin):
             'fields': ('pricing_model', 'budget', 'spent', 'cpm_price', 'cpc_price', 'cpa_price', 'daily_budget')
         }),
         ('Limitler', {
-            'fields': ('max_impressions', 'max_clicks')
+            'fields': ('max_impressions', 'max_clicks', 'frequency_cap', 'frequency_window_hours')
         }),
         ('Tarihler', {
             'fields': ('start_date', 'end_date')
@@ -152,3 +153,60 @@ class AdBlockDetectionAdmin(admin.ModelAdmin):
     ordering = ['-detected_at']
     readonly_fields = ['detected_at']
     date_hierarchy = 'detected_at'
+
+
+@admin.register(AdBlockDailyStats)
+class AdBlockDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'page_template', 'device_type', 'detections', 'unique_visitors']
+    list_filter = ['date', 'device_type']
+    search_fields = ['page_template']
+    ordering = ['-date', 'page_template', 'device_type']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'date'
+
+
+@admin.register(QuarantinedAdEvent)
+class QuarantinedAdEventAdmin(admin.ModelAdmin):
+    """Geçersiz trafik kayıtları yalnızca incelenir"""
+    list_display = ['occurred_at', 'event_type', 'reason', 'advertisement', 'campaign', 'ip_address', 'visitor']
+    list_filter = ['reason', 'event_type', 'occurred_at']
+    search_fields = ['ip_address', 'visitor', 'user_agent', 'advertisement__name', 'campaign__name']
+    ordering = ['-occurred_at']
+    date_hierarchy = 'occurred_at'
+    raw_id_fields = ['advertisement', 'campaign']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AdDailyStats)
+class AdDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['advertisement', 'campaign', 'date', 'impressions', 'unique_ips', 'clicks', 'conversions', 'spend']
+    list_filter = ['date', 'campaign']
+    search_fields = ['advertisement__name', 'campaign__name']
+    ordering = ['-date']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'date'
+
+
+
+@admin.register(RevenueLedgerEntry)
+class RevenueLedgerEntryAdmin(admin.ModelAdmin):
+    """Defter kayıtları değiştirilemez; yalnızca görüntülenir"""
+    list_display = ['date', 'campaign', 'advertiser', 'entry_type', 'pricing_model', 'impressions', 'clicks', 'conversions', 'amount']
+    list_filter = ['entry_type', 'pricing_model', 'date']
+    search_fields = ['campaign__name', 'advertiser__name']
+    ordering = ['-date', 'campaign']
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
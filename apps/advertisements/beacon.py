@@ -0,0 +1,228 @@
+"""
+Fire-and-forget tracking for navigator.sendBeacon.
+
+The beacon view (views.track_beacon) only checks the batch shape, appends
+it to a Redis stream together with the request metadata (IP, User-Agent,
+visitor key) and answers 204. The consume_ad_beacons command drains the
+stream through a consumer group in batches: impressions and clicks go
+through the regular tracking script (dedup, pacing, frequency sketch,
+counters) after invalid-traffic screening, AdBlock detections go to the
+daily AdBlock counters (adblock.py).
+
+Entries left unacknowledged by a crashed consumer are reclaimed and run
+again. Every event carries a replay key (stream entry id + position) that
+the tracking script sets in the same call that counts the event, so a
+reclaimed entry never counts the same event twice.
+"""
+
+import json
+import logging
+import re
+import uuid
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from utils.helpers import get_client_ip
+from . import adblock
+from .frequency import visitor_id
+from .tracking import (
+    AD_EVENTS_PREFIX, EVENT_FIELDS, REPLAY_SECONDS, TRACK_OK, TRACK_QUARANTINED,
+    clean_event, get_ad_meta, track_event,
+)
+
+logger = logging.getLogger(__name__)
+
+BEACON_STREAM = 'news:ads:beacon'
+BEACON_GROUP = 'ad-tracking'
+BEACON_STREAM_MAXLEN = 1_000_000
+BEACON_MAX_BYTES = 64 * 1024
+BEACON_MAX_EVENTS = 50
+BEACON_EVENT_TYPES = ('impression', 'click', 'adblock')
+# Bu süre onaylanmamış kalan kayıtlar başka bir tüketiciye devredilir
+# (tekrar sayılmaları tracking.REPLAY_SECONDS boyunca engellenir)
+BEACON_CLAIM_IDLE_MS = 60 * 1000
+
+TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def parse_beacon(body):
+    """
+    Beacon gövdesini çözer ve olay şemasını kontrol eder
+
+    Gövde {"events": [...]} veya doğrudan olay listesi olabilir. Her olayda
+    "type" (impression/click/adblock), impression ve click için "ad" zorunludur.
+    Alan doğrulaması tüketicide yapılır.
+
+    Raises:
+        ValueError: Gövde şemaya uymuyorsa
+    """
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError('Body must be JSON')
+
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        raise ValueError('events must be a non-empty list')
+    if len(events) > BEACON_MAX_EVENTS:
+        raise ValueError(f'At most {BEACON_MAX_EVENTS} events per beacon')
+
+    for event in events:
+        if not isinstance(event, dict) or event.get('type') not in BEACON_EVENT_TYPES:
+            raise ValueError(f"Event type must be one of {', '.join(BEACON_EVENT_TYPES)}")
+        if event['type'] != 'adblock' and (not isinstance(event.get('ad'), int) or isinstance(event['ad'], bool)):
+            raise ValueError('ad must be an integer')
+    return events
+
+
+def enqueue(request, events):
+    """Olay paketini istek bilgileriyle birlikte stream'e ekler"""
+    _redis().xadd(BEACON_STREAM, {
+        'ip': get_client_ip(request) or '',
+        'ua': request.META.get('HTTP_USER_AGENT', ''),
+        'referrer': request.META.get('HTTP_REFERER', ''),
+        'country': request.META.get('HTTP_CF_IPCOUNTRY', ''),
+        'user': request.user.id if request.user.is_authenticated else '',
+        'visitor': visitor_id(request),
+        'ts': timezone.now().isoformat(),
+        'events': json.dumps(events),
+    }, maxlen=BEACON_STREAM_MAXLEN, approximate=True)
+
+
+def ensure_group():
+    try:
+        _redis().xgroup_create(BEACON_STREAM, BEACON_GROUP, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def _decode(fields):
+    return {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+        for key, value in fields.items()
+    }
+
+
+def _process_entry(entry_id, fields, counts, adblocks):
+    from .models import AdBlockDetection
+    from apps.analytics import live
+
+    request_data = {
+        'user': int(fields['user']) if fields.get('user') else None,
+        'ip_address': fields['ip'],
+        'ts': fields['ts'],
+    }
+
+    for position, raw in enumerate(json.loads(fields['events'])):
+        kind = raw['type']
+        replay_key = f'beacon:{entry_id}:{position}'
+        data = {field: raw.get(field, '') for field in EVENT_FIELDS[kind]}
+        data['user_agent'] = fields['ua']
+        data['referrer'] = fields['referrer']
+        data['country'] = fields.get('country') or data.get('country')
+        event, errors = clean_event(kind, data)
+        if errors or not request_data['ip_address']:
+            counts['invalid'] += 1
+            continue
+        event.update(request_data)
+
+        if kind == 'adblock':
+            if not _redis().set(f'{AD_EVENTS_PREFIX}:replay:{replay_key}', 1, nx=True, ex=REPLAY_SECONDS):
+                counts['skipped'] += 1
+                continue
+            detected_at = parse_datetime(event['ts'])
+            adblock.record(fields['visitor'], event['page_url'], event['user_agent'], now=detected_at)
+            if adblock.should_sample():
+                adblocks.append(AdBlockDetection(
+                    ip_address=event['ip_address'],
+                    user_id=event['user'],
+                    user_agent=event['user_agent'],
+                    page_url=event['page_url'],
+                    detected_at=detected_at,
+                ))
+            counts['adblock'] += 1
+            continue
+
+        meta = get_ad_meta(raw['ad'])
+        if meta is None:
+            counts['invalid'] += 1
+            continue
+
+        if kind == 'impression':
+            # İstemci, tıklamayla eşleştirebilmek için kendi anahtarını üretebilir
+            token = str(raw.get('token') or '')
+            event['token'] = token if TOKEN_RE.match(token) else uuid.uuid4().hex
+        else:
+            event['impression_token'] = str(raw.get('impression_id') or '')[:32] or None
+
+        result = track_event(kind, meta, event, fields['visitor'], replay_key=replay_key)
+        if result == TRACK_OK:
+            counts[kind] += 1
+            if kind == 'impression':
+                live.record_ad_impression()
+        elif result == TRACK_QUARANTINED:
+            counts['quarantined'] += 1
+        else:
+            counts['skipped'] += 1
+
+
+def process_entries(entries):
+    """
+    Stream kayıtlarını işler
+
+    Returns:
+        dict: Olay türüne göre işlenen, tekrar/limit nedeniyle sayılmayan,
+              karantinaya alınan ve geçersiz olay sayıları
+    """
+    from .models import AdBlockDetection
+
+    counts = {'impression': 0, 'click': 0, 'adblock': 0, 'skipped': 0, 'quarantined': 0, 'invalid': 0}
+    adblocks = []
+
+    for entry_id, fields in entries:
+        try:
+            _process_entry(entry_id.decode() if isinstance(entry_id, bytes) else entry_id, _decode(fields), counts, adblocks)
+        except Exception as e:
+            # Bozuk bir kayıt partinin geri kalanını engellememeli
+            logger.error(f"Could not process beacon {entry_id}: {str(e)}")
+            counts['invalid'] += 1
+
+    if adblocks:
+        AdBlockDetection.objects.bulk_create(adblocks)
+
+    return counts
+
+
+def drain(consumer, count=500, block_ms=1000):
+    """
+    Stream'den bir parti okuyup işler ve onaylar
+
+    Önce uzun süre onaylanmamış (çökmüş tüketiciden kalan) kayıtlar
+    devralınır, yoksa yeni kayıtlar beklenir.
+
+    Returns:
+        dict: process_entries() sayıları (parti boşsa None)
+    """
+    r = _redis()
+    claimed = r.xautoclaim(
+        BEACON_STREAM, BEACON_GROUP, consumer,
+        min_idle_time=BEACON_CLAIM_IDLE_MS, start_id='0-0', count=count
+    )
+    entries = claimed[1]
+    if not entries:
+        response = r.xreadgroup(BEACON_GROUP, consumer, {BEACON_STREAM: '>'}, count=count, block=block_ms)
+        entries = response[0][1] if response else []
+    if not entries:
+        return None
+
+    counts = process_entries(entries)
+    r.xack(BEACON_STREAM, BEACON_GROUP, *[entry_id for entry_id, _ in entries])
+    return counts
@@ -0,0 +1,335 @@
+"""
+In-process ad decision engine.
+
+Each worker process keeps, per zone, a precompiled table of eligible ads
+with their public payloads and cumulative weights, so picking an ad is a
+bisect over an array instead of a database query. Tables are rebuilt when
+a campaign/ad/zone change or a budget/cap hit (see pacing.py) is
+announced on the Redis pub/sub channel, and in any case no later than
+AD_ENGINE_REFRESH_SECONDS, the next campaign start/end boundary or
+midnight (daily budgets reset).
+"""
+
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .targeting import TargetingIndex, campaign_targeting
+
+logger = logging.getLogger(__name__)
+
+AD_ENGINE_CHANNEL = 'news:ads:engine'
+AD_ENGINE_REFRESH_SECONDS = 60
+AD_ENGINE_HEALTH_CHECK_SECONDS = 30
+
+# Harcamalar Redis'te tam sayı mikro-₺ olarak tutulur (float hatası olmadan)
+MICROS = 1_000_000
+
+
+def ad_entry(ad, payload=None):
+    """Motor ve izleme hattının kullandığı reklam kaydı (ücretler mikro-₺ cinsinden)"""
+    from .frequency import sketch_slots
+
+    campaign = ad.campaign
+    frequency = None
+    if campaign.frequency_cap:
+        frequency = (campaign.frequency_cap, campaign.frequency_window_hours, sketch_slots(campaign.id))
+    return {
+        'ad_id': ad.id,
+        'campaign_id': campaign.id,
+        'advertiser_id': campaign.advertiser_id,
+        'weight': ad.weight,
+        'impression_cost': int(campaign.cost_for(impressions=1) * MICROS),
+        'click_cost': int(campaign.cost_for(clicks=1) * MICROS),
+        'pacing': 1.0,
+        'frequency': frequency,
+        'targeting': None,
+        'payload': payload,
+    }
+
+
+class ZoneTable:
+    """
+    Bir bölgedeki uygun reklamlar ve kümülatif ağırlık dizisi
+
+    Ağırlıklar kampanyanın pacing olasılığıyla çarpılır; bölge, en az
+    kısılan reklamın olasılığıyla doldurulur (geri kalan istekler boş döner).
+    """
+
+    __slots__ = ('entries', 'cumulative', 'total', 'fill', 'frequency_caps', 'targeting', '_subtables')
+
+    MAX_SUBTABLES = 256
+
+    def __init__(self, entries, indexed=True):
+        self.entries = entries
+        self.cumulative = []
+        total = 0
+        for entry in entries:
+            total += entry['weight'] * entry['pacing']
+            self.cumulative.append(total)
+        self.total = total
+        self.fill = max((entry['pacing'] for entry in entries), default=0)
+        self.frequency_caps = {
+            entry['campaign_id']: entry['frequency']
+            for entry in entries if entry['frequency']
+        }
+        self.targeting = TargetingIndex(entries) if indexed else None
+        self._subtables = {}
+
+    def subtable(self, mask):
+        """Bit kümesindeki reklamlardan oluşan tablo (hedefleme kombinasyonu başına önbellekli)"""
+        if mask == self.targeting.full:
+            return self
+        table = self._subtables.get(mask)
+        if table is None:
+            entries = [entry for position, entry in enumerate(self.entries) if mask >> position & 1]
+            table = ZoneTable(entries, indexed=False)
+            if len(self._subtables) >= self.MAX_SUBTABLES:
+                self._subtables.clear()
+            self._subtables[mask] = table
+        return table
+
+    def choose_targeted(self, context, rng=random, skip=None):
+        """
+        Bağlama göre hedeflenmiş seçim
+
+        Hedeflemesi bağlamla eşleşen reklamlar önceliklidir; hiçbiri
+        seçilemezse hedeflemesiz reklamlara düşülür. Bağlamı olmayan
+        ziyaretçiye yalnızca hedeflemesiz reklamlar gösterilir.
+        """
+        for mask in self.targeting.match(context or {}):
+            if mask:
+                entry = self.subtable(mask).choose(rng, skip)
+                if entry is not None:
+                    return entry
+        return None
+
+    def choose(self, rng=random, skip=None):
+        """
+        Ağırlıklı rastgele seçim, O(log n)
+
+        skip verilirse (ör. frekans sınırı, rakip reklamveren) elenmeyen
+        reklamlarla geçici bir tablo kurulur, O(n).
+        """
+        if skip is not None:
+            remaining = [entry for entry in self.entries if not skip(entry)]
+            if len(remaining) < len(self.entries):
+                return ZoneTable(remaining, indexed=False).choose(rng) if remaining else None
+        if not self.total:
+            return None
+        if self.fill < 1 and rng.random() >= self.fill:
+            return None
+        point = rng.random() * self.total
+        index = min(bisect.bisect_right(self.cumulative, point), len(self.entries) - 1)
+        return self.entries[index]
+
+
+class AdDecisionEngine:
+    """Süreç içi reklam seçim motoru"""
+
+    def __init__(self):
+        self.zones = {}
+        self.ads = {}
+        self.expires_at = 0
+        self.stale = True
+        self._lock = threading.Lock()
+        self._pid = None
+
+    # --- Tablo oluşturma ---
+
+    def build(self):
+        """Tüm bölgelerin uygunluk tablolarını tek sorguyla oluşturur"""
+        from .models import Advertisement, Campaign
+        from .pacing import sync_campaigns
+        from .serializers import AdvertisementPublicSerializer
+
+        now = timezone.now()
+        ads = Advertisement.objects.filter(
+            is_active=True,
+            zone__is_active=True,
+            campaign__status='active',
+            campaign__start_date__lte=now,
+            campaign__end_date__gte=now,
+        ).select_related('campaign', 'zone').prefetch_related('campaign__target_categories')
+
+        ads = [ad for ad in ads if ad.campaign.is_active and ad.weight > 0]
+
+        # Redis'teki canlı harcama/limit durumu (veritabanı sayaçları geride kalır)
+        campaigns = {ad.campaign_id: ad.campaign for ad in ads}
+        try:
+            pacing = sync_campaigns(campaigns.values(), now)
+        except Exception as e:
+            logger.warning(f"Ad pacing state unavailable: {str(e)}")
+            pacing = {}
+
+        by_zone = {}
+        boundaries = [
+            now + timedelta(seconds=AD_ENGINE_REFRESH_SECONDS),
+            datetime.combine(now.date() + timedelta(days=1), dt_time.min),
+        ]
+        for ad in ads:
+            state = pacing.get(ad.campaign_id)
+            if state and (state['capped'] or not state['pacing']):
+                continue
+            boundaries.append(ad.campaign.end_date)
+            entry = ad_entry(ad, AdvertisementPublicSerializer(ad).data)
+            entry['targeting'] = campaign_targeting(ad.campaign)
+            if state:
+                entry['pacing'] = state['pacing']
+            by_zone.setdefault(ad.zone_id, []).append(entry)
+
+        # Yakında başlayacak kampanyalar için erken yenile
+        next_start = Campaign.objects.filter(
+            status='active',
+            start_date__gt=now
+        ).order_by('start_date').values_list('start_date', flat=True).first()
+        if next_start:
+            boundaries.append(next_start)
+
+        refresh_in = max((min(boundaries) - now).total_seconds(), 1)
+
+        self.zones = {zone_id: ZoneTable(entries) for zone_id, entries in by_zone.items()}
+        self.ads = {entry['ad_id']: entry for entries in by_zone.values() for entry in entries}
+        self.expires_at = time.monotonic() + refresh_in
+        self.stale = False
+
+        logger.info(f"Ad engine rebuilt: {len(self.zones)} zones, {sum(len(t.entries) for t in self.zones.values())} ads")
+
+    def invalidate(self):
+        self.stale = True
+
+    def _ensure_fresh(self):
+        if self._pid != os.getpid():
+            # Fork sonrası (gunicorn preload) her süreç kendi dinleyicisini başlatır
+            self._pid = os.getpid()
+            self.stale = True
+            self._start_listener()
+
+        if not self.stale and time.monotonic() < self.expires_at:
+            return
+
+        # Aynı anda tek yeniden oluşturma; diğer istekler eski tabloyu kullanır
+        if self._lock.acquire(blocking=not self.zones):
+            try:
+                if self.stale or time.monotonic() >= self.expires_at:
+                    self.build()
+            except Exception as e:
+                logger.error(f"Ad engine rebuild failed: {str(e)}")
+                # Eski tablolarla devam et, kısa süre sonra tekrar dene
+                self.stale = False
+                self.expires_at = time.monotonic() + 5
+            finally:
+                self._lock.release()
+
+    # --- Pub/sub ---
+
+    def _start_listener(self):
+        thread = threading.Thread(target=self._listen, name='ad-engine-listener', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        connected_before = False
+        while True:
+            try:
+                pubsub = _pubsub_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(AD_ENGINE_CHANNEL)
+                if connected_before:
+                    # Bağlantı koptuğu sırada kaçırılmış olabilecek değişiklikler için
+                    logger.info("Ad engine listener reconnected")
+                    self.invalidate()
+                connected_before = True
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'message':
+                        self.invalidate()
+            except Exception as e:
+                logger.warning(f"Ad engine listener disconnected: {str(e)}")
+                time.sleep(5)
+
+    # --- Seçim ---
+
+    def ad(self, ad_id):
+        """Tablolardaki reklam kaydı (uygun değilse None)"""
+        self._ensure_fresh()
+        return self.ads.get(ad_id)
+
+    def table_for(self, zone_id):
+        self._ensure_fresh()
+        return self.zones.get(zone_id)
+
+    def choose(self, zone_id, visitor=None, context=None, rng=random):
+        """Bölge için reklam seçer, uygun reklam yoksa None"""
+        return self.choose_many([zone_id], visitor, context, rng)[zone_id]
+
+    def choose_many(self, zone_ids, visitor=None, context=None, rng=random):
+        """
+        Sayfadaki tüm bölgeler için reklam seçer
+
+        - Ziyaretçinin frekans sınırını doldurduğu kampanyalar atlanır
+          (tüm bölgeler için tek Redis okuması).
+        - Aynı reklamveren sayfada iki kez yer almaz; az adaylı bölgeler
+          önce doldurulur ki rekabet dışlaması onları boş bırakmasın.
+        - context (targeting.targeting_context()) ile hedeflemesi eşleşen
+          reklamlar tercih edilir, yoksa hedeflemesizlere düşülür; bağlamda
+          bilinmeyen boyutu hedefleyen reklamlar seçilmez.
+
+        Returns:
+            dict: {zone_id: reklam kaydı veya None}
+        """
+        from .frequency import capped_campaigns
+
+        tables = {zone_id: self.table_for(zone_id) for zone_id in zone_ids}
+
+        caps = {}
+        for table in tables.values():
+            if table is not None:
+                caps.update(table.frequency_caps)
+        capped = capped_campaigns(visitor, caps) if visitor and caps else set()
+        advertisers = set()
+
+        def skip(entry):
+            return entry['campaign_id'] in capped or entry['advertiser_id'] in advertisers
+
+        chosen = dict.fromkeys(zone_ids)
+        for zone_id in sorted((z for z, t in tables.items() if t is not None), key=lambda z: len(tables[z].entries)):
+            entry = tables[zone_id].choose_targeted(context, rng, skip=skip if capped or advertisers else None)
+            if entry is not None:
+                advertisers.add(entry['advertiser_id'])
+                chosen[zone_id] = entry
+        return chosen
+
+
+def _pubsub_client():
+    """
+    Dinleyici için ayrı Redis istemcisi: önbellek havuzundaki SOCKET_TIMEOUT
+    boşta bekleyen aboneliği düşürmesin, kopan bağlantı sağlık kontrolüyle fark edilsin
+    """
+    location = settings.CACHES['default']['LOCATION']
+    if isinstance(location, (list, tuple)):
+        location = location[0]
+    return redis.Redis.from_url(
+        location,
+        socket_timeout=None,
+        socket_keepalive=True,
+        health_check_interval=AD_ENGINE_HEALTH_CHECK_SECONDS,
+    )
+
+
+def publish_engine_reload():
+    """Tüm worker'lara tabloları yeniden oluşturmalarını bildirir"""
+    try:
+        get_redis_connection('default').publish(AD_ENGINE_CHANNEL, 'reload')
+    except Exception as e:
+        logger.warning(f"Could not publish ad engine reload: {str(e)}")
+
+
+ad_engine = AdDecisionEngine()
@@ -0,0 +1,212 @@
+"""
+Invalid-traffic (IVT) filtering for ad events.
+
+track_event() screens every impression and click before it can touch the
+counters, pacing state or spend:
+
+* User-Agent classification (empty, known bots, headless browsers and
+  HTTP libraries), memoized per process.
+* Sliding-window rate detectors per visitor (IP + User-Agent), per IP and
+  per subnet (/24 for IPv4, /48 for IPv6), using the two-bucket
+  approximation: the previous minute's count weighted by how much of it
+  still overlaps the window, plus the current minute's count.
+* Click-to-impression delay: every accepted impression stores its time
+  under its token for a while; a click that arrives faster than a human
+  could react is rejected.
+
+When a rate detector trips, the verdict is cached in Redis for
+IVT_BLOCK_SECONDS at the level that tripped (the visitor, the IP or the
+whole subnet), so further events from it are rejected with a single
+lookup. Windows use the event's own timestamp, so events consumed late
+(beacons) are rated and compared when they happened. All Redis checks run
+in one Lua call. Rejected events are
+written to QuarantinedAdEvent instead of the event tables.
+"""
+
+import ipaddress
+import logging
+import re
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from utils.helpers import parse_user_agent
+
+logger = logging.getLogger(__name__)
+
+IVT_KEY_PREFIX = 'news:ads:ivt'
+IVT_WINDOW_SECONDS = 60
+IVT_BLOCK_SECONDS = 60 * 60
+# Gösterimden bu kadar kısa süre sonra gelen tıklama insan işi sayılmaz
+MIN_CLICK_DELAY_SECONDS = 1.0
+# Gösterim zamanı tıklama kontrolü için bu süre saklanır
+IMPRESSION_TIME_TTL = 30 * 60
+
+# Dakika başına olay sınırları (settings.AD_IVT_RATE_LIMITS ile değiştirilebilir)
+DEFAULT_RATE_LIMITS = {
+    'impression': {'visitor': 60, 'ip': 300, 'subnet': 3000},
+    'click': {'visitor': 5, 'ip': 20, 'subnet': 200},
+}
+
+# user_agents kütüphanesinin bot listesinde olmayan otomasyon araçları
+AUTOMATION_UA_RE = re.compile(
+    r'headless|phantomjs|selenium|webdriver|puppeteer|playwright|electron|'
+    r'curl|wget|python-|aiohttp|httpx|go-http-client|java/|okhttp|axios|node-fetch|'
+    r'libwww|scrapy|httpclient|bot\b|crawl|spider|slurp|preview',
+    re.IGNORECASE
+)
+
+# KEYS: gösterim zamanı anahtarı,
+#       her dedektör için (engel anahtarı, bu dakika, önceki dakika)
+# ARGV: şimdi (sn), pencere (sn), engel süresi, mod (impression/click/''),
+#       asgari tıklama gecikmesi, gösterim zamanı ömrü,
+#       her dedektör için (sınır, sebep)
+SCREEN_SCRIPT = """
+local detectors = (#KEYS - 1) / 3
+
+for i = 1, detectors do
+    local verdict = redis.call('GET', KEYS[3 * i - 1])
+    if verdict then
+        return verdict
+    end
+end
+
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local overlap = 1 - (now % window) / window
+
+for i = 1, detectors do
+    local current = KEYS[3 * i]
+    local count = redis.call('INCR', current)
+    if count == 1 then
+        redis.call('EXPIRE', current, window * 2)
+    end
+    local previous = tonumber(redis.call('GET', KEYS[3 * i + 1])) or 0
+    if count + previous * overlap > tonumber(ARGV[5 + 2 * i]) then
+        redis.call('SET', KEYS[3 * i - 1], ARGV[6 + 2 * i], 'EX', ARGV[3])
+        return ARGV[6 + 2 * i]
+    end
+end
+
+if ARGV[4] == 'impression' then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[6])
+elseif ARGV[4] == 'click' then
+    local shown = tonumber(redis.call('GET', KEYS[1]))
+    if shown and now - shown < tonumber(ARGV[5]) then
+        return 'click_too_fast'
+    end
+end
+return false
+"""
+
+_screen_script = None
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def rate_limits():
+    return getattr(settings, 'AD_IVT_RATE_LIMITS', DEFAULT_RATE_LIMITS)
+
+
+@lru_cache(maxsize=4096)
+def describe_user_agent(user_agent):
+    """
+    User agent'tan cihaz tipi, tarayıcı, işletim sistemi ve bot bilgisi
+
+    Aynı birkaç yüz UA string'i sürekli tekrarlandığı için sonuç süreç
+    içinde önbelleğe alınır.
+    """
+    if not user_agent:
+        return {'device_type': '', 'browser': '', 'os': '', 'is_bot': True}
+
+    info = parse_user_agent(user_agent)
+    info['is_bot'] = info['is_bot'] or bool(AUTOMATION_UA_RE.search(user_agent))
+    return info
+
+
+def user_agent_verdict(user_agent):
+    """UA geçersiz trafik gösteriyorsa sebep, aksi halde None"""
+    if not user_agent:
+        return 'empty_user_agent'
+    if describe_user_agent(user_agent)['is_bot']:
+        return 'bot_user_agent'
+    return None
+
+
+def subnet(ip_address):
+    """IPv4 için /24, IPv6 için /48 ağ adresi (geçersiz IP'de None)"""
+    try:
+        address = ipaddress.ip_address(ip_address)
+    except ValueError:
+        return None
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+
+def block_key(source, value):
+    """Dedektör seviyesindeki engel anahtarı (visitor, ip veya subnet)"""
+    return f'{IVT_KEY_PREFIX}:block:{source}:{value}'
+
+
+def impression_time_key(token):
+    return f'{IVT_KEY_PREFIX}:shown:{token}'
+
+
+def screen(kind, event, visitor, now=None):
+    """
+    Olayı geçersiz trafik kurallarına göre kontrol eder
+
+    Args:
+        kind: 'impression' veya 'click'
+        event: tracking.clean_event() çıktısı (ip_address ve token /
+               impression_token eklenmiş)
+        visitor: frequency.visitor_id() çıktısı
+        now: Olayın zamanı (epoch sn); verilmezse şimdiki zaman
+
+    Returns:
+        str: Karantina sebebi (QuarantinedAdEvent.REASONS) veya None
+    """
+    global _screen_script
+
+    reason = user_agent_verdict(event.get('user_agent', ''))
+    if reason:
+        return reason
+
+    now = now or time.time()
+    window = int(now // IVT_WINDOW_SECONDS)
+    sources = {
+        'visitor': visitor,
+        'ip': event.get('ip_address'),
+        'subnet': subnet(event.get('ip_address') or ''),
+    }
+
+    keys = ['']
+    args = [now, IVT_WINDOW_SECONDS, IVT_BLOCK_SECONDS, '', MIN_CLICK_DELAY_SECONDS, IMPRESSION_TIME_TTL]
+    for source, limit in rate_limits()[kind].items():
+        if not sources.get(source):
+            continue
+        prefix = f'{IVT_KEY_PREFIX}:rate:{kind}:{source}:{sources[source]}'
+        keys.extend([block_key(source, sources[source]), f'{prefix}:{window}', f'{prefix}:{window - 1}'])
+        args.extend([limit, f'{source}_rate'])
+
+    token = event.get('token') if kind == 'impression' else event.get('impression_token')
+    if token:
+        keys[0] = impression_time_key(token)
+        args[3] = kind
+
+    try:
+        if _screen_script is None:
+            _screen_script = _redis().register_script(SCREEN_SCRIPT)
+        reason = _screen_script(keys=keys, args=args)
+    except Exception as e:
+        # Filtre çalışamazsa olay normal yoldan devam eder
+        logger.warning(f"Invalid traffic screening failed: {str(e)}")
+        return None
+
+    if isinstance(reason, bytes):
+        reason = reason.decode()
+    return reason or None
@@ -0,0 +1,192 @@
+"""
+Daily revenue reconciliation.
+
+reconcile_day() recomputes what each campaign owes for one day from the
+raw AdImpression / AdClick / AdConversion rows and the campaign's pricing
+model, and records it in the append-only RevenueLedgerEntry table. Raw
+rows are counted per chunk of advertisements so every query can use the
+(advertisement, time) indexes, and the grouped results are read through
+server-side cursors (QuerySet.iterator) instead of being loaded at once.
+
+A day is reconciled by one caller at a time (the nightly task or the
+reconcile_ad_revenue command): reconcile_day() holds a per-day cache lock
+and raises ReconciliationInProgress if it is already taken.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from utils.cache_utils import acquire_lock, release_lock
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_AD_CHUNK_SIZE = 500
+RECONCILE_LOCK_TIMEOUT = 60 * 60
+AMOUNT_PLACES = Decimal('0.0001')
+COUNT_FIELDS = ('impressions', 'clicks', 'conversions')
+
+# Tutar hesaplanmayan kampanya durumları (sabit ücret için)
+UNBILLED_STATUSES = ('draft', 'cancelled')
+
+
+def _event_counts(day_start, day_end, ad_ids):
+    """{campaign_id: {'impressions': n, 'clicks': n, 'conversions': n}}"""
+    from .models import AdImpression, AdClick, AdConversion
+
+    sources = (
+        ('impressions', AdImpression, 'viewed_at'),
+        ('clicks', AdClick, 'clicked_at'),
+        ('conversions', AdConversion, 'converted_at'),
+    )
+    counts = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0))
+
+    for start in range(0, len(ad_ids), RECONCILE_AD_CHUNK_SIZE):
+        chunk = ad_ids[start:start + RECONCILE_AD_CHUNK_SIZE]
+        for field, model, time_field in sources:
+            rows = model.objects.filter(**{
+                'advertisement_id__in': chunk,
+                f'{time_field}__gte': day_start,
+                f'{time_field}__lt': day_end,
+            }).values('advertisement__campaign_id').annotate(total=Count('id')).order_by()
+            for row in rows.iterator(chunk_size=RECONCILE_AD_CHUNK_SIZE):
+                counts[row['advertisement__campaign_id']][field] += row['total']
+
+    return counts
+
+
+def flat_daily_amount(campaign):
+    """Sabit ücretli kampanyada bütçenin kampanya günlerine eşit payı"""
+    days = (campaign.end_date.date() - campaign.start_date.date()).days + 1
+    return (campaign.budget / max(days, 1)).quantize(AMOUNT_PLACES)
+
+
+def _unit_price(campaign):
+    if campaign.pricing_model == 'flat':
+        return flat_daily_amount(campaign)
+    price = {
+        'cpm': campaign.cpm_price,
+        'cpc': campaign.cpc_price,
+        'cpa': campaign.cpa_price,
+    }.get(campaign.pricing_model)
+    return price or Decimal('0')
+
+
+class ReconciliationInProgress(Exception):
+    """Aynı gün için başka bir mutabakat çalışıyor"""
+
+
+def reconcile_lock_key(day):
+    return f'advertisements:reconcile:{day.isoformat()}'
+
+
+def reconcile_day(day):
+    """
+    Bir günün gelirini ham olaylardan yeniden hesaplar ve deftere yazar
+
+    İlk çalıştırmada her kampanya için 'charge' kaydı oluşturur. Tekrar
+    çalıştırıldığında (ör. geç gelen olaylar, geçersiz trafik temizliği)
+    yalnızca defterdeki toplamla fark varsa 'adjustment' kaydı ekler.
+    Aynı gün için iki çalıştırma aynı farkı iki kez yazmasın diye gün
+    kilidi tutulur.
+
+    Raises:
+        ReconciliationInProgress: Gün başka bir süreçte işleniyorsa
+
+    Returns:
+        dict: {'charges': n, 'adjustments': n, 'amount': Decimal}
+    """
+    lock_key = reconcile_lock_key(day)
+    token = acquire_lock(lock_key, RECONCILE_LOCK_TIMEOUT)
+    if token is None:
+        raise ReconciliationInProgress(f'Reconciliation for {day} already running')
+
+    try:
+        return _reconcile_day(day)
+    finally:
+        # Süresi dolup başka sürecin aldığı kilit silinmez
+        release_lock(lock_key, token)
+
+
+def _reconcile_day(day):
+    from .models import Advertisement, Campaign, RevenueLedgerEntry
+
+    day_start = datetime.combine(day, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    # Gün içinde yayında olabilecek kampanyaların reklamları
+    ad_ids = list(Advertisement.objects.filter(
+        campaign__start_date__lt=day_end,
+        campaign__end_date__gte=day_start,
+    ).order_by('id').values_list('id', flat=True))
+
+    counts = _event_counts(day_start, day_end, ad_ids)
+
+    flat_ids = set(Campaign.objects.filter(
+        pricing_model='flat',
+        start_date__lt=day_end,
+        end_date__gte=day_start,
+    ).exclude(status__in=UNBILLED_STATUSES).values_list('id', flat=True))
+
+    booked = {
+        row['campaign_id']: row
+        for row in RevenueLedgerEntry.objects.filter(date=day).values('campaign_id').annotate(
+            impressions=Sum('impressions'),
+            clicks=Sum('clicks'),
+            conversions=Sum('conversions'),
+            amount=Sum('amount'),
+        ).order_by()
+    }
+
+    campaign_ids = set(counts) | flat_ids | set(booked)
+    campaigns = Campaign.objects.in_bulk(campaign_ids)
+
+    entries = []
+    result = {'charges': 0, 'adjustments': 0, 'amount': Decimal('0')}
+    for campaign_id in sorted(campaign_ids):
+        campaign = campaigns[campaign_id]
+        totals = counts.get(campaign_id, dict.fromkeys(COUNT_FIELDS, 0))
+
+        if campaign.pricing_model == 'flat':
+            amount = flat_daily_amount(campaign) if campaign_id in flat_ids else Decimal('0')
+        else:
+            amount = campaign.cost_for(**totals)
+        amount = Decimal(amount).quantize(AMOUNT_PLACES)
+
+        previous = booked.get(campaign_id)
+        if previous is None:
+            if not amount and not any(totals.values()):
+                continue
+            entry_type = 'charge'
+            delta = dict(totals, amount=amount)
+        else:
+            entry_type = 'adjustment'
+            delta = {field: totals[field] - previous[field] for field in COUNT_FIELDS}
+            delta['amount'] = amount - previous['amount']
+            if not delta['amount'] and not any(delta[field] for field in COUNT_FIELDS):
+                continue
+
+        entries.append(RevenueLedgerEntry(
+            campaign_id=campaign_id,
+            advertiser_id=campaign.advertiser_id,
+            date=day,
+            entry_type=entry_type,
+            pricing_model=campaign.pricing_model,
+            unit_price=_unit_price(campaign),
+            **delta,
+        ))
+        result['charges' if entry_type == 'charge' else 'adjustments'] += 1
+        result['amount'] += delta['amount']
+
+    with transaction.atomic():
+        RevenueLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+    logger.info(
+        f"Reconciled {day}: {result['charges']} charges, "
+        f"{result['adjustments']} adjustments, {result['amount']} TRY"
+    )
+    return result
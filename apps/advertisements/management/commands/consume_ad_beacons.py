@@ -0,0 +1,41 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.advertisements import beacon
+
+
+class Command(BaseCommand):
+    help = 'Beacon stream\'indeki reklam olaylarını partiler halinde işler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Parti başına en fazla kayıt')
+        parser.add_argument('--block', type=int, default=1000, help='Yeni kayıt bekleme süresi (ms)')
+        parser.add_argument('--once', action='store_true', help='Bekleyen kayıtları işleyip çık')
+
+    def handle(self, *args, **options):
+        consumer = f'{socket.gethostname()}-{os.getpid()}'
+        beacon.ensure_group()
+
+        self.stdout.write(self.style.SUCCESS(f'Ad beacon consumer {consumer} started'))
+
+        while True:
+            try:
+                counts = beacon.drain(consumer, count=options['batch_size'], block_ms=options['block'])
+            except Exception as e:
+                self.stderr.write(f'Could not drain ad beacons: {e}')
+                time.sleep(1)
+                continue
+
+            if counts is None:
+                if options['once']:
+                    return
+                continue
+
+            self.stdout.write(
+                f"Processed beacons: {counts['impression']} impressions, {counts['click']} clicks, "
+                f"{counts['adblock']} adblock, {counts['quarantined']} quarantined, {counts['skipped']} skipped, "
+                f"{counts['invalid']} invalid"
+            )
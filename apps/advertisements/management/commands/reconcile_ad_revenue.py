@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.advertisements.ledger import ReconciliationInProgress, reconcile_day
+
+
+class Command(BaseCommand):
+    help = 'Reklam gelirini ham olaylardan yeniden hesaplayıp gelir defterine yazar (tarih aralığı)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', help='Başlangıç günü (YYYY-MM-DD)')
+        parser.add_argument('end', nargs='?', help='Bitiş günü (YYYY-MM-DD, varsayılan: başlangıç)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start'])
+            end = date.fromisoformat(options['end']) if options['end'] else start
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        if end < start:
+            raise CommandError('end must not be before start')
+
+        day = start
+        while day <= end:
+            try:
+                result = reconcile_day(day)
+            except ReconciliationInProgress as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"{day}: {result['charges']} charges, {result['adjustments']} adjustments, {result['amount']} TRY"
+            )
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS('Reconciliation finished'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('impressions', models.PositiveIntegerField(default=0, verbose_name='Gösterim')),
+                ('unique_ips', models.PositiveIntegerField(default=0, verbose_name='Tekil IP')),
+                ('clicks', models.PositiveIntegerField(default=0, verbose_name='Tıklama')),
+                ('conversions', models.PositiveIntegerField(default=0, verbose_name='Dönüşüm')),
+                ('spend', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='Harcama (₺)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('advertisement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='advertisements.advertisement', verbose_name='Reklam')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='advertisements.campaign', verbose_name='Kampanya')),
+            ],
+            options={
+                'verbose_name': 'Günlük Reklam İstatistiği',
+                'verbose_name_plural': 'Günlük Reklam İstatistikleri',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['campaign', 'date'], name='advertiseme_campaig_edbd90_idx')],
+                'unique_together': {('advertisement', 'date')},
+            },
+        ),
+    ]
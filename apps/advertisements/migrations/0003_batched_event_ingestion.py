@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0002_addailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adimpression',
+            name='token',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True, verbose_name='Gösterim Anahtarı'),
+        ),
+        migrations.AlterField(
+            model_name='adclick',
+            name='clicked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Tıklanma Zamanı'),
+        ),
+        migrations.AlterField(
+            model_name='adimpression',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Görüntülenme Zamanı'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0003_batched_event_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='frequency_cap',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(255)], verbose_name='Frekans Sınırı'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='frequency_window_hours',
+            field=models.PositiveSmallIntegerField(default=24, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(168)], verbose_name='Frekans Penceresi (saat)'),
+        ),
+    ]
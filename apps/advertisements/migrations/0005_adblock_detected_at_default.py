@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0004_campaign_frequency_cap'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='adblockdetection',
+            name='detected_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Tespit Zamanı'),
+        ),
+    ]
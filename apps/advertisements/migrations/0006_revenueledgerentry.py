@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0005_adblock_detected_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('entry_type', models.CharField(choices=[('charge', 'Tahakkuk'), ('adjustment', 'Düzeltme')], default='charge', max_length=20, verbose_name='Kayıt Tipi')),
+                ('pricing_model', models.CharField(choices=[('cpm', 'CPM (Bin Gösterim)'), ('cpc', 'CPC (Tıklama Başına)'), ('cpa', 'CPA (Eylem Başına)'), ('flat', 'Sabit Ücret')], max_length=20, verbose_name='Fiyatlandırma Modeli')),
+                ('unit_price', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='Birim Fiyat (₺)')),
+                ('impressions', models.BigIntegerField(default=0, verbose_name='Gösterim')),
+                ('clicks', models.BigIntegerField(default=0, verbose_name='Tıklama')),
+                ('conversions', models.BigIntegerField(default=0, verbose_name='Dönüşüm')),
+                ('amount', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Tutar (₺)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('advertiser', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='advertisements.advertiser', verbose_name='Reklamveren')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='advertisements.campaign', verbose_name='Kampanya')),
+            ],
+            options={
+                'verbose_name': 'Gelir Defteri Kaydı',
+                'verbose_name_plural': 'Gelir Defteri',
+                'ordering': ['-date', 'campaign'],
+                'indexes': [models.Index(fields=['date', 'campaign'], name='advertiseme_date_33e2fc_idx'), models.Index(fields=['advertiser', 'date'], name='advertiseme_adverti_0da6cb_idx')],
+            },
+        ),
+    ]
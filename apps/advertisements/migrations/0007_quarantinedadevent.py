@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0006_revenueledgerentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarantinedAdEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('impression', 'Gösterim'), ('click', 'Tıklama')], max_length=20, verbose_name='Olay Tipi')),
+                ('reason', models.CharField(choices=[('empty_user_agent', 'Boş User Agent'), ('bot_user_agent', 'Bot User Agent'), ('visitor_rate', 'Ziyaretçi Hız Sınırı'), ('ip_rate', 'IP Hız Sınırı'), ('subnet_rate', 'Alt Ağ Hız Sınırı'), ('click_too_fast', 'Gösterimden Hemen Sonra Tıklama')], max_length=30, verbose_name='Sebep')),
+                ('visitor', models.CharField(max_length=32, verbose_name='Ziyaretçi Anahtarı')),
+                ('ip_address', models.GenericIPAddressField(verbose_name='IP Adresi')),
+                ('user_agent', models.CharField(blank=True, max_length=500, verbose_name='User Agent')),
+                ('page_url', models.URLField(blank=True, verbose_name='Sayfa URL')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Olay Verisi')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Olay Zamanı')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('advertisement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantined_events', to='advertisements.advertisement', verbose_name='Reklam')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantined_events', to='advertisements.campaign', verbose_name='Kampanya')),
+            ],
+            options={
+                'verbose_name': 'Karantinadaki Reklam Olayı',
+                'verbose_name_plural': 'Karantinadaki Reklam Olayları',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['advertisement', '-occurred_at'], name='advertiseme_adverti_611e34_idx'), models.Index(fields=['reason', '-occurred_at'], name='advertiseme_reason_2c9172_idx'), models.Index(fields=['ip_address', '-occurred_at'], name='advertiseme_ip_addr_8a9e5a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0007_quarantinedadevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdBlockDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('page_template', models.CharField(max_length=50, verbose_name='Sayfa Şablonu')),
+                ('device_type', models.CharField(max_length=20, verbose_name='Cihaz Tipi')),
+                ('detections', models.PositiveIntegerField(default=0, verbose_name='Tespit')),
+                ('unique_visitors', models.PositiveIntegerField(default=0, verbose_name='Tekil Ziyaretçi')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Günlük AdBlock İstatistiği',
+                'verbose_name_plural': 'Günlük AdBlock İstatistikleri',
+                'ordering': ['-date', 'page_template', 'device_type'],
+                'unique_together': {('date', 'page_template', 'device_type')},
+            },
+        ),
+    ]
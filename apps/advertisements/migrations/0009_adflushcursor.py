@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0008_adblockdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdFlushCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=50, unique=True, verbose_name='Akış')),
+                ('last_batch', models.PositiveBigIntegerField(default=0, verbose_name='Son Parti')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Flush İmleci',
+                'verbose_name_plural': 'Flush İmleçleri',
+            },
+        ),
+    ]
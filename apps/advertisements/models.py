@@ -1,4 +1,6 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -98,6 +100,18 @@ class Campaign(models.Model):
     max_clicks = models.PositiveIntegerField(null=True, blank=True, verbose_name='Maksimum Tıklama')
     daily_budget = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='Günlük Bütçe (₺)')
     
+    # Frekans sınırı: aynı ziyaretçiye pencere içinde en fazla N gösterim
+    frequency_cap = models.PositiveSmallIntegerField(
+        null=True, blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(255)],
+        verbose_name='Frekans Sınırı'
+    )
+    frequency_window_hours = models.PositiveSmallIntegerField(
+        default=24,
+        validators=[MinValueValidator(1), MaxValueValidator(168)],
+        verbose_name='Frekans Penceresi (saat)'
+    )
+    
     start_date = models.DateTimeField(verbose_name='Başlangıç Tarihi')
     end_date = models.DateTimeField(verbose_name='Bitiş Tarihi')
     
@@ -140,6 +154,16 @@ class Campaign(models.Model):
             (not self.max_clicks or self.total_clicks < self.max_clicks)
         )
     
+    def cost_for(self, impressions=0, clicks=0, conversions=0):
+        """Fiyatlandırma modeline göre verilen olayların maliyeti (sabit ücretli kampanyalarda 0)"""
+        if self.pricing_model == 'cpm' and self.cpm_price:
+            return self.cpm_price * impressions / 1000
+        if self.pricing_model == 'cpc' and self.cpc_price:
+            return self.cpc_price * clicks
+        if self.pricing_model == 'cpa' and self.cpa_price:
+            return self.cpa_price * conversions
+        return Decimal('0')
+    
     @property
     def ctr(self):
         """Click-Through Rate (Tıklama Oranı)"""
@@ -246,8 +270,11 @@ class AdImpression(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
     
-    # Zaman bilgisi
-    viewed_at = models.DateTimeField(auto_now_add=True, verbose_name='Görüntülenme Zamanı')
+    # Toplu yazımda tıklamaları gösterime bağlamak için (tracking.py)
+    token = models.CharField(max_length=32, null=True, blank=True, unique=True, verbose_name='Gösterim Anahtarı')
+    
+    # Zaman bilgisi (toplu yazımda olay zamanı korunur)
+    viewed_at = models.DateTimeField(default=timezone.now, verbose_name='Görüntülenme Zamanı')
     
     class Meta:
         verbose_name = 'Reklam Gösterimi'
@@ -287,8 +314,8 @@ class AdClick(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
     
-    # Zaman bilgisi
-    clicked_at = models.DateTimeField(auto_now_add=True, verbose_name='Tıklanma Zamanı')
+    # Zaman bilgisi (toplu yazımda olay zamanı korunur)
+    clicked_at = models.DateTimeField(default=timezone.now, verbose_name='Tıklanma Zamanı')
     
     class Meta:
         verbose_name = 'Reklam Tıklaması'
@@ -344,9 +371,204 @@ class AdBlockDetection(models.Model):
     user = models.ForeignKey('accounts.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Kullanıcı')
     user_agent = models.CharField(max_length=500, blank=True, verbose_name='User Agent')
     page_url = models.URLField(verbose_name='Sayfa URL')
-    detected_at = models.DateTimeField(auto_now_add=True, verbose_name='Tespit Zamanı')
+    detected_at = models.DateTimeField(default=timezone.now, verbose_name='Tespit Zamanı')
     
     class Meta:
         verbose_name = 'AdBlock Tespiti'
         verbose_name_plural = 'AdBlock Tespitleri'
         ordering = ['-detected_at']
+
+
+class AdBlockDailyStats(models.Model):
+    """
+    AdBlock tespitlerinin günlük özeti (sayfa şablonu ve cihaz tipine göre)
+    
+    Redis sayaçlarından flush_adblock_stats işiyle doldurulur; tekil
+    ziyaretçi sayısı HyperLogLog tahminidir (~%1 hata).
+    """
+    date = models.DateField(verbose_name='Tarih')
+    page_template = models.CharField(max_length=50, verbose_name='Sayfa Şablonu')
+    device_type = models.CharField(max_length=20, verbose_name='Cihaz Tipi')
+    
+    detections = models.PositiveIntegerField(default=0, verbose_name='Tespit')
+    unique_visitors = models.PositiveIntegerField(default=0, verbose_name='Tekil Ziyaretçi')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Günlük AdBlock İstatistiği'
+        verbose_name_plural = 'Günlük AdBlock İstatistikleri'
+        ordering = ['-date', 'page_template', 'device_type']
+        unique_together = ['date', 'page_template', 'device_type']
+    
+    def __str__(self):
+        return f"{self.date} - {self.page_template} - {self.device_type}"
+
+
+class QuarantinedAdEvent(models.Model):
+    """
+    Geçersiz trafik filtresine takılan reklam olayları (bkz. fraud.py)
+
+    Bu olaylar sayaçlara, pacing'e, günlük istatistiklere ve gelir
+    defterine hiç girmez; yalnızca inceleme için saklanır.
+    """
+    EVENT_TYPES = [
+        ('impression', 'Gösterim'),
+        ('click', 'Tıklama'),
+    ]
+
+    REASONS = [
+        ('empty_user_agent', 'Boş User Agent'),
+        ('bot_user_agent', 'Bot User Agent'),
+        ('visitor_rate', 'Ziyaretçi Hız Sınırı'),
+        ('ip_rate', 'IP Hız Sınırı'),
+        ('subnet_rate', 'Alt Ağ Hız Sınırı'),
+        ('click_too_fast', 'Gösterimden Hemen Sonra Tıklama'),
+    ]
+
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES, verbose_name='Olay Tipi')
+    advertisement = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='quarantined_events', verbose_name='Reklam')
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='quarantined_events', verbose_name='Kampanya')
+    reason = models.CharField(max_length=30, choices=REASONS, verbose_name='Sebep')
+
+    visitor = models.CharField(max_length=32, verbose_name='Ziyaretçi Anahtarı')
+    ip_address = models.GenericIPAddressField(verbose_name='IP Adresi')
+    user_agent = models.CharField(max_length=500, blank=True, verbose_name='User Agent')
+    page_url = models.URLField(blank=True, verbose_name='Sayfa URL')
+
+    # Ham olay (cihaz, konum, gösterim anahtarı...)
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Olay Verisi')
+
+    occurred_at = models.DateTimeField(default=timezone.now, verbose_name='Olay Zamanı')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Karantinadaki Reklam Olayı'
+        verbose_name_plural = 'Karantinadaki Reklam Olayları'
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['advertisement', '-occurred_at']),
+            models.Index(fields=['reason', '-occurred_at']),
+            models.Index(fields=['ip_address', '-occurred_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} - {self.get_reason_display()} - {self.occurred_at}"
+
+
+class AdDailyStats(models.Model):
+    """Reklam bazında günlük performans özeti (kampanya raporları buradan okunur)"""
+    advertisement = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='Reklam')
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='Kampanya')
+    date = models.DateField(verbose_name='Tarih')
+    
+    impressions = models.PositiveIntegerField(default=0, verbose_name='Gösterim')
+    unique_ips = models.PositiveIntegerField(default=0, verbose_name='Tekil IP')
+    clicks = models.PositiveIntegerField(default=0, verbose_name='Tıklama')
+    conversions = models.PositiveIntegerField(default=0, verbose_name='Dönüşüm')
+    spend = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name='Harcama (₺)')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Günlük Reklam İstatistiği'
+        verbose_name_plural = 'Günlük Reklam İstatistikleri'
+        ordering = ['-date']
+        unique_together = ['advertisement', 'date']
+        indexes = [
+            models.Index(fields=['campaign', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.advertisement_id} - {self.date}"
+    
+    @classmethod
+    def increment(cls, advertisement_id, campaign_id, date, **deltas):
+        """
+        Günlük sayaçları atomik olarak artır (satır yoksa oluştur)
+        
+        Örn: AdDailyStats.increment(ad.id, ad.campaign_id, today, impressions=1, spend=Decimal('0.01'))
+        """
+        updates = {field: F(field) + value for field, value in deltas.items()}
+        lookup = {'advertisement_id': advertisement_id, 'date': date}
+        
+        if cls.objects.filter(**lookup).update(**updates):
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(campaign_id=campaign_id, **lookup, **deltas)
+        except IntegrityError:
+            # Aynı anda başka bir istek satırı oluşturdu
+            cls.objects.filter(**lookup).update(**updates)
+
+
+
+class AdFlushCursor(models.Model):
+    """
+    Redis'ten veritabanına aktarılan son partinin numarası (akış başına tek satır)
+
+    Parti, yazıldığı transaction içinde burada işaretlenir; flush yarıda
+    kalıp aynı parti tekrar denendiğinde ikinci kez uygulanmaz.
+    """
+    stream = models.CharField(max_length=50, unique=True, verbose_name='Akış')
+    last_batch = models.PositiveBigIntegerField(default=0, verbose_name='Son Parti')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Flush İmleci'
+        verbose_name_plural = 'Flush İmleçleri'
+
+    def __str__(self):
+        return f"{self.stream} - {self.last_batch}"
+
+
+class RevenueLedgerEntry(models.Model):
+    """
+    Kampanya bazında günlük gelir defteri (değiştirilemez)
+    
+    Mutabakat işi her gün için ham olaylardan hesaplanan tutarı 'charge'
+    kaydı olarak yazar; sonradan fark çıkarsa kayıt güncellenmez, farkı
+    içeren 'adjustment' kaydı eklenir. Gelir raporları buradan okunur.
+    """
+    ENTRY_TYPES = [
+        ('charge', 'Tahakkuk'),
+        ('adjustment', 'Düzeltme'),
+    ]
+    
+    campaign = models.ForeignKey(Campaign, on_delete=models.PROTECT, related_name='ledger_entries', verbose_name='Kampanya')
+    advertiser = models.ForeignKey(Advertiser, on_delete=models.PROTECT, related_name='ledger_entries', verbose_name='Reklamveren')
+    date = models.DateField(verbose_name='Tarih')
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES, default='charge', verbose_name='Kayıt Tipi')
+    
+    # Mutabakat anındaki fiyatlandırma
+    pricing_model = models.CharField(max_length=20, choices=Campaign.PRICING_MODELS, verbose_name='Fiyatlandırma Modeli')
+    unit_price = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name='Birim Fiyat (₺)')
+    
+    # Düzeltme kayıtlarında farklar (negatif olabilir)
+    impressions = models.BigIntegerField(default=0, verbose_name='Gösterim')
+    clicks = models.BigIntegerField(default=0, verbose_name='Tıklama')
+    conversions = models.BigIntegerField(default=0, verbose_name='Dönüşüm')
+    amount = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Tutar (₺)')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Gelir Defteri Kaydı'
+        verbose_name_plural = 'Gelir Defteri'
+        ordering = ['-date', 'campaign']
+        indexes = [
+            models.Index(fields=['date', 'campaign']),
+            models.Index(fields=['advertiser', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.campaign_id} - {self.date} - {self.amount}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger entries are immutable; record an adjustment instead')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Ledger entries are immutable; record an adjustment instead')
@@ -0,0 +1,149 @@
+"""
+Real-time budget pacing and capping for campaigns.
+
+Each running campaign has a Redis hash (news:ads:pacing:{id}) holding its
+limits and live totals in micro-units:
+
+    budget, daily_budget, max_impressions, max_clicks   (-1 = no limit)
+    spent, spent:{YYYY-MM-DD}, impressions, clicks
+
+The tracking script (tracking.TRACK_SCRIPT) checks and charges this hash
+atomically on every impression/click, refuses events once a limit is hit
+and publishes 'exhausted:{id}' on the engine channel the moment a charge
+crosses a limit, so every worker drops the campaign from its zone tables
+on its next request. The engine reads the same hashes when it builds its
+tables to skip exhausted campaigns and to throttle campaigns that are
+spending their daily budget ahead of schedule.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db.models import Sum
+from django_redis import get_redis_connection
+
+from .engine import MICROS
+
+logger = logging.getLogger(__name__)
+
+PACING_KEY_PREFIX = 'news:ads:pacing'
+# Her senkronizasyonda yenilenir; biten kampanyaların anahtarları kendiliğinden silinir
+PACING_KEY_TTL = 60 * 60 * 24 * 2
+
+UNLIMITED = -1
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def pacing_key(campaign_id):
+    return f'{PACING_KEY_PREFIX}:{campaign_id}'
+
+
+def day_field(day):
+    return f'spent:{day.isoformat()}'
+
+
+def _micros(amount):
+    return int((amount or 0) * MICROS)
+
+
+def campaign_limits(campaign):
+    """Kampanya limitlerini pacing hash'indeki biçime çevirir (0/boş = limitsiz, is_active gibi)"""
+    return {
+        'budget': _micros(campaign.budget) or UNLIMITED,
+        'daily_budget': _micros(campaign.daily_budget) or UNLIMITED,
+        'max_impressions': campaign.max_impressions or UNLIMITED,
+        'max_clicks': campaign.max_clicks or UNLIMITED,
+    }
+
+
+def pacing_probability(daily_budget, day_spent, now):
+    """
+    Günlük bütçeyi güne yaymak için gösterim olasılığı (0-1)
+
+    Kalan bütçe, kalan süre için planlanan harcamadan azsa (kampanya
+    planın önündeyse) gösterimler aynı oranda seyreltilir.
+    """
+    if daily_budget == UNLIMITED:
+        return 1.0
+
+    remaining = daily_budget - day_spent
+    if remaining <= 0:
+        return 0.0
+
+    day_start = datetime.combine(now.date(), time.min)
+    elapsed = (now - day_start).total_seconds() / timedelta(days=1).total_seconds()
+    planned = daily_budget * (1 - elapsed)
+    if remaining >= planned:
+        return 1.0
+    return remaining / planned
+
+
+def is_capped(limits, totals):
+    """limits ve totals aynı anahtarları kullanır (budget, daily_budget, ...)"""
+    return any(
+        limit != UNLIMITED and totals.get(field, 0) >= limit
+        for field, limit in limits.items()
+    )
+
+
+def sync_campaigns(campaigns, now):
+    """
+    Kampanyaların pacing hash'lerini günceller ve anlık durumlarını döndürür
+
+    Limitler her seferinde yazılır (yönetici bütçeyi değiştirmiş olabilir).
+    Toplamlar yalnızca hash yoksa veritabanından tohumlanır; veritabanı
+    flush_ad_events aralığı kadar geride olabilir.
+
+    Returns:
+        dict: {campaign_id: {'capped': bool, 'pacing': float}}
+    """
+    from .models import AdDailyStats
+
+    campaigns = list(campaigns)
+    if not campaigns:
+        return {}
+
+    today = now.date()
+    today_field = day_field(today)
+    yesterday_field = day_field(today - timedelta(days=1))
+
+    daily_spend = dict(
+        AdDailyStats.objects.filter(
+            campaign_id__in=[campaign.id for campaign in campaigns],
+            date=today
+        ).values('campaign_id').annotate(total=Sum('spend')).order_by().values_list('campaign_id', 'total')
+    )
+
+    pipe = _redis().pipeline(transaction=False)
+    limits = {}
+    for campaign in campaigns:
+        key = pacing_key(campaign.id)
+        limits[campaign.id] = campaign_limits(campaign)
+        pipe.hset(key, mapping=limits[campaign.id])
+        pipe.hsetnx(key, 'spent', _micros(campaign.spent))
+        pipe.hsetnx(key, 'impressions', campaign.total_impressions)
+        pipe.hsetnx(key, 'clicks', campaign.total_clicks)
+        pipe.hsetnx(key, today_field, _micros(daily_spend.get(campaign.id)))
+        pipe.hdel(key, yesterday_field)
+        pipe.expire(key, PACING_KEY_TTL)
+        pipe.hmget(key, 'spent', today_field, 'impressions', 'clicks')
+    results = pipe.execute()
+
+    states = {}
+    for campaign, values in zip(campaigns, results[7::8]):
+        spent, day_spent, impressions, clicks = (int(value or 0) for value in values)
+        campaign_limit = limits[campaign.id]
+        totals = {
+            'budget': spent,
+            'daily_budget': day_spent,
+            'max_impressions': impressions,
+            'max_clicks': clicks,
+        }
+        states[campaign.id] = {
+            'capped': is_capped(campaign_limit, totals),
+            'pacing': pacing_probability(campaign_limit['daily_budget'], day_spent, now),
+        }
+    return states
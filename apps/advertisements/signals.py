@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .engine import publish_engine_reload
+from .models import AdvertisementZone, Campaign, Advertisement
+
+# İstatistik sayaçları her gösterim/tıklamada kaydedilir, tabloları etkilemez
+CAMPAIGN_COUNTER_FIELDS = {'total_impressions', 'total_clicks', 'total_conversions', 'spent'}
+AD_COUNTER_FIELDS = {'impressions', 'clicks', 'conversions'}
+
+
+def _reload_engine():
+    transaction.on_commit(publish_engine_reload)
+
+
+@receiver(post_save, sender=Campaign)
+def campaign_post_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= CAMPAIGN_COUNTER_FIELDS:
+        # Sadece bütçe/limit dolduğunda motor tablolarından çıkar
+        if instance.status == 'active' and not instance.is_active:
+            _reload_engine()
+        return
+    _reload_engine()
+
+
+@receiver(post_save, sender=Advertisement)
+def advertisement_post_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= AD_COUNTER_FIELDS:
+        return
+    _reload_engine()
+
+
+@receiver(post_save, sender=AdvertisementZone)
+@receiver(post_delete, sender=AdvertisementZone)
+@receiver(post_delete, sender=Campaign)
+@receiver(post_delete, sender=Advertisement)
+def ad_inventory_changed(sender, **kwargs):
+    _reload_engine()
@@ -0,0 +1,88 @@
+"""
+In-memory targeting index for the ad decision engine.
+
+For every zone table we keep, per targeting dimension, an inverted index
+from a targeting value to a bitset (a Python int) of the entries that
+target it, plus a bitset of the entries that do not target that
+dimension at all. Matching a request context is then a handful of
+AND/OR operations on ints, no matter how many ads the zone has.
+
+A dimension the request does not know (e.g. no country header) matches
+only the entries that do not target it, so a visitor without any context
+only sees untargeted ads.
+"""
+
+# Hedefleme boyutları (istek bağlamının anahtarları)
+TARGETING_DIMENSIONS = ('categories', 'devices', 'countries', 'cities')
+
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+
+def campaign_targeting(campaign):
+    """
+    Kampanya hedeflemesi; boş küme = o boyutta hedefleme yok
+
+    target_categories önceden yüklenmiş (prefetch) olmalıdır.
+    """
+    return {
+        'categories': frozenset(category.id for category in campaign.target_categories.all()),
+        'devices': frozenset(_normalize(device) for device in campaign.target_devices or []),
+        'countries': frozenset(_normalize(country) for country in campaign.target_countries or []),
+        'cities': frozenset(_normalize(city) for city in campaign.target_cities or []),
+    }
+
+
+def targeting_context(category=None, device=None, country=None, city=None):
+    """İstek bağlamını indeks anahtarlarına çevirir; bilinmeyen alanlar atlanır"""
+    context = {
+        'categories': category,
+        'devices': _normalize(device) if device else None,
+        'countries': _normalize(country) if country else None,
+        'cities': _normalize(city) if city else None,
+    }
+    return {dimension: value for dimension, value in context.items() if value is not None}
+
+
+class TargetingIndex:
+    """Bir bölge tablosundaki reklamlar için ters indeks (bit kümeleri)"""
+
+    __slots__ = ('full', 'untargeted', 'open', 'values')
+
+    def __init__(self, entries):
+        self.full = (1 << len(entries)) - 1
+        self.untargeted = 0
+        self.open = dict.fromkeys(TARGETING_DIMENSIONS, 0)
+        self.values = {dimension: {} for dimension in TARGETING_DIMENSIONS}
+
+        for position, entry in enumerate(entries):
+            bit = 1 << position
+            targeting = entry['targeting']
+            if not any(targeting.values()):
+                self.untargeted |= bit
+            for dimension in TARGETING_DIMENSIONS:
+                values = targeting[dimension]
+                if not values:
+                    self.open[dimension] |= bit
+                for value in values:
+                    index = self.values[dimension]
+                    index[value] = index.get(value, 0) | bit
+
+    def match(self, context):
+        """
+        Bağlamla eşleşen reklamlar
+
+        Bağlamda değeri olmayan boyutu hedefleyen reklamlar eşleşmez.
+
+        Returns:
+            tuple: (hedeflemesi eşleşen reklamlar, hedeflemesiz reklamlar) bit kümeleri
+        """
+        matched = self.full
+        for dimension in TARGETING_DIMENSIONS:
+            value = context.get(dimension)
+            if value is None:
+                matched &= self.open[dimension]
+            else:
+                matched &= self.open[dimension] | self.values[dimension].get(value, 0)
+        return matched & ~self.untargeted, matched & self.untargeted
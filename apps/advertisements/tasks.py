@@ -0,0 +1,259 @@
+"""
+Celery tasks for advertisements application.
+"""
+
+from celery import shared_task
+from django.core.cache import cache
+from django.utils import timezone
+from django.db.models import Count
+from datetime import date, datetime, time, timedelta
+import logging
+
+from utils.cache_utils import acquire_lock, release_lock
+
+logger = logging.getLogger(__name__)
+
+FLUSH_LOCK_KEY = 'advertisements:flush_ad_events:lock'
+FLUSH_LOCK_TIMEOUT = 5 * 60
+ROLLUP_STATE_TIMEOUT = 2 * 24 * 60 * 60
+
+
+@shared_task(bind=True, max_retries=3)
+def flush_ad_events(self):
+    """
+    Move buffered impression/click events from Redis into the database.
+    Runs every 10 seconds.
+
+    Counters are folded into Advertisement/Campaign with F() updates, then
+    the queued raw rows are bulk inserted (impressions first, so clicks can
+    resolve their impression token). Events rejected by the invalid-traffic
+    filter are written to QuarantinedAdEvent. Only one flush runs at a time.
+    """
+    token = acquire_lock(FLUSH_LOCK_KEY, FLUSH_LOCK_TIMEOUT)
+    if token is None:
+        return "Flush already running"
+
+    try:
+        from .tracking import EVENT_KINDS, QUARANTINE, flush_counters, flush_events
+
+        campaigns = flush_counters()
+        written = {kind: flush_events(kind) for kind in (*EVENT_KINDS, QUARANTINE)}
+
+        if campaigns or any(written.values()):
+            logger.info(f"Flushed ad events: {written}, {campaigns} campaigns updated")
+        return f"Flushed ad events: {written}"
+
+    except Exception as exc:
+        logger.error(f"Error flushing ad events: {str(exc)}")
+        raise self.retry(exc=exc, countdown=10)
+
+    finally:
+        # Süresi dolup başka worker'ın aldığı kilit silinmez
+        release_lock(FLUSH_LOCK_KEY, token)
+
+
+@shared_task(bind=True, max_retries=3)
+def flush_adblock_stats(self):
+    """
+    Copy today's and yesterday's AdBlock counters and unique-visitor
+    HyperLogLogs from Redis into AdBlockDailyStats.
+    Runs every 5 minutes; counters are absolute, so re-runs are harmless.
+    """
+    try:
+        from .adblock import flush
+
+        rows = flush()
+        return f"Flushed {rows} adblock stat rows"
+
+    except Exception as exc:
+        logger.error(f"Error flushing adblock stats: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+def _rollup_state_key(day):
+    return f'advertisements:rollup:{day.isoformat()}'
+
+
+def _count_events(day_start, day_end, watermarks, after=None):
+    """
+    Gün içindeki olayları reklam bazında say
+
+    Args:
+        watermarks: Tablo başına sayılacak en büyük olay id'si
+        after: Önceki çalıştırmanın id'leri; verilirse yalnızca yeni olaylar
+               sayılır ve unique_ips gün içinde ilk kez görülen IP'leri içerir
+
+    Returns:
+        dict: {advertisement_id: {'impressions': .., 'unique_ips': .., ...}}
+    """
+    from django.db.models import Exists, OuterRef
+    from .models import AdImpression, AdClick, AdConversion
+
+    rows = {}
+
+    def window(queryset, field, table):
+        queryset = queryset.filter(**{
+            f'{field}__gte': day_start,
+            f'{field}__lt': day_end,
+            'id__lte': watermarks[table],
+        })
+        if after is not None:
+            queryset = queryset.filter(id__gt=after[table])
+        return queryset
+
+    impressions = window(AdImpression.objects.all(), 'viewed_at', 'impressions')
+    for row in impressions.values('advertisement_id').annotate(total=Count('id')).order_by():
+        rows.setdefault(row['advertisement_id'], {})['impressions'] = row['total']
+
+    if after is not None:
+        # Aynı gün daha önce sayılmış (reklam, IP) çiftleri yeni tekil IP değildir
+        seen = AdImpression.objects.filter(
+            advertisement_id=OuterRef('advertisement_id'),
+            ip_address=OuterRef('ip_address'),
+            viewed_at__gte=day_start,
+            viewed_at__lt=day_end,
+            id__lte=after['impressions']
+        )
+        impressions = impressions.filter(~Exists(seen))
+    for row in impressions.values('advertisement_id').annotate(
+        unique_ips=Count('ip_address', distinct=True)
+    ).order_by():
+        rows.setdefault(row['advertisement_id'], {})['unique_ips'] = row['unique_ips']
+
+    clicks = window(AdClick.objects.all(), 'clicked_at', 'clicks')
+    for row in clicks.values('advertisement_id').annotate(total=Count('id')).order_by():
+        rows.setdefault(row['advertisement_id'], {})['clicks'] = row['total']
+
+    conversions = window(AdConversion.objects.all(), 'converted_at', 'conversions')
+    for row in conversions.values('advertisement_id').annotate(total=Count('id')).order_by():
+        rows.setdefault(row['advertisement_id'], {})['conversions'] = row['total']
+
+    return rows
+
+
+@shared_task(bind=True, max_retries=3)
+def rollup_ad_daily_stats(self, days_ago=0, full=False):
+    """
+    Roll up one day's raw events into the per-ad AdDailyStats rows.
+    Runs every 15 minutes for today and once after midnight for yesterday.
+
+    flush_ad_events keeps AdDailyStats current between runs; this task
+    makes the day exact (including unique IPs, which cannot be incremented)
+    and repairs any drift.
+
+    Today's runs are incremental: the cached state holds the last event id
+    counted per table and the day's absolute counts, so each run only reads
+    events newer than that watermark. Past days (the nightly run) and runs
+    without state recompute the whole day, which also deletes rows for ads
+    that no longer have any events and picks up events committed out of id
+    order since the last incremental run.
+
+    Args:
+        days_ago: 0 for today, 1 for yesterday, ...
+        full: Force a full recompute of the day
+    """
+    try:
+        from django.db.models import Max
+        from .models import Advertisement, AdImpression, AdClick, AdConversion, AdDailyStats
+
+        started = timezone.now()
+        day = started.date() - timedelta(days=days_ago)
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+
+        state_key = _rollup_state_key(day)
+        state = None if full or days_ago else cache.get(state_key)
+
+        # Sayımdan önce alınan üst sınır: arada eklenen olaylar bir sonraki çalıştırmaya kalır
+        watermarks = {
+            'impressions': AdImpression.objects.aggregate(m=Max('id'))['m'] or 0,
+            'clicks': AdClick.objects.aggregate(m=Max('id'))['m'] or 0,
+            'conversions': AdConversion.objects.aggregate(m=Max('id'))['m'] or 0,
+        }
+
+        if state is None:
+            totals = _count_events(day_start, day_end, watermarks)
+            changed = set(totals)
+        else:
+            totals = state['totals']
+            deltas = _count_events(day_start, day_end, watermarks, after=state['watermarks'])
+            for ad_id, delta in deltas.items():
+                counts = totals.setdefault(ad_id, {})
+                for field, value in delta.items():
+                    counts[field] = counts.get(field, 0) + value
+            changed = set(deltas)
+
+        ads = Advertisement.objects.filter(id__in=changed).select_related('campaign')
+
+        stats = []
+        for ad in ads:
+            counts = totals[ad.id]
+            stats.append(AdDailyStats(
+                advertisement=ad,
+                campaign_id=ad.campaign_id,
+                date=day,
+                impressions=counts.get('impressions', 0),
+                unique_ips=counts.get('unique_ips', 0),
+                clicks=counts.get('clicks', 0),
+                conversions=counts.get('conversions', 0),
+                spend=ad.campaign.cost_for(
+                    impressions=counts.get('impressions', 0),
+                    clicks=counts.get('clicks', 0),
+                    conversions=counts.get('conversions', 0)
+                ),
+            ))
+
+        AdDailyStats.objects.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['advertisement', 'date'],
+            update_fields=['impressions', 'unique_ips', 'clicks', 'conversions', 'spend', 'updated_at'],
+        )
+
+        removed = 0
+        if state is None:
+            # Ham olayı kalmayan reklamların satırları (bu çalıştırma sırasında
+            # flush_ad_events'in yeni açtığı satırlara dokunulmaz)
+            removed, _ = AdDailyStats.objects.filter(
+                date=day,
+                updated_at__lt=started
+            ).exclude(advertisement_id__in=totals.keys()).delete()
+
+        if not days_ago:
+            cache.set(state_key, {'watermarks': watermarks, 'totals': totals}, ROLLUP_STATE_TIMEOUT)
+
+        mode = 'full' if state is None else 'incremental'
+        logger.info(f"Rolled up daily stats for {len(stats)} ads on {day} ({mode}, {removed} stale rows removed)")
+        return f"Rolled up daily stats for {len(stats)} ads on {day} ({mode}, {removed} stale rows removed)"
+
+    except Exception as exc:
+        logger.error(f"Error rolling up ad daily stats: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_ad_revenue(self, days_ago=1, day=None):
+    """
+    Recompute one day's revenue from raw events into the revenue ledger.
+    Runs nightly for yesterday; pass day='YYYY-MM-DD' to re-run an older day
+    (differences are booked as adjustment entries).
+
+    Args:
+        days_ago: Day to reconcile relative to today (ignored if day is given)
+        day: ISO date string
+    """
+    from .ledger import ReconciliationInProgress, reconcile_day
+
+    day = date.fromisoformat(day) if day else timezone.now().date() - timedelta(days=days_ago)
+
+    try:
+        result = reconcile_day(day)
+        return f"Reconciled {day}: {result['charges']} charges, {result['adjustments']} adjustments"
+
+    except ReconciliationInProgress as exc:
+        return str(exc)
+
+    except Exception as exc:
+        logger.error(f"Error reconciling ad revenue for {day}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=300)
@@ -0,0 +1,258 @@
+"""
+Tests for the batched ad event pipeline (tracking.py).
+
+Redis is replaced by an in-process fakeredis server (Lua via lupa), so the
+real track/flush scripts run without a Redis instance.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import fraud, tracking
+from .engine import ad_entry
+from .models import (
+    AdClick, AdDailyStats, AdFlushCursor, AdImpression, Advertisement,
+    AdvertisementZone, Advertiser, Campaign, QuarantinedAdEvent,
+)
+
+BROWSER_UA = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+
+class TrackingFlushTest(TestCase):
+    TRACKERS = 500
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        for module in (tracking, fraud):
+            patcher = mock.patch.object(module, '_redis', return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        tracking._track_script = None
+        tracking._scripts.clear()
+        fraud._screen_script = None
+
+        now = timezone.now()
+        advertiser = Advertiser.objects.create(name='Test', email='ads@example.com')
+        self.campaign = Campaign.objects.create(
+            name='Load test',
+            advertiser=advertiser,
+            status='active',
+            pricing_model='cpm',
+            budget=Decimal('0'),
+            cpm_price=Decimal('2.00'),
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+        )
+        zone = AdvertisementZone.objects.create(name='Top', zone_type='banner_top', width=728, height=90)
+        self.ad = Advertisement.objects.create(
+            campaign=self.campaign,
+            zone=zone,
+            name='Ad',
+            ad_type='image',
+            target_url='https://example.com/',
+        )
+        self.meta = ad_entry(Advertisement.objects.select_related('campaign').get(pk=self.ad.pk))
+
+    def _event(self, i, **extra):
+        return dict(
+            user_agent=BROWSER_UA,
+            page_url='https://example.com/article/1',
+            ip_address=f'10.{i // 250}.{i % 250}.1',
+            ts=timezone.now().isoformat(),
+            **extra
+        )
+
+    def _track(self, i):
+        impression = tracking.track_event(
+            'impression', self.meta, self._event(i, token=f'{i:032x}'), f'visitor-{i}'
+        )
+        click = tracking.track_event('click', self.meta, self._event(i), f'visitor-{i}')
+        return impression, click
+
+    def _track_all(self, flush_while_tracking=True):
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            futures = [executor.submit(self._track, i) for i in range(self.TRACKERS)]
+            while flush_while_tracking and not all(future.done() for future in futures):
+                self._flush()
+            wait(futures)
+        return [future.result() for future in futures]
+
+    def _flush(self):
+        tracking.flush_counters()
+        for kind in tracking.EVENT_KINDS:
+            tracking.flush_events(kind)
+
+    def assertExactTotals(self):
+        self.ad.refresh_from_db()
+        self.campaign.refresh_from_db()
+        stats = AdDailyStats.objects.get(advertisement=self.ad, date=timezone.now().date())
+
+        self.assertEqual(self.ad.impressions, self.TRACKERS)
+        self.assertEqual(self.ad.clicks, self.TRACKERS)
+        self.assertEqual(self.campaign.total_impressions, self.TRACKERS)
+        self.assertEqual(self.campaign.total_clicks, self.TRACKERS)
+        self.assertEqual(AdImpression.objects.filter(advertisement=self.ad).count(), self.TRACKERS)
+        self.assertEqual(AdClick.objects.filter(advertisement=self.ad).count(), self.TRACKERS)
+        self.assertEqual(stats.impressions, self.TRACKERS)
+        self.assertEqual(stats.clicks, self.TRACKERS)
+        # 500 gösterim x 2.00 ₺ CPM
+        self.assertEqual(self.campaign.spent, Decimal('1.00'))
+        self.assertEqual(stats.spend, Decimal('1.00'))
+
+    def test_concurrent_trackers_flush_exact_totals(self):
+        results = self._track_all()
+        self._flush()
+
+        self.assertEqual(results, [(tracking.TRACK_OK, tracking.TRACK_OK)] * self.TRACKERS)
+        self.assertExactTotals()
+        self.assertEqual(self.redis.llen(tracking._queue_key('impression')), 0)
+
+    def test_flush_crash_after_commit_is_not_replayed(self):
+        self._track_all(flush_while_tracking=False)
+
+        # Veritabanı commit edildi, Redis temizliği yapılamadan süreç düştü
+        with mock.patch.object(self.redis, 'delete', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                tracking.flush_counters()
+            for kind in tracking.EVENT_KINDS:
+                with self.assertRaises(ConnectionError):
+                    tracking.flush_events(kind)
+
+        self._flush()
+        self._flush()
+        self.assertExactTotals()
+        self.assertTrue(AdFlushCursor.objects.filter(stream='counters', last_batch__gte=1).exists())
+
+    def test_flush_crash_before_commit_is_retried(self):
+        self._track_all(flush_while_tracking=False)
+
+        with mock.patch.object(tracking, '_update_daily_stats', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                tracking.flush_events('impression')
+        self.assertFalse(AdImpression.objects.exists())
+
+        self._flush()
+        self.assertExactTotals()
+
+    def test_invalid_traffic_is_quarantined_not_counted(self):
+        bot = dict(self._event(1, token='f' * 32), user_agent='python-requests/2.31')
+        self.assertEqual(tracking.track_event('impression', self.meta, bot, 'visitor-1'), tracking.TRACK_QUARANTINED)
+        self._flush()
+        tracking.flush_events(tracking.QUARANTINE)
+
+        quarantined = QuarantinedAdEvent.objects.get()
+        self.assertEqual((quarantined.event_type, quarantined.reason), ('impression', 'bot_user_agent'))
+        self.assertEqual(quarantined.advertisement_id, self.ad.id)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.impressions, 0)
+        self.assertFalse(AdImpression.objects.exists())
+
+    def test_zero_budget_is_unlimited(self):
+        self._track_all(flush_while_tracking=False)
+
+        with mock.patch.object(tracking, 'publish_engine_reload') as reload:
+            self._flush()
+        reload.assert_not_called()
+
+
+class CampaignPerformanceTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        advertiser = Advertiser.objects.create(name='Test', email='ads@example.com')
+        self.campaign = Campaign.objects.create(
+            name='Report',
+            advertiser=advertiser,
+            status='active',
+            pricing_model='cpm',
+            budget=Decimal('0'),
+            cpm_price=Decimal('2.00'),
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        self.url = f'/api/v1/advertisements/campaigns/{self.campaign.id}/performance/'
+
+    def test_date_range(self):
+        today = timezone.now().date().isoformat()
+        response = self.client.get(self.url, {'start_date': today, 'end_date': today}, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_date_is_rejected(self):
+        for params in ({'start_date': '2026-13-01'}, {'end_date': 'yesterday'}):
+            response = self.client.get(self.url, params, secure=True)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+
+@override_settings(AD_IVT_RATE_LIMITS={
+    'impression': {'visitor': 100, 'ip': 100, 'subnet': 100},
+    'click': {'visitor': 3, 'ip': 5, 'subnet': 8},
+})
+class FraudScreeningTest(TestCase):
+    # Bir dakikanın tam ortası: önceki dakikanın yarısı pencerede kalır
+    NOW = 1_800_000_030.0
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(fraud, '_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        fraud._screen_script = None
+
+    def click(self, ip='10.0.0.1', visitor='visitor', now=NOW, **extra):
+        return fraud.screen('click', dict(user_agent=BROWSER_UA, ip_address=ip, **extra), visitor, now=now)
+
+    def test_visitor_limit_blocks_for_block_period(self):
+        self.assertEqual([self.click() for _ in range(3)], [None] * 3)
+        self.assertEqual(self.click(), 'visitor_rate')
+
+        # Engel dakika değişse de IVT_BLOCK_SECONDS boyunca sürer; aynı IP'deki başka ziyaretçi etkilenmez
+        self.assertEqual(self.click(now=self.NOW + 120), 'visitor_rate')
+        self.assertIsNone(self.click(visitor='other'))
+        self.assertTrue(self.redis.exists(fraud.block_key('visitor', 'visitor')))
+
+    def test_previous_minute_is_weighted_by_overlap(self):
+        previous_minute = self.NOW - fraud.IVT_WINDOW_SECONDS
+        for i in range(4):
+            self.assertIsNone(self.click(visitor=f'v{i}', now=previous_minute))
+
+        # IP sınırı 5: 3 + 4 x 0.5 = 5 geçer, 4 + 4 x 0.5 = 6 aşar
+        reasons = [self.click(visitor=f'late-{i}') for i in range(4)]
+        self.assertEqual(reasons, [None, None, None, 'ip_rate'])
+
+    def test_subnet_limit_spans_addresses(self):
+        reasons = [self.click(ip=f'10.0.0.{i}', visitor=f'v{i}') for i in range(1, 10)]
+        self.assertEqual(reasons, [None] * 8 + ['subnet_rate'])
+        # Engel alt ağın tamamına uygulanır
+        self.assertEqual(self.click(ip='10.0.0.200', visitor='new'), 'subnet_rate')
+        self.assertIsNone(self.click(ip='10.0.1.1', visitor='new'))
+
+    def test_click_right_after_impression(self):
+        fraud.screen('impression', dict(user_agent=BROWSER_UA, ip_address='10.0.0.1', token='t' * 32), 'visitor', now=self.NOW)
+
+        self.assertEqual(self.click(impression_token='t' * 32, now=self.NOW + 0.2), 'click_too_fast')
+        self.assertIsNone(self.click(impression_token='t' * 32, now=self.NOW + 5))
+
+    def test_user_agent_and_unavailable_redis(self):
+        self.assertEqual(fraud.screen('click', dict(user_agent='', ip_address='10.0.0.1'), 'v', now=self.NOW), 'empty_user_agent')
+        self.assertEqual(
+            fraud.screen('click', dict(user_agent='HeadlessChrome/120.0', ip_address='10.0.0.1'), 'v', now=self.NOW),
+            'bot_user_agent'
+        )
+
+        # Filtre çalışamazsa olay geçer
+        with mock.patch.object(fraud, '_redis', side_effect=ConnectionError):
+            fraud._screen_script = None
+            self.assertIsNone(self.click())
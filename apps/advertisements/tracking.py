@@ -0,0 +1,561 @@
+"""
+Ad event ingestion pipeline.
+
+Request path (track_impression / track_click): one Lua call that checks
+and charges the campaign's pacing state, dedups the event per visitor,
+bumps per-ad and per-campaign counters, updates the visitor's frequency
+sketch and queues the raw row. Nothing is written to the database.
+
+flush_ad_events (every few seconds): folds the counters into Advertisement
+and Campaign with F() expressions, bulk inserts the queued AdImpression /
+AdClick rows and updates AdDailyStats. Each flush first moves its work
+into a numbered batch in Redis and records that number in AdFlushCursor in
+the same transaction as the writes, so a batch retried after a crash is
+applied exactly once.
+
+Before the script runs, every event is screened for invalid traffic
+(fraud.py); rejected events go to a quarantine queue that is written to
+QuarantinedAdEvent and never reaches counters, pacing or spend.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.db.models import Case, F, Q, URLField, Value, When
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from .engine import AD_ENGINE_CHANNEL, MICROS, ad_engine, ad_entry, publish_engine_reload
+from .fraud import describe_user_agent, screen
+from .frequency import bucket_key, bucket_ttl, current_bucket
+from .pacing import day_field, pacing_key
+
+logger = logging.getLogger(__name__)
+
+AD_EVENTS_PREFIX = 'news:ads'
+DEDUP_SECONDS = 60
+# Kaynağı tekrar teslim edilebilen olayların (beacon stream) tekrar oynatma koruması
+REPLAY_SECONDS = 6 * 60 * 60
+FLUSH_BATCH_SIZE = 1000
+
+EVENT_KINDS = ('impression', 'click')
+QUARANTINE = 'quarantine'
+
+# Redis sayaç hash'i -> (model, alan)
+COUNTERS = {
+    'ad:impression': ('advertisement', 'impressions'),
+    'ad:click': ('advertisement', 'clicks'),
+    'campaign:impression': ('campaign', 'total_impressions'),
+    'campaign:click': ('campaign', 'total_clicks'),
+    'campaign:spent': ('campaign', 'spent'),
+}
+
+# track_event dönüş kodları
+TRACK_DUPLICATE = 0
+TRACK_OK = 1
+TRACK_CAPPED = 2
+TRACK_QUARANTINED = 3
+
+# KEYS: dedup, ad sayaç, kampanya sayaç, kampanya harcama, olay kuyruğu, pacing hash'i,
+#       tekrar oynatma anahtarı ('' = yok), [frekans kovası]
+# ARGV: dedup ttl, ad_id, campaign_id, maliyet (mikro-₺), olay json,
+#       günlük harcama alanı, olay sayaç alanı, motor kanalı, tekrar oynatma ttl,
+#       [kova ömrü, sketch konumları...]
+TRACK_SCRIPT = """
+if KEYS[7] ~= '' and not redis.call('SET', KEYS[7], 1, 'NX', 'EX', ARGV[9]) then
+    return 0
+end
+
+local pace = KEYS[6]
+local paced = redis.call('EXISTS', pace) == 1
+
+local function capped()
+    local s = redis.call('HMGET', pace,
+        'budget', 'spent', 'daily_budget', ARGV[6],
+        'max_impressions', 'impressions', 'max_clicks', 'clicks')
+    for i = 1, #s, 2 do
+        local limit = tonumber(s[i])
+        if limit and limit >= 0 and (tonumber(s[i + 1]) or 0) >= limit then
+            return true
+        end
+    end
+    return false
+end
+
+if paced and capped() then
+    return 2
+end
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    return 0
+end
+
+local cost = tonumber(ARGV[4])
+redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+if cost > 0 then
+    redis.call('HINCRBY', KEYS[4], ARGV[3], cost)
+end
+redis.call('RPUSH', KEYS[5], ARGV[5])
+
+if paced then
+    redis.call('HINCRBY', pace, 'spent', cost)
+    redis.call('HINCRBY', pace, ARGV[6], cost)
+    redis.call('HINCRBY', pace, ARGV[7], 1)
+    if capped() then
+        redis.call('PUBLISH', ARGV[8], 'exhausted:' .. ARGV[3])
+    end
+end
+
+if KEYS[8] then
+    for i = 11, #ARGV do
+        redis.call('BITFIELD', KEYS[8], 'OVERFLOW', 'SAT', 'INCRBY', 'u8', '#' .. ARGV[i], 1)
+    end
+    if redis.call('TTL', KEYS[8]) < tonumber(ARGV[10]) then
+        redis.call('EXPIRE', KEYS[8], ARGV[10])
+    end
+end
+return 1
+"""
+
+# KEYS: kaynak kuyruk, parti kuyruğu, parti numarası, parti sırası
+# ARGV: parti boyutu, veritabanına en son uygulanan parti numarası
+# Dönüş: {parti numarası, olaylar...}; kuyruk boşsa {0}
+# Yarıda kalmış bir parti varsa yenisi alınmaz, aynı parti tekrar döner.
+CLAIM_EVENTS_SCRIPT = """
+local id = tonumber(redis.call('GET', KEYS[3]))
+if not id then
+    local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+    if #items == 0 then
+        return {0}
+    end
+    redis.call('RPUSH', KEYS[2], unpack(items))
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    if (tonumber(redis.call('GET', KEYS[4])) or 0) < tonumber(ARGV[2]) then
+        redis.call('SET', KEYS[4], ARGV[2])
+    end
+    id = redis.call('INCR', KEYS[4])
+    redis.call('SET', KEYS[3], id)
+end
+local result = redis.call('LRANGE', KEYS[2], 0, -1)
+table.insert(result, 1, id)
+return result
+"""
+
+# KEYS: parti numarası, parti sırası, (canlı hash, ':flushing' hash) çiftleri
+# ARGV: veritabanına en son uygulanan parti numarası
+# Dönüş: parti numarası (yarıda kalmış parti varsa onun numarası)
+CLAIM_COUNTERS_SCRIPT = """
+local id = tonumber(redis.call('GET', KEYS[1]))
+if not id then
+    for i = 3, #KEYS, 2 do
+        if redis.call('EXISTS', KEYS[i]) == 1 and redis.call('EXISTS', KEYS[i + 1]) == 0 then
+            redis.call('RENAME', KEYS[i], KEYS[i + 1])
+        end
+    end
+    if (tonumber(redis.call('GET', KEYS[2])) or 0) < tonumber(ARGV[1]) then
+        redis.call('SET', KEYS[2], ARGV[1])
+    end
+    id = redis.call('INCR', KEYS[2])
+    redis.call('SET', KEYS[1], id)
+end
+return id
+"""
+
+_track_script = None
+_scripts = {}
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _counter_key(name):
+    return f'{AD_EVENTS_PREFIX}:count:{name}'
+
+
+def _queue_key(kind):
+    return f'{AD_EVENTS_PREFIX}:events:{kind}'
+
+
+def _batch_key(stream, name):
+    return f'{AD_EVENTS_PREFIX}:batch:{stream}:{name}'
+
+
+def _run_script(r, source, keys, args):
+    if source not in _scripts:
+        _scripts[source] = r.register_script(source)
+    return _scripts[source](keys=keys, args=args, client=r)
+
+
+def _last_applied(stream):
+    from .models import AdFlushCursor
+    return AdFlushCursor.objects.filter(stream=stream).values_list('last_batch', flat=True).first() or 0
+
+
+def _mark_applied(stream, batch_id):
+    """
+    Partiyi uygulanmış olarak işaretler (yazmalarla aynı transaction içinde çağrılmalı)
+
+    Returns:
+        bool: Parti daha önce uygulanmışsa False (yazmalar atlanmalı)
+    """
+    from .models import AdFlushCursor
+
+    cursor, _ = AdFlushCursor.objects.select_for_update().get_or_create(stream=stream)
+    if cursor.last_batch >= batch_id:
+        return False
+    cursor.last_batch = batch_id
+    cursor.save(update_fields=['last_batch', 'updated_at'])
+    return True
+
+
+def get_ad_meta(ad_id):
+    """
+    Reklamın kampanya ve ücret bilgisi
+
+    Önce süreç içi motor tablolarına bakar; uygun olmayan (ör. az önce
+    duraklatılmış) reklamlar için veritabanına düşer.
+    """
+    entry = ad_engine.ad(ad_id)
+    if entry is not None:
+        return entry
+
+    from .models import Advertisement
+    ad = Advertisement.objects.select_related('campaign').filter(pk=ad_id).first()
+    return ad_entry(ad) if ad else None
+
+
+def track_event(kind, meta, event, visitor, replay_key=None):
+    """
+    Olayı kuyruğa alır ve sayaçları atomik olarak artırır
+
+    Args:
+        kind: 'impression' veya 'click'
+        meta: get_ad_meta() çıktısı
+        event: Ham satır verisi (json serileştirilebilir)
+        visitor: frequency.visitor_id() çıktısı (tekilleştirme ve frekans anahtarı)
+        replay_key: Olayın kaynağındaki benzersiz anahtarı (ör. beacon stream
+                    kaydı + sıra). Verilirse aynı anahtarla gelen olay
+                    REPLAY_SECONDS boyunca, sayaçlarla aynı script içinde
+                    tekrar sayılmaz (TRACK_DUPLICATE).
+
+    Kampanyanın pacing hash'i varsa bütçe/limitler aynı script içinde
+    kontrol edilir ve harcama düşülür (bkz. pacing.py). Frekans sınırlı
+    kampanyaların gösterimleri ziyaretçinin saatlik sketch'ine eklenir
+    (bkz. frequency.py).
+
+    Geçersiz trafik filtresine takılan olaylar sayılmadan karantina
+    kuyruğuna yazılır (bkz. fraud.py).
+
+    Returns:
+        int: TRACK_OK, TRACK_DUPLICATE (son DEDUP_SECONDS içinde zaten
+             kaydedildi), TRACK_CAPPED (kampanya limiti dolu, sayılmadı)
+             veya TRACK_QUARANTINED (geçersiz trafik, sayılmadı)
+    """
+    global _track_script
+
+    # Olay sonradan işlense de (beacon) pencereler olayın kendi zamanına göre
+    reason = screen(kind, event, visitor, now=datetime.fromisoformat(event['ts']).timestamp())
+    if reason:
+        _redis().rpush(_queue_key(QUARANTINE), json.dumps(dict(
+            event, kind=kind, reason=reason, visitor=visitor,
+            ad=meta['ad_id'], campaign=meta['campaign_id'],
+        )))
+        return TRACK_QUARANTINED
+
+    if _track_script is None:
+        _track_script = _redis().register_script(TRACK_SCRIPT)
+
+    cost = meta[f'{kind}_cost']
+    event = dict(event, ad=meta['ad_id'], campaign=meta['campaign_id'], cost=cost)
+
+    keys = [
+        f"{AD_EVENTS_PREFIX}:seen:{kind}:{meta['ad_id']}:{visitor}",
+        _counter_key(f'ad:{kind}'),
+        _counter_key(f'campaign:{kind}'),
+        _counter_key('campaign:spent'),
+        _queue_key(kind),
+        pacing_key(meta['campaign_id']),
+        f'{AD_EVENTS_PREFIX}:replay:{replay_key}' if replay_key else '',
+    ]
+    args = [
+        DEDUP_SECONDS, meta['ad_id'], meta['campaign_id'], cost, json.dumps(event),
+        day_field(datetime.fromisoformat(event['ts']).date()), f'{kind}s', AD_ENGINE_CHANNEL,
+        REPLAY_SECONDS,
+    ]
+    if kind == 'impression' and meta['frequency']:
+        _cap, window, slots = meta['frequency']
+        keys.append(bucket_key(visitor, current_bucket()))
+        args.extend([bucket_ttl(window), *slots])
+
+    return int(_track_script(keys=keys, args=args))
+
+
+EVENT_FIELDS = {
+    'impression': ('user_agent', 'page_url', 'referrer', 'device_type', 'browser', 'os', 'country', 'city'),
+    'click': ('user_agent', 'page_url', 'device_type', 'country', 'city'),
+    'adblock': ('user_agent', 'page_url'),
+}
+
+
+def _event_model(kind):
+    from .models import AdImpression, AdClick, AdBlockDetection
+    return {'impression': AdImpression, 'click': AdClick, 'adblock': AdBlockDetection}[kind]
+
+
+def clean_event(kind, data):
+    """
+    Ham olay alanlarını model alanlarına göre doğrular ve kısaltır
+    (veritabanı sorgusu olmadan)
+
+    Cihaz tipi, tarayıcı ve işletim sistemi istemcinin gönderdiği değerle
+    değil, User-Agent başlığından sunucu tarafında belirlenir.
+
+    Args:
+        kind: 'impression', 'click' veya 'adblock'
+        data: EVENT_FIELDS[kind] alanlarını içeren sözlük
+
+    Returns:
+        tuple: (event, errors)
+    """
+    model = _event_model(kind)
+    event = {}
+    errors = {}
+    if kind != 'adblock':
+        data = dict(data, **{
+            field: value
+            for field, value in describe_user_agent(data.get('user_agent') or '').items()
+            if field in EVENT_FIELDS[kind]
+        })
+    for field in EVENT_FIELDS[kind]:
+        value = str(data.get(field) or '')
+        model_field = model._meta.get_field(field)
+        if isinstance(model_field, URLField) and value:
+            try:
+                URLValidator()(value)
+            except DjangoValidationError:
+                if field == 'referrer':
+                    value = ''
+                else:
+                    errors[field] = ['Enter a valid URL.']
+        elif not value and not model_field.blank:
+            errors[field] = ['This field is required.']
+        event[field] = value[:model_field.max_length]
+    return event, errors
+
+
+# --- Flush ---
+
+def _apply_deltas(model, deltas):
+    """
+    {alan: {pk: artış}} sözlüğünü tek UPDATE ... CASE ifadesiyle uygular
+    """
+    pks = sorted(set().union(*(field_deltas.keys() for field_deltas in deltas.values())))
+    for start in range(0, len(pks), FLUSH_BATCH_SIZE):
+        chunk = pks[start:start + FLUSH_BATCH_SIZE]
+        updates = {}
+        for field, field_deltas in deltas.items():
+            whens = [When(pk=pk, then=Value(field_deltas[pk])) for pk in chunk if pk in field_deltas]
+            if whens:
+                output_field = model._meta.get_field(field)
+                updates[field] = F(field) + Case(*whens, default=Value(0), output_field=output_field)
+        model.objects.filter(pk__in=chunk).update(**updates)
+
+
+def flush_counters():
+    """
+    Redis sayaçlarını Advertisement ve Campaign tablolarına aktarır
+
+    Hash'ler tek script içinde ':flushing' anahtarlarına taşınır ve partiye
+    numara verilir; istek yolu bu sırada yeni hash'e yazmaya devam eder,
+    böylece okuma ile silme arasında artış kaybolmaz. Parti numarası
+    güncellemelerle aynı transaction'da AdFlushCursor'a yazılır: commit
+    sonrası anahtarlar silinmeden kesilen bir flush tekrarlandığında
+    artışlar ikinci kez uygulanmaz. Önceki bir flush yarıda kaldıysa onun
+    partisi önce işlenir.
+
+    Returns:
+        int: Güncellenen kampanya sayısı
+    """
+    from .models import Advertisement, Campaign
+
+    r = _redis()
+    keys = [_batch_key('counters', 'id'), _batch_key('counters', 'seq')]
+    for name in COUNTERS:
+        keys.extend([_counter_key(name), f'{_counter_key(name)}:flushing'])
+    batch_id = int(_run_script(r, CLAIM_COUNTERS_SCRIPT, keys, [_last_applied('counters')]))
+
+    snapshots = {name: r.hgetall(f'{_counter_key(name)}:flushing') for name in COUNTERS}
+
+    deltas = {'advertisement': defaultdict(dict), 'campaign': defaultdict(dict)}
+    for name, values in snapshots.items():
+        target, field = COUNTERS[name]
+        for pk, value in values.items():
+            value = int(value)
+            if field == 'spent':
+                value = Decimal(value) / MICROS
+            deltas[target][field][int(pk)] = value
+
+    if deltas['advertisement'] or deltas['campaign']:
+        with transaction.atomic():
+            if _mark_applied('counters', batch_id):
+                if deltas['advertisement']:
+                    _apply_deltas(Advertisement, deltas['advertisement'])
+                if deltas['campaign']:
+                    _apply_deltas(Campaign, deltas['campaign'])
+
+    r.delete(*[f'{_counter_key(name)}:flushing' for name in COUNTERS], keys[0])
+
+    campaign_ids = set().union(*(values.keys() for values in deltas['campaign'].values()))
+    if campaign_ids and Campaign.objects.filter(
+        # 0 bütçe/limit sınırsız demektir (bkz. Campaign.is_active)
+        Q(budget__gt=0, spent__gte=F('budget')) |
+        Q(max_impressions__gt=0, total_impressions__gte=F('max_impressions')) |
+        Q(max_clicks__gt=0, total_clicks__gte=F('max_clicks')),
+        id__in=campaign_ids,
+        status='active',
+    ).exists():
+        # Bütçesi/limiti dolan kampanyaları motor tablolarından çıkar
+        publish_engine_reload()
+
+    return len(campaign_ids)
+
+
+def _build_rows(kind, events):
+    from .models import AdImpression, AdClick, QuarantinedAdEvent
+
+    if kind == QUARANTINE:
+        return [
+            QuarantinedAdEvent(
+                event_type=event['kind'],
+                advertisement_id=event['ad'],
+                campaign_id=event['campaign'],
+                reason=event['reason'],
+                visitor=event['visitor'],
+                ip_address=event['ip_address'],
+                user_agent=event.get('user_agent', ''),
+                page_url=event.get('page_url', ''),
+                payload={
+                    key: value for key, value in event.items()
+                    if key not in ('kind', 'ad', 'campaign', 'reason', 'visitor', 'ip_address',
+                                   'user_agent', 'page_url', 'ts')
+                },
+                occurred_at=parse_datetime(event['ts']),
+            )
+            for event in events
+        ]
+
+    if kind == 'impression':
+        return [
+            AdImpression(
+                advertisement_id=event['ad'],
+                token=event['token'],
+                user_id=event.get('user'),
+                ip_address=event['ip_address'],
+                user_agent=event.get('user_agent', ''),
+                page_url=event.get('page_url', ''),
+                referrer=event.get('referrer', ''),
+                device_type=event.get('device_type', ''),
+                browser=event.get('browser', ''),
+                os=event.get('os', ''),
+                country=event.get('country', ''),
+                city=event.get('city', ''),
+                viewed_at=parse_datetime(event['ts']),
+            )
+            for event in events
+        ]
+
+    # track_impression'ın döndürdüğü anahtar; eski istemcilerin gönderdiği
+    # sayısal gösterim id'leri de kabul edilir
+    tokens = {event['impression_token'] for event in events if event.get('impression_token')}
+    legacy_ids = {int(token) for token in tokens if token.isdigit()}
+    impression_ids = dict(
+        AdImpression.objects.filter(token__in=tokens - {str(pk) for pk in legacy_ids}).values_list('token', 'id')
+    ) if tokens else {}
+    if legacy_ids:
+        impression_ids.update(
+            (str(pk), pk) for pk in AdImpression.objects.filter(id__in=legacy_ids).values_list('id', flat=True)
+        )
+
+    return [
+        AdClick(
+            advertisement_id=event['ad'],
+            impression_id=impression_ids.get(event.get('impression_token')),
+            user_id=event.get('user'),
+            ip_address=event['ip_address'],
+            user_agent=event.get('user_agent', ''),
+            page_url=event.get('page_url', ''),
+            device_type=event.get('device_type', ''),
+            country=event.get('country', ''),
+            city=event.get('city', ''),
+            clicked_at=parse_datetime(event['ts']),
+        )
+        for event in events
+    ]
+
+
+def _update_daily_stats(kind, events):
+    from .models import AdDailyStats
+
+    totals = defaultdict(lambda: [0, 0])
+    for event in events:
+        day = datetime.fromisoformat(event['ts']).date()
+        bucket = totals[(event['ad'], event['campaign'], day)]
+        bucket[0] += 1
+        bucket[1] += event['cost']
+
+    field = 'impressions' if kind == 'impression' else 'clicks'
+    for (ad_id, campaign_id, day), (count, cost) in totals.items():
+        AdDailyStats.increment(ad_id, campaign_id, day, **{field: count, 'spend': Decimal(cost) / MICROS})
+
+
+def flush_events(kind):
+    """
+    Kuyruktaki ham olayları FLUSH_BATCH_SIZE'lık partilerle veritabanına yazar
+
+    Her parti tek script içinde kuyruktan kendi listesine taşınır ve
+    numaralanır; satırlar ve günlük istatistikler parti numarasıyla aynı
+    transaction'da yazılır, parti listesi commit'ten sonra silinir. Yarıda
+    kalan parti bir sonraki flush'ta aynı numarayla tekrar denenir ve
+    zaten uygulanmışsa yalnızca silinir. Tek flush sürecinin çalıştığı
+    varsayılır (flush_ad_events kilidi).
+
+    Args:
+        kind: 'impression', 'click' veya QUARANTINE (günlük istatistiklere yansımaz)
+
+    Returns:
+        int: Yazılan satır sayısı
+    """
+    from .models import AdImpression, AdClick, QuarantinedAdEvent
+
+    model = {'impression': AdImpression, 'click': AdClick, QUARANTINE: QuarantinedAdEvent}[kind]
+    r = _redis()
+    stream = f'events:{kind}'
+    keys = [_queue_key(kind), _batch_key(stream, 'events'), _batch_key(stream, 'id'), _batch_key(stream, 'seq')]
+    written = 0
+
+    while True:
+        batch_id, *raw = _run_script(r, CLAIM_EVENTS_SCRIPT, keys, [FLUSH_BATCH_SIZE, _last_applied(stream)])
+        if not raw:
+            break
+
+        events = [json.loads(item) for item in raw]
+        with transaction.atomic():
+            if _mark_applied(stream, int(batch_id)):
+                model.objects.bulk_create(_build_rows(kind, events), ignore_conflicts=(kind == 'impression'))
+                if kind != QUARANTINE:
+                    _update_daily_stats(kind, events)
+                written += len(raw)
+        r.delete(keys[1], keys[2])
+
+        if len(raw) < FLUSH_BATCH_SIZE:
+            break
+
+    return written
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     AdvertisementZoneViewSet, AdvertiserViewSet, CampaignViewSet,
-    AdvertisementViewSet, AdStatisticsViewSet
+    AdvertisementViewSet, AdStatisticsViewSet, track_beacon
 )
 
 router = DefaultRouter()
@@ -13,5 +13,6 @@ router.register(r'ads', AdvertisementViewSet, basename='advertisement')
 router.register(r'statistics', AdStatisticsViewSet, basename='ad-statistics')
 
 urlpatterns = [
+    path('beacon/', track_beacon, name='ad-beacon'),
     path('', include(router.urls)),
 ]
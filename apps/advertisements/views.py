@@ -1,23 +1,52 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Avg, Count, Q
-from django.utils import timezone
 from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.db.models import Sum, Avg, Count, Max, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
-import random
+import logging
+import math
+import uuid
 
+from utils.export import parse_export_params, stream_export
+from utils.helpers import get_client_ip
+from utils.throttling import BeaconRateThrottle
+from apps.analytics import live
+from apps.articles.models import Article
+from . import adblock
+from .beacon import BEACON_MAX_BYTES, enqueue, parse_beacon
+from .engine import ad_engine
+from .frequency import visitor_id
+from .targeting import targeting_context
+from .tracking import EVENT_FIELDS, TRACK_CAPPED, TRACK_DUPLICATE, TRACK_OK, clean_event, get_ad_meta, track_event
 from .models import (
     AdvertisementZone, Advertiser, Campaign, Advertisement,
-    AdImpression, AdClick, AdConversion, AdBlockDetection
+    AdImpression, AdClick, AdConversion, AdBlockDetection, AdBlockDailyStats,
+    AdDailyStats, RevenueLedgerEntry
 )
 from .serializers import (
     AdvertisementZoneSerializer, AdvertiserSerializer, CampaignSerializer,
     AdvertisementSerializer, AdvertisementPublicSerializer,
-    AdImpressionSerializer, AdClickSerializer, AdConversionSerializer,
+    AdConversionSerializer,
     AdStatisticsSerializer
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _parse_day(value):
+    """YYYY-MM-DD -> date, geçersizse None"""
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
 
 class AdvertisementZoneViewSet(viewsets.ModelViewSet):
     """Reklam bölgeleri yönetimi"""
@@ -80,14 +109,24 @@ class CampaignViewSet(viewsets.ModelViewSet):
         """Kampanya performans raporu"""
         campaign = self.get_object()
         
-        # Günlük performans
-        daily_stats = AdImpression.objects.filter(
-            advertisement__campaign=campaign
-        ).extra(
-            select={'date': 'DATE(viewed_at)'}
-        ).values('date').annotate(
-            impressions=Count('id'),
-            clicks=Count('clicks')
+        # Günlük performans (reklam bazlı günlük özetlerden)
+        daily_stats = AdDailyStats.objects.filter(campaign=campaign)
+        
+        for param, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            parsed = _parse_day(value)
+            if parsed is None:
+                return Response({'error': f'{param} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+            daily_stats = daily_stats.filter(**{lookup: parsed})
+        
+        daily_stats = daily_stats.values('date').annotate(
+            impressions=Sum('impressions'),
+            unique_ips=Sum('unique_ips'),
+            clicks=Sum('clicks'),
+            conversions=Sum('conversions'),
+            spend=Sum('spend')
         ).order_by('date')
         
         return Response({
@@ -105,194 +144,279 @@ class AdvertisementViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'campaign__name']
     ordering_fields = ['created_at', 'priority', 'impressions', 'clicks']
     
+    MAX_PAGE_ZONES = 12
+
+    def _page_context(self, request):
+        """
+        Sayfa bağlamı: ziyaretçi ve hedefleme (kategori, cihaz, ülke, şehir)
+
+        category verilmezse article parametresinden (önbellekli) bulunur;
+        country verilmezse CDN'in ülke başlığı kullanılır.
+
+        Returns:
+            tuple: (context, error)
+        """
+        params = request.query_params
+        category = params.get('category') or None
+        article = params.get('article') or None
+
+        try:
+            category = int(category) if category is not None else None
+            article = int(article) if article is not None else None
+        except ValueError:
+            return None, 'category and article must be integers'
+
+        if category is None and article is not None:
+            category = cache.get_or_set(
+                f'ads:article_category:{article}',
+                lambda: Article.objects.filter(pk=article).values_list('category_id', flat=True).first(),
+                60 * 60
+            )
+
+        return {
+            'visitor': visitor_id(request),
+            'context': targeting_context(
+                category=category,
+                device=params.get('device'),
+                country=params.get('country') or request.META.get('HTTP_CF_IPCOUNTRY'),
+                city=params.get('city'),
+            ),
+        }, None
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def get_for_zone(self, request):
         """Belirli bir bölge için reklam getir"""
         zone_id = request.query_params.get('zone_id')
-        page_url = request.query_params.get('page_url', '')
         
         if not zone_id:
             return Response({'error': 'zone_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Cache key oluştur
-        cache_key = f'ad_zone_{zone_id}_{hash(page_url)}'
-        cached_ad = cache.get(cache_key)
-        
-        if cached_ad:
-            return Response(cached_ad)
-        
-        # Aktif reklamları getir
-        now = timezone.now()
-        ads = Advertisement.objects.filter(
-            zone_id=zone_id,
-            is_active=True,
-            campaign__status='active',
-            campaign__start_date__lte=now,
-            campaign__end_date__gte=now,
-        ).select_related('campaign', 'zone')
-        
-        # Kampanya bütçesi ve limitleri kontrol et
-        valid_ads = []
-        for ad in ads:
-            campaign = ad.campaign
-            if campaign.is_active:
-                valid_ads.append(ad)
-        
-        if not valid_ads:
-            return Response({'message': 'No active ads for this zone'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Ağırlıklı rastgele seçim (weighted random)
-        total_weight = sum(ad.weight for ad in valid_ads)
-        random_weight = random.randint(1, total_weight)
+        try:
+            zone_id = int(zone_id)
+        except ValueError:
+            return Response({'error': 'zone_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
-        cumulative_weight = 0
-        selected_ad = valid_ads[0]
+        page, error = self._page_context(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
         
-        for ad in valid_ads:
-            cumulative_weight += ad.weight
-            if random_weight <= cumulative_weight:
-                selected_ad = ad
-                break
+        # Süreç içi uygunluk tablosundan ağırlıklı seçim (veritabanı sorgusu yok);
+        # ziyaretçinin frekans sınırını doldurduğu kampanyalar atlanır
+        entry = ad_engine.choose(zone_id, **page)
         
-        # Serialize et
-        serializer = AdvertisementPublicSerializer(selected_ad)
-        result = serializer.data
+        if entry is None:
+            return Response({'message': 'No active ads for this zone'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Cache'e kaydet (5 dakika)
-        cache.set(cache_key, result, 300)
+        return Response(entry['payload'])
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def get_for_page(self, request):
+        """
+        Sayfadaki tüm bölgeler için tek istekte reklam getir
+        
+        ?zones=1,2,3&category=5&device=mobile&country=TR (veya article=42)
+        Aynı reklamveren sayfada iki kez gösterilmez. Uygun reklam
+        bulunamayan bölgeler null döner.
+        """
+        try:
+            zone_ids = [int(z) for z in request.query_params.get('zones', '').split(',') if z.strip()]
+        except ValueError:
+            return Response({'error': 'zones must be a comma separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        zone_ids = list(dict.fromkeys(zone_ids))
+        if not zone_ids:
+            return Response({'error': 'zones is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(zone_ids) > self.MAX_PAGE_ZONES:
+            return Response({'error': f'At most {self.MAX_PAGE_ZONES} zones per request'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page, error = self._page_context(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        chosen = ad_engine.choose_many(zone_ids, **page)
         
-        return Response(result)
+        return Response({
+            'ads': {
+                str(zone_id): entry['payload'] if entry else None
+                for zone_id, entry in chosen.items()
+            }
+        })
     
+    def _tracking_event(self, request, kind):
+        """
+        İstekten ham olay satırını hazırlar (veritabanı sorgusu olmadan)
+
+        Returns:
+            tuple: (event, errors)
+        """
+        data = {field: request.data.get(field, '') for field in EVENT_FIELDS[kind]}
+        data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
+        data['referrer'] = request.META.get('HTTP_REFERER', '')
+        # CDN'in belirlediği ülke istemcinin gönderdiğinden önceliklidir
+        data['country'] = request.META.get('HTTP_CF_IPCOUNTRY') or data['country']
+
+        event, errors = clean_event(kind, data)
+        event.update(
+            user=request.user.id if request.user.is_authenticated else None,
+            ip_address=get_client_ip(request),
+            ts=timezone.now().isoformat(),
+        )
+        return event, errors
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def track_impression(self, request, pk=None):
-        """Reklam gösterimini kaydet"""
-        ad = self.get_object()
-        
-        # IP ve User Agent al
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', '')).split(',')[0].strip()
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        # Son 1 dakika içinde aynı IP'den görüntüleme varsa sayma (spam önleme)
-        one_minute_ago = timezone.now() - timedelta(minutes=1)
-        recent_impression = AdImpression.objects.filter(
-            advertisement=ad,
-            ip_address=ip_address,
-            viewed_at__gte=one_minute_ago
-        ).exists()
-        
-        if recent_impression:
+        """
+        Reklam gösterimini kaydet
+
+        Dönen impression_id, gösterim satırının id'si değil 32 karakterlik
+        bir anahtardır (satır flush_ad_events ile sonradan yazılır).
+        track_click'e aynen geri gönderilmelidir.
+        """
+        try:
+            meta = get_ad_meta(int(pk))
+        except ValueError:
+            meta = None
+        if meta is None:
+            return Response({'error': 'Advertisement not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        event, errors = self._tracking_event(request, 'impression')
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sayaçlar ve ham satır Redis'e yazılır, flush_ad_events veritabanına aktarır.
+        # Aynı ziyaretçiden son 1 dakika içindeki gösterim sayılmaz (spam önleme).
+        # Geçersiz trafik karantinaya alınır; yanıt bunu belli etmez.
+        event['token'] = uuid.uuid4().hex
+        result = track_event('impression', meta, event, visitor_id(request))
+        if result == TRACK_DUPLICATE:
             return Response({'status': 'impression already tracked'})
-        
-        # Gösterimi kaydet
-        impression_data = {
-            'advertisement': ad.id,
-            'user': request.user.id if request.user.is_authenticated else None,
-            'ip_address': ip_address,
-            'user_agent': user_agent,
-            'page_url': request.data.get('page_url', ''),
-            'referrer': request.META.get('HTTP_REFERER', ''),
-            'device_type': request.data.get('device_type', ''),
-            'browser': request.data.get('browser', ''),
-            'os': request.data.get('os', ''),
-            'country': request.data.get('country', ''),
-            'city': request.data.get('city', ''),
-        }
-        
-        serializer = AdImpressionSerializer(data=impression_data)
-        if serializer.is_valid():
-            impression = serializer.save()
-            
-            # Reklam ve kampanya istatistiklerini güncelle
-            ad.impressions += 1
-            ad.save(update_fields=['impressions'])
-            
-            campaign = ad.campaign
-            campaign.total_impressions += 1
-            
-            # CPM fiyatlandırma için harcama güncelle
-            if campaign.pricing_model == 'cpm' and campaign.cpm_price:
-                campaign.spent += campaign.cpm_price / 1000
-            
-            campaign.save(update_fields=['total_impressions', 'spent'])
-            
-            return Response({'status': 'impression tracked', 'impression_id': impression.id})
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+        if result == TRACK_CAPPED:
+            return Response({'status': 'campaign limit reached'})
+
+        if result == TRACK_OK:
+            live.record_ad_impression()
+
+        return Response({'status': 'impression tracked', 'impression_id': event['token']})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def track_click(self, request, pk=None):
-        """Reklam tıklamasını kaydet"""
-        ad = self.get_object()
-        
-        # IP ve User Agent al
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', '')).split(',')[0].strip()
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        # Son 1 dakika içinde aynı IP'den tıklama varsa sayma (spam önleme)
-        one_minute_ago = timezone.now() - timedelta(minutes=1)
-        recent_click = AdClick.objects.filter(
-            advertisement=ad,
-            ip_address=ip_address,
-            clicked_at__gte=one_minute_ago
-        ).exists()
-        
-        if recent_click:
+        """
+        Reklam tıklamasını kaydet
+
+        impression_id: track_impression'ın döndürdüğü anahtar (eski
+        istemcilerin gönderdiği sayısal gösterim id'leri de kabul edilir).
+        """
+        try:
+            meta = get_ad_meta(int(pk))
+        except ValueError:
+            meta = None
+        if meta is None:
+            return Response({'error': 'Advertisement not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        event, errors = self._tracking_event(request, 'click')
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # track_impression'ın döndürdüğü gösterim anahtarı
+        event['impression_token'] = str(request.data.get('impression_id') or '')[:32] or None
+        result = track_event('click', meta, event, visitor_id(request))
+        if result == TRACK_DUPLICATE:
             return Response({'status': 'click already tracked'})
-        
-        # Tıklamayı kaydet
-        click_data = {
-            'advertisement': ad.id,
-            'impression': request.data.get('impression_id'),
-            'user': request.user.id if request.user.is_authenticated else None,
-            'ip_address': ip_address,
-            'user_agent': user_agent,
-            'page_url': request.data.get('page_url', ''),
-            'device_type': request.data.get('device_type', ''),
-            'country': request.data.get('country', ''),
-            'city': request.data.get('city', ''),
-        }
-        
-        serializer = AdClickSerializer(data=click_data)
-        if serializer.is_valid():
-            click = serializer.save()
-            
-            # Reklam ve kampanya istatistiklerini güncelle
-            ad.clicks += 1
-            ad.save(update_fields=['clicks'])
-            
-            campaign = ad.campaign
-            campaign.total_clicks += 1
-            
-            # CPC fiyatlandırma için harcama güncelle
-            if campaign.pricing_model == 'cpc' and campaign.cpc_price:
-                campaign.spent += campaign.cpc_price
-            
-            campaign.save(update_fields=['total_clicks', 'spent'])
-            
-            return Response({'status': 'click tracked', 'click_id': click.id})
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+        if result == TRACK_CAPPED:
+            return Response({'status': 'campaign limit reached'})
+
+        return Response({'status': 'click tracked'})
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def track_adblock(self, request):
-        """AdBlock tespiti kaydet"""
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', '')).split(',')[0].strip()
+        """
+        AdBlock tespiti kaydet
+        
+        Tespitler günlük Redis sayaçlarına yazılır (bkz. adblock.py); ham satır
+        yalnızca AD_ADBLOCK_RAW_SAMPLE_RATE oranındaki örnek için oluşturulur.
+        """
+        page_url = request.data.get('page_url', '')
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        AdBlockDetection.objects.create(
-            ip_address=ip_address,
-            user=request.user if request.user.is_authenticated else None,
-            user_agent=user_agent,
-            page_url=request.data.get('page_url', '')
-        )
+        adblock.record(visitor_id(request), page_url, user_agent)
+        
+        if adblock.should_sample():
+            AdBlockDetection.objects.create(
+                ip_address=get_client_ip(request),
+                user=request.user if request.user.is_authenticated else None,
+                user_agent=user_agent,
+                page_url=page_url
+            )
         
         return Response({'status': 'adblock detected'})
 
 
+@csrf_exempt
+@require_POST
+def track_beacon(request):
+    """
+    navigator.sendBeacon ile gönderilen olay paketlerini kaydet
+    
+    DRF katmanı (kimlik doğrulama, serializer) atlanır: IP başına hız
+    sınırı uygulanır, paket şeması kontrol edilip Redis stream'ine eklenir
+    ve hemen 204 döner. Olaylar consume_ad_beacons komutu tarafından işlenir.
+    """
+    throttle = BeaconRateThrottle()
+    if not throttle.allow_request(request, None):
+        response = JsonResponse({'error': 'Too many beacons'}, status=429)
+        wait = throttle.wait()
+        if wait is not None:
+            response['Retry-After'] = str(math.ceil(wait))
+        return response
+    
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > BEACON_MAX_BYTES:
+        return JsonResponse({'error': 'Beacon too large'}, status=413)
+    
+    # Content-Length'e güvenilmez: okunan bayt sayısı da sınırlanır
+    body = request.read(BEACON_MAX_BYTES + 1)
+    if len(body) > BEACON_MAX_BYTES:
+        return JsonResponse({'error': 'Beacon too large'}, status=413)
+    
+    try:
+        events = parse_beacon(body)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    try:
+        enqueue(request, events)
+    except Exception as e:
+        # Beacon yanıtı okunmaz; olay kaybı loglanır, istemci bekletilmez
+        logger.error(f"Could not enqueue ad beacon: {str(e)}")
+    
+    return HttpResponse(status=204)
+
+
 class AdStatisticsViewSet(viewsets.ViewSet):
     """Reklam istatistikleri ve raporlama"""
     permission_classes = [permissions.IsAdminUser]
     
+    # type -> (model, zaman alanı, kolonlar)
+    EXPORT_SOURCES = {
+        'impressions': (AdImpression, 'viewed_at', [
+            'id', 'advertisement_id', 'user_id', 'ip_address', 'user_agent',
+            'country', 'city', 'device_type', 'browser', 'os',
+            'page_url', 'referrer', 'content_type_id', 'object_id', 'viewed_at',
+        ]),
+        'clicks': (AdClick, 'clicked_at', [
+            'id', 'advertisement_id', 'impression_id', 'user_id', 'ip_address',
+            'user_agent', 'country', 'city', 'device_type', 'page_url',
+            'content_type_id', 'object_id', 'clicked_at',
+        ]),
+        'conversions': (AdConversion, 'converted_at', [
+            'id', 'advertisement_id', 'click_id', 'conversion_type',
+            'conversion_value', 'user_id', 'ip_address', 'notes', 'converted_at',
+        ]),
+    }
+    
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Genel reklam istatistikleri dashboard"""
@@ -326,38 +450,122 @@ class AdStatisticsViewSet(viewsets.ViewSet):
             'top_performing_ads': Advertisement.objects.filter(
                 campaign__start_date__gte=start_date
             ).order_by('-clicks')[:5].values('id', 'name', 'impressions', 'clicks'),
-            'adblock_detections': AdBlockDetection.objects.filter(detected_at__gte=start_date).count(),
+            'adblock_detections': AdBlockDailyStats.objects.filter(
+                date__gte=start_date.date()
+            ).aggregate(total=Sum('detections'))['total'] or 0,
         }
         
         return Response(stats)
     
     @action(detail=False, methods=['get'])
     def revenue_report(self, request):
-        """Gelir raporu"""
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        campaigns = Campaign.objects.all()
-        if start_date:
-            campaigns = campaigns.filter(start_date__gte=start_date)
-        if end_date:
-            campaigns = campaigns.filter(end_date__lte=end_date)
+        """
+        Gelir raporu (gelir defterinden)
+        
+        Tutarlar reconcile_ad_revenue işinin ham olaylardan hesapladığı
+        günlük defter kayıtlarıdır; start_date/end_date defter gününe uygulanır.
+        """
+        entries = RevenueLedgerEntry.objects.all()
+        
+        for param, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            parsed = _parse_day(value)
+            if parsed is None:
+                return Response({'error': f'{param} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(**{lookup: parsed})
         
         # Gelir dağılımı
-        revenue_by_advertiser = campaigns.values(
+        revenue_by_advertiser = entries.values(
             'advertiser__name'
         ).annotate(
-            total_revenue=Sum('spent')
+            total_revenue=Sum('amount')
         ).order_by('-total_revenue')
         
-        revenue_by_model = campaigns.values(
+        revenue_by_model = entries.values(
             'pricing_model'
         ).annotate(
-            total_revenue=Sum('spent')
-        )
+            total_revenue=Sum('amount')
+        ).order_by('pricing_model')
+        
+        revenue_by_month = entries.annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            total_revenue=Sum('amount')
+        ).order_by('month')
         
         return Response({
-            'total_revenue': campaigns.aggregate(total=Sum('spent'))['total'] or 0,
+            'total_revenue': entries.aggregate(total=Sum('amount'))['total'] or 0,
             'by_advertiser': revenue_by_advertiser,
             'by_pricing_model': revenue_by_model,
+            'by_month': revenue_by_month,
+            'reconciled_through': RevenueLedgerEntry.objects.aggregate(last=Max('date'))['last'],
         })
+    
+    @action(detail=False, methods=['get'])
+    def invoice(self, request):
+        """
+        Reklamveren için aylık fatura dökümü (gelir defterinden)
+        
+        GET /statistics/invoice/?advertiser=3&month=2026-09
+        """
+        try:
+            advertiser = Advertiser.objects.get(pk=int(request.query_params.get('advertiser', '')))
+        except (ValueError, Advertiser.DoesNotExist):
+            return Response({'error': 'A valid advertiser id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        month_start = _parse_day(f"{request.query_params.get('month', '')}-01")
+        if month_start is None:
+            return Response({'error': 'month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        
+        entries = RevenueLedgerEntry.objects.filter(
+            advertiser=advertiser,
+            date__gte=month_start,
+            date__lte=month_end,
+        )
+        lines = entries.values(
+            'campaign_id', 'campaign__name', 'pricing_model'
+        ).annotate(
+            impressions=Sum('impressions'),
+            clicks=Sum('clicks'),
+            conversions=Sum('conversions'),
+            amount=Sum('amount'),
+        ).order_by('campaign__name')
+        
+        return Response({
+            'advertiser': {'id': advertiser.id, 'name': advertiser.name},
+            'period': {'start': month_start, 'end': month_end},
+            'lines': lines,
+            'total': entries.aggregate(total=Sum('amount'))['total'] or 0,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Ham gösterim/tıklama/dönüşüm kayıtlarını CSV/NDJSON olarak stream eder
+        
+        GET /statistics/export/?type=impressions&start_date=2026-01-01&file_format=csv&compress=1
+        """
+        export_type = request.query_params.get('type', 'impressions')
+        if export_type not in self.EXPORT_SOURCES:
+            return Response(
+                {'error': f"type must be one of: {', '.join(self.EXPORT_SOURCES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        options = parse_export_params(request)
+        model, time_field, fields = self.EXPORT_SOURCES[export_type]
+        records = model.objects.filter(**{
+            f'{time_field}__gte': options['start_date'],
+            f'{time_field}__lte': options['end_date'],
+        }).order_by('id')
+        
+        return stream_export(
+            records,
+            fields,
+            filename=f"ad_{export_type}_{options['start_date']:%Y%m%d}_{options['end_date']:%Y%m%d}",
+            file_format=options['file_format'],
+            compress=options['compress'],
+        )
@@ -9,7 +9,7 @@ class ArticleViewAdmin(admin.ModelAdmin):
 
 @admin.register(PopularArticle)
 class PopularArticleAdmin(admin.ModelAdmin):
-    list_display = ('article', 'period', 'score', 'views_count', 'date')
+    list_display = ('article', 'period', 'score', 'views_count', 'shares_count', 'likes_count', 'comments_count', 'date')
     list_filter = ('period', 'date')
 
 @admin.register(SocialShare)
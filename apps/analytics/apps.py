@@ -4,3 +4,6 @@ class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.analytics'
     verbose_name = 'Analitik'
+
+    def ready(self):
+        import apps.analytics.signals
@@ -0,0 +1,41 @@
+import time
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from . import live
+
+
+class LiveStatsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canlı dashboard istatistikleri (sadece yöneticiler)
+
+    ws://<host>/ws/analytics/live/?token=<access token>
+    (ya da Sec-WebSocket-Protocol: jwt, <access token>; oturum çerezi de geçerli)
+
+    Veritabanına dokunmaz: broadcast_live_stats komutunun saniyede bir
+    yayınladığı snapshot'ları olduğu gibi iletir.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_staff:
+            await self.close(code=4403)
+            return
+
+        await self.channel_layer.group_add(live.LIVE_STATS_GROUP, self.channel_name)
+        await self.accept(subprotocol=self.scope.get('subprotocol'))
+
+        snapshot = await sync_to_async(live.get_latest_snapshot)()
+        if snapshot:
+            await self.send_json(snapshot)
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(live.LIVE_STATS_GROUP, self.channel_name)
+
+    async def live_stats(self, event):
+        # Süresi dolan JWT ile açılmış bağlantı kapatılır, istemci yeni token ile bağlanır
+        token_exp = self.scope.get('token_exp')
+        if token_exp and token_exp <= time.time():
+            await self.close(code=4401)
+            return
+        await self.send_json(event['data'])
@@ -0,0 +1,107 @@
+"""
+Live analytics counters for the real-time dashboard.
+
+The ingestion paths (article views, ad impressions) bump per-second Redis
+counters. A single broadcaster process (manage.py broadcast_live_stats)
+folds them into one snapshot per second and publishes it to the channel
+layer group the dashboard websockets listen on, so the cost does not grow
+with the number of open dashboards.
+"""
+
+import json
+import logging
+import time
+
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATS_GROUP = 'analytics_live'
+LIVE_KEY_PREFIX = 'news:live'
+LIVE_KEY_TTL = 60 * 10
+TOP_ARTICLES_WINDOW_MINUTES = 5
+TOP_ARTICLES_LIMIT = 10
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _bump(counter, now=None, member=None):
+    now = int(now or time.time())
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        key = f'{LIVE_KEY_PREFIX}:{counter}:{now}'
+        pipe.incr(key)
+        pipe.expire(key, LIVE_KEY_TTL)
+        if member is not None:
+            ranking_key = f'{LIVE_KEY_PREFIX}:{counter}:top:{now // 60}'
+            pipe.zincrby(ranking_key, 1, member)
+            pipe.expire(ranking_key, LIVE_KEY_TTL)
+        pipe.execute()
+    except Exception as e:
+        # Canlı sayaçlar kayıt akışını asla bozmamalı
+        logger.warning(f"Live counter update failed for {counter}: {str(e)}")
+
+
+def record_article_view(article_id, now=None):
+    """Canlı görüntülenme sayaçlarını artır"""
+    _bump('views', now=now, member=article_id)
+
+
+def record_ad_impression(now=None):
+    """Canlı reklam gösterim sayacını artır"""
+    _bump('ad_impressions', now=now)
+
+
+def _sum(values):
+    return sum(int(value) for value in values if value)
+
+
+def build_snapshot(now=None):
+    """
+    Son tamamlanmış saniye için canlı istatistikleri hesaplar
+
+    Returns:
+        dict: views_last_second, views_per_minute, ad_impressions_last_second,
+              ad_impressions_per_second, top_articles [(article_id, views)]
+    """
+    last = int(now or time.time()) - 1
+    seconds = range(last - 59, last + 1)
+    minute = last // 60
+    ranking_keys = [
+        f'{LIVE_KEY_PREFIX}:views:top:{m}'
+        for m in range(minute - TOP_ARTICLES_WINDOW_MINUTES + 1, minute + 1)
+    ]
+    union_key = f'{LIVE_KEY_PREFIX}:views:top:window'
+
+    pipe = _redis().pipeline(transaction=False)
+    pipe.mget([f'{LIVE_KEY_PREFIX}:views:{s}' for s in seconds])
+    pipe.mget([f'{LIVE_KEY_PREFIX}:ad_impressions:{s}' for s in seconds])
+    pipe.zunionstore(union_key, ranking_keys)
+    pipe.zrevrange(union_key, 0, TOP_ARTICLES_LIMIT - 1, withscores=True)
+    pipe.expire(union_key, LIVE_KEY_TTL)
+    views, impressions, _, top, _ = pipe.execute()
+
+    return {
+        'timestamp': last,
+        'views_last_second': int(views[-1] or 0),
+        'views_per_minute': _sum(views),
+        'ad_impressions_last_second': int(impressions[-1] or 0),
+        'ad_impressions_per_second': round(_sum(impressions) / 60, 2),
+        'top_articles': [(int(article_id), int(score)) for article_id, score in top],
+    }
+
+
+def store_snapshot(snapshot):
+    """Yeni bağlanan dashboard'lar için son snapshot'ı sakla"""
+    _redis().set(f'{LIVE_KEY_PREFIX}:snapshot', json.dumps(snapshot), ex=LIVE_KEY_TTL)
+
+
+def get_latest_snapshot():
+    try:
+        data = _redis().get(f'{LIVE_KEY_PREFIX}:snapshot')
+    except Exception as e:
+        logger.warning(f"Could not read live snapshot: {str(e)}")
+        return None
+    return json.loads(data) if data else None
@@ -0,0 +1,97 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from utils.benchmark import benchmark_environment
+
+
+class Command(BaseCommand):
+    help = 'update_author_statistics görevini geçici test veritabanında N yazarla ölçer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=10000)
+        parser.add_argument('--articles-per-author', type=int, default=5)
+        parser.add_argument('--changed', type=float, default=0.01, help='Artımlı çalıştırmada değişen makale oranı')
+        parser.add_argument('--skip-legacy', action='store_true', help='Yazar başına sorgu yapan eski yöntemi ölçme')
+
+    def handle(self, *args, **options):
+        with benchmark_environment():
+            self.seed(options['authors'], options['articles_per_author'])
+            self.measure('full rebuild', lambda: self.run_task(full_rebuild=True))
+            if not options['skip_legacy']:
+                self.measure('legacy per-author loop', self.legacy_update)
+
+            from apps.articles.models import Article
+            changed = max(int(options['authors'] * options['articles_per_author'] * options['changed']), 1)
+            ids = list(Article.objects.order_by('?').values_list('id', flat=True)[:changed])
+            Article.objects.filter(id__in=ids).update(views_count=0, updated_at=timezone.now())
+            self.measure(f'incremental ({changed} changed articles)', self.run_task)
+
+    def seed(self, authors, articles_per_author):
+        from apps.accounts.models import AuthorProfile
+        from apps.articles.models import Article
+        from apps.categories.models import Category
+
+        started = time.perf_counter()
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(username=f'bench{i}', email=f'bench{i}@benchmark.invalid') for i in range(authors)
+        ], batch_size=2000)
+        users = User.objects.filter(username__startswith='bench').order_by('id')
+        AuthorProfile.objects.bulk_create([
+            AuthorProfile(user=user, display_name=user.username, slug=user.username) for user in users
+        ], batch_size=2000)
+
+        category = Category.objects.create(name='Benchmark', slug='benchmark')
+        now = timezone.now()
+        profiles = AuthorProfile.objects.order_by('id').values_list('id', flat=True)
+        Article.objects.bulk_create([
+            Article(
+                title=f'{author_id}-{n}',
+                slug=f'bench-{author_id}-{n}',
+                summary='-',
+                content='-',
+                author_id=author_id,
+                category=category,
+                status='published',
+                published_at=now,
+                views_count=(author_id * 7 + n) % 1000,
+            )
+            for author_id in profiles
+            for n in range(articles_per_author)
+        ], batch_size=2000)
+        self.stdout.write(f'Seeded {authors} authors, {authors * articles_per_author} articles in {time.perf_counter() - started:.1f}s')
+
+    def run_task(self, **kwargs):
+        from apps.analytics.tasks import update_author_statistics
+
+        return update_author_statistics(**kwargs)
+
+    def legacy_update(self):
+        """Görevin önceki hali: yazar başına iki sorgu ve bir save()"""
+        from apps.accounts.models import AuthorProfile
+        from apps.articles.models import Article
+
+        for author in AuthorProfile.objects.all():
+            articles = Article.objects.filter(author=author, status='published')
+            author.total_articles = articles.count()
+            author.total_views = articles.aggregate(total=Sum('views_count'))['total'] or 0
+            author.save(update_fields=['total_articles', 'total_views'])
+
+    def measure(self, name, function):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {elapsed:.2f}s, {queries} queries')
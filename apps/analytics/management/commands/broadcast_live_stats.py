@@ -0,0 +1,72 @@
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.analytics import live
+
+# Başlık önbelleği bu aralıkla tamamen yenilenir (başlık/slug değişiklikleri için)
+TITLE_REFRESH_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = 'Canlı analitik sayaçlarını saniyede bir dashboard websocketlerine yayınlar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Yayın aralığı (saniye)')
+
+    def handle(self, *args, **options):
+        from apps.articles.models import Article
+
+        interval = options['interval']
+        channel_layer = get_channel_layer()
+        titles = {}
+        titles_loaded_at = time.monotonic()
+        previous = None
+
+        self.stdout.write(self.style.SUCCESS(f'Live stats broadcaster started (every {interval}s)'))
+
+        while True:
+            # Bir sonraki saniye sınırına hizala
+            time.sleep(interval - (time.time() % interval))
+
+            # Uzun süren döngüde kopmuş veya süresi dolmuş bağlantıları bırak
+            close_old_connections()
+
+            try:
+                snapshot = live.build_snapshot()
+
+                # Başlıklar süreç içinde önbelleklenir, her tick en fazla bir sorgu.
+                # Önbellek yalnızca güncel listedeki makaleleri tutar ve periyodik yenilenir
+                top_ids = {article_id for article_id, _ in snapshot['top_articles']}
+                if time.monotonic() - titles_loaded_at >= TITLE_REFRESH_SECONDS:
+                    titles = {}
+                    titles_loaded_at = time.monotonic()
+                else:
+                    titles = {article_id: title for article_id, title in titles.items() if article_id in top_ids}
+                missing = [article_id for article_id in top_ids if article_id not in titles]
+                if missing:
+                    for article in Article.objects.filter(id__in=missing).only('id', 'title', 'slug'):
+                        titles[article.id] = {'title': article.title, 'slug': article.slug}
+            except Exception as e:
+                self.stderr.write(f'Could not build live snapshot: {e}')
+                continue
+
+            snapshot['top_articles'] = [
+                {'id': article_id, 'views': views, **titles.get(article_id, {})}
+                for article_id, views in snapshot['top_articles']
+            ]
+
+            # Değişiklik yoksa yayın yapma
+            changes = {key: value for key, value in snapshot.items() if key != 'timestamp'}
+            if changes == previous:
+                continue
+            previous = changes
+
+            live.store_snapshot(snapshot)
+            async_to_sync(channel_layer.group_send)(
+                live.LIVE_STATS_GROUP,
+                {'type': 'live.stats', 'data': snapshot}
+            )
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='populararticle',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='populararticle',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
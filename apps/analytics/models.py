@@ -41,6 +41,8 @@ class PopularArticle(models.Model):
     period = models.CharField(max_length=20, choices=PERIOD_CHOICES)
     views_count = models.PositiveIntegerField(default=0)
     shares_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     score = models.FloatField(default=0.0, verbose_name='Popülerlik Skoru')
     date = models.DateField(auto_now_add=True)
     
@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import LiveStatsConsumer
+
+websocket_urlpatterns = [
+    path('ws/analytics/live/', LiveStatsConsumer.as_asgi()),
+]
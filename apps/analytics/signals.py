@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.articles.models import Article
+
+
+def _recompute_authors(author_ids):
+    from .tasks import update_author_statistics
+
+    author_ids = sorted({author_id for author_id in author_ids if author_id})
+    if author_ids:
+        transaction.on_commit(lambda: update_author_statistics.delay(author_ids=author_ids))
+
+
+@receiver(pre_save, sender=Article)
+def article_pre_save(sender, instance, **kwargs):
+    # Yazar değişirse eski yazarın istatistikleri de güncellenmeli
+    instance._previous_author_id = None
+    if instance.pk:
+        instance._previous_author_id = Article.objects.filter(pk=instance.pk).values_list('author_id', flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+def article_author_changed(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_author_id', None)
+    if not created and previous and previous != instance.author_id:
+        _recompute_authors([previous, instance.author_id])
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    # Silinen makale izleme penceresinde görünmez; yazar hemen yeniden hesaplanır
+    _recompute_authors([instance.author_id])
@@ -3,13 +3,30 @@ Celery tasks for analytics application.
 """
 
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Count, Sum, Avg, F
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum, Avg, F, Exists, OuterRef
 from datetime import timedelta
 import logging
 
+from . import live
+
 logger = logging.getLogger(__name__)
 
+# Last successful run of update_author_statistics
+AUTHOR_STATS_WATERMARK_KEY = 'analytics:author_stats:watermark'
+AUTHOR_STATS_BATCH_SIZE = 1000
+
+# Ranking windows for update_popular_articles
+POPULARITY_PERIODS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=30),
+}
+POPULAR_ARTICLES_LIMIT = 20
+
 
 @shared_task(bind=True, max_retries=3)
 def record_article_view(self, article_id, user_id=None, ip_address=None, user_agent=''):
@@ -54,6 +71,7 @@ def record_article_view(self, article_id, user_id=None, ip_address=None, user_ag
                 ip_address=ip_address,
                 user_agent=user_agent[:255]
             )
+            live.record_article_view(article_id)
 
             logger.info(f"Recorded view for article {article_id} from IP {ip_address}")
             return f"View recorded for article {article_id}"
@@ -74,40 +92,81 @@ def record_article_view(self, article_id, user_id=None, ip_address=None, user_ag
 @shared_task(bind=True, max_retries=3)
 def update_popular_articles(self):
     """
-    Update popular articles based on views count.
+    Update popular articles with a weighted score.
     Runs every 30 minutes.
+
+    For each period, views, shares, likes and approved comments inside the
+    window are counted with one grouped query per signal, combined with
+    POPULARITY_SCORE_WEIGHTS and upserted in a single bulk_create. Rows
+    that fell out of the top list are removed, so each period always holds
+    exactly the current ranking.
+
+    Shares are the timestamped Share rows only: SocialShare.share_count is a
+    lifetime platform total with no per-window breakdown.
     """
     try:
         from apps.articles.models import Article
-        from .models import PopularArticle
-        
-        # Calculate for different periods
-        periods = {
-            'daily': timedelta(days=1),
-            'weekly': timedelta(weeks=1),
-            'monthly': timedelta(days=30),
-        }
-        
-        for period_name, period_delta in periods.items():
-            start_date = timezone.now() - period_delta
-            
-            # Get top articles for this period
-            top_articles = Article.objects.filter(
-                status='published',
-                published_at__gte=start_date
-            ).order_by('-views_count')[:20]
-            
-            for article in top_articles:
-                PopularArticle.objects.update_or_create(
-                    article=article,
+        from apps.comments.models import Comment
+        from apps.interactions.models import Like, Share
+        from .models import ArticleView, PopularArticle
+
+        weights = settings.POPULARITY_SCORE_WEIGHTS
+        now = timezone.now()
+        today = now.date()
+
+        for period_name, period_delta in POPULARITY_PERIODS.items():
+            start_date = now - period_delta
+
+            counters = {
+                'views': ArticleView.objects.filter(viewed_at__gte=start_date),
+                'shares': Share.objects.filter(created_at__gte=start_date),
+                'likes': Like.objects.filter(created_at__gte=start_date),
+                'comments': Comment.objects.filter(created_at__gte=start_date, status='approved'),
+            }
+
+            signals = {}
+            for signal, queryset in counters.items():
+                rows = queryset.filter(
+                    article__status='published'
+                ).values('article_id').annotate(total=Count('id')).order_by()
+                for row in rows:
+                    signals.setdefault(row['article_id'], {})[signal] = row['total']
+
+
+            ranking = sorted(
+                (
+                    (sum(weights[name] * value for name, value in article_signals.items()), article_id, article_signals)
+                    for article_id, article_signals in signals.items()
+                ),
+                reverse=True
+            )[:POPULAR_ARTICLES_LIMIT]
+
+            records = [
+                PopularArticle(
+                    article_id=article_id,
                     period=period_name,
-                    date=timezone.now().date(),
-                    defaults={
-                        'views_count': article.views_count,
-                        'score': article.views_count
-                    }
+                    date=today,
+                    views_count=article_signals.get('views', 0),
+                    shares_count=article_signals.get('shares', 0),
+                    likes_count=article_signals.get('likes', 0),
+                    comments_count=article_signals.get('comments', 0),
+                    score=score,
                 )
-        
+                for score, article_id, article_signals in ranking
+            ]
+
+            with transaction.atomic():
+                PopularArticle.objects.bulk_create(
+                    records,
+                    update_conflicts=True,
+                    unique_fields=['article', 'period', 'date'],
+                    update_fields=['views_count', 'shares_count', 'likes_count', 'comments_count', 'score'],
+                )
+                PopularArticle.objects.filter(period=period_name).exclude(
+                    date=today,
+                    article_id__in=[record.article_id for record in records]
+                ).delete()
+
         logger.info(f"Updated popular articles for all periods")
         return "Popular articles updated"
     
@@ -167,38 +226,87 @@ def update_trending_tags(self):
 
 
 @shared_task(bind=True, max_retries=3)
-def update_author_statistics(self):
+def update_author_statistics(self, full_rebuild=False, author_ids=None):
     """
-    Update author statistics (total articles, total views, average rating).
+    Update author statistics (total articles, total views).
     Runs every hour.
+
+    Only authors whose articles changed or received views since the last
+    successful run (the watermark) are recomputed. Totals come from a single
+    grouped aggregate over Article and are written back with bulk_update.
+    Authors that lost an article (deleted or moved to another author) are
+    recomputed right away through author_ids, queued by analytics signals.
+
+    Args:
+        full_rebuild: Ignore the watermark and recompute every author
+        author_ids: Recompute only these authors (the watermark is not moved)
     """
     try:
         from apps.accounts.models import AuthorProfile
         from apps.articles.models import Article
-        
+        from .models import ArticleView
+
+        started_at = timezone.now()
+        watermark = None if full_rebuild or author_ids else cache.get(AUTHOR_STATS_WATERMARK_KEY)
+
         authors = AuthorProfile.objects.all()
-        
-        for author in authors:
-            # Count total articles
-            total_articles = Article.objects.filter(
-                author=author,
-                status='published'
-            ).count()
-            
-            # Sum total views
-            total_views = Article.objects.filter(
-                author=author,
-                status='published'
-            ).aggregate(total=Sum('views_count'))['total'] or 0
-            
-            # Update author profile
+        if author_ids:
+            authors = authors.filter(pk__in=author_ids)
+        elif watermark:
+            # Only authors touched since the last run
+            authors = authors.filter(
+                Exists(Article.objects.filter(
+                    author=OuterRef('pk'),
+                    updated_at__gte=watermark
+                )) |
+                Exists(ArticleView.objects.filter(
+                    article__author=OuterRef('pk'),
+                    viewed_at__gte=watermark
+                ))
+            )
+
+        # One grouped aggregate for all affected authors
+        stats = {
+            row['author_id']: (row['total_articles'], row['total_views'] or 0)
+            for row in Article.objects.filter(
+                status='published',
+                author__in=authors.values('pk')
+            ).values('author_id').annotate(
+                total_articles=Count('id'),
+                total_views=Sum('views_count')
+            ).order_by()
+        }
+
+        checked_count = 0
+        updated_count = 0
+        batch = []
+        for author in authors.only('id', 'total_articles', 'total_views').iterator(
+            chunk_size=AUTHOR_STATS_BATCH_SIZE
+        ):
+            checked_count += 1
+            total_articles, total_views = stats.get(author.id, (0, 0))
+            if author.total_articles == total_articles and author.total_views == total_views:
+                continue
+
             author.total_articles = total_articles
             author.total_views = total_views
-            author.save(update_fields=['total_articles', 'total_views'])
-        
-        logger.info(f"Updated statistics for {len(authors)} authors")
-        return f"Successfully updated statistics for {len(authors)} authors"
-    
+            batch.append(author)
+
+            if len(batch) >= AUTHOR_STATS_BATCH_SIZE:
+                AuthorProfile.objects.bulk_update(batch, ['total_articles', 'total_views'])
+                updated_count += len(batch)
+                batch = []
+
+        if batch:
+            AuthorProfile.objects.bulk_update(batch, ['total_articles', 'total_views'])
+            updated_count += len(batch)
+
+        if not author_ids:
+            cache.set(AUTHOR_STATS_WATERMARK_KEY, started_at, None)
+
+        logger.info(f"Checked {checked_count} authors, updated statistics for {updated_count}")
+        return f"Successfully updated statistics for {updated_count} authors"
+
     except Exception as exc:
         logger.error(f"Error updating author statistics: {str(exc)}")
         raise self.retry(exc=exc, countdown=60)
@@ -0,0 +1,163 @@
+"""
+Tests for the analytics jobs (tasks.py) and the streaming export (utils/export.py).
+"""
+
+import gzip
+import json
+import resource
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.models import AuthorProfile
+from apps.articles.models import Article
+from apps.categories.models import Category
+from apps.interactions.models import Like
+from utils.export import stream_export
+
+from .models import ArticleView, PopularArticle
+from .tasks import AUTHOR_STATS_WATERMARK_KEY, update_author_statistics, update_popular_articles
+from .views import ARTICLE_VIEW_EXPORT_FIELDS
+
+User = get_user_model()
+
+
+def peak_rss_mb():
+    # Linux'ta ru_maxrss KB cinsinden
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class AnalyticsTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Test', slug='test')
+
+    def author(self, name):
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+        return AuthorProfile.objects.create(user=user, display_name=name, slug=name)
+
+    def article(self, author, views_count=0, status='published'):
+        count = Article.objects.count()
+        return Article.objects.create(
+            title=f'Article {count}',
+            slug=f'article-{count}',
+            summary='-',
+            content='-',
+            author=author,
+            category=self.category,
+            status=status,
+            published_at=timezone.now(),
+            views_count=views_count,
+        )
+
+
+class AuthorStatisticsTest(AnalyticsTestMixin, TestCase):
+    def test_full_rebuild_aggregates_published_articles(self):
+        first, second, idle = self.author('first'), self.author('second'), self.author('idle')
+        self.article(first, views_count=10)
+        self.article(first, views_count=5)
+        self.article(first, views_count=100, status='draft')
+        self.article(second, views_count=7)
+        AuthorProfile.objects.filter(pk=idle.pk).update(total_articles=3, total_views=30)
+
+        update_author_statistics(full_rebuild=True)
+
+        totals = dict(AuthorProfile.objects.values_list('id', 'total_articles'))
+        views = dict(AuthorProfile.objects.values_list('id', 'total_views'))
+        self.assertEqual((totals[first.id], views[first.id]), (2, 15))
+        self.assertEqual((totals[second.id], views[second.id]), (1, 7))
+        # Makalesi kalmayan yazar sıfırlanır
+        self.assertEqual((totals[idle.id], views[idle.id]), (0, 0))
+        self.assertIsNotNone(cache.get(AUTHOR_STATS_WATERMARK_KEY))
+
+    def test_incremental_run_only_touches_changed_authors(self):
+        changed, untouched = self.author('changed'), self.author('untouched')
+        article = self.article(changed, views_count=1)
+        self.article(untouched, views_count=1)
+        update_author_statistics(full_rebuild=True)
+
+        # İzleme penceresi dışındaki sapma artımlı çalıştırmada düzeltilmez
+        AuthorProfile.objects.filter(pk=untouched.pk).update(total_views=999)
+        Article.objects.filter(pk=article.pk).update(views_count=50, updated_at=timezone.now() + timedelta(seconds=1))
+
+        update_author_statistics()
+
+        self.assertEqual(AuthorProfile.objects.get(pk=changed.pk).total_views, 50)
+        self.assertEqual(AuthorProfile.objects.get(pk=untouched.pk).total_views, 999)
+
+    def test_author_ids_recompute_after_article_moves(self):
+        old, new = self.author('old'), self.author('new')
+        article = self.article(old, views_count=4)
+        update_author_statistics(full_rebuild=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.author = new
+            article.save()
+
+        self.assertEqual(AuthorProfile.objects.get(pk=old.pk).total_articles, 0)
+        self.assertEqual(AuthorProfile.objects.get(pk=new.pk).total_views, 4)
+
+
+class PopularArticlesTest(AnalyticsTestMixin, TestCase):
+    def test_ranking_uses_weighted_window_signals(self):
+        author = self.author('author')
+        viewed, liked, stale = self.article(author), self.article(author), self.article(author)
+        ArticleView.objects.bulk_create([ArticleView(article=viewed) for _ in range(4)])
+        Like.objects.create(user=author.user, article=liked)
+        Like.objects.create(user=User.objects.create_user(username='reader', password='x'), article=liked)
+        PopularArticle.objects.create(article=stale, period='daily', score=100)
+
+        update_popular_articles()
+
+        daily = list(PopularArticle.objects.filter(period='daily').values_list('article_id', 'score'))
+        # 2 beğeni x 3.0 > 4 görüntülenme x 1.0; listeden düşen satır silinir
+        self.assertEqual(daily, [(liked.id, 6.0), (viewed.id, 4.0)])
+
+
+class StreamingExportTest(AnalyticsTestMixin, TestCase):
+    ROWS = 100_000
+
+    def setUp(self):
+        super().setUp()
+        article = self.article(self.author('author'))
+        for start in range(0, self.ROWS, 5000):
+            ArticleView.objects.bulk_create([
+                ArticleView(
+                    article=article,
+                    ip_address='10.0.0.1',
+                    user_agent='Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/120.0',
+                    referrer='https://example.com/some/referring/page',
+                    device_type='desktop',
+                    country='Türkiye',
+                    city='İstanbul',
+                )
+                for _ in range(start, min(start + 5000, self.ROWS))
+            ])
+
+    def export(self, **options):
+        return stream_export(ArticleView.objects.order_by('id'), ARTICLE_VIEW_EXPORT_FIELDS, 'views', **options)
+
+    def test_csv_export_memory_does_not_grow_with_rows(self):
+        rss_before = peak_rss_mb()
+        rows = size = 0
+        for chunk in self.export().streaming_content:
+            rows += chunk.count(b'\n')
+            size += len(chunk)
+        growth = peak_rss_mb() - rss_before
+
+        self.assertEqual(rows, self.ROWS + 1)
+        # Çıktının tamamı belleğe alınsaydı en az çıktı boyu kadar büyürdü
+        self.assertGreater(size / 1024 / 1024, 15)
+        self.assertLess(growth, 10)
+
+    def test_gzipped_ndjson_export(self):
+        content = b''.join(self.export(file_format='ndjson', compress=True).streaming_content)
+        lines = gzip.decompress(content).splitlines()
+
+        self.assertEqual(len(lines), self.ROWS)
+        first = json.loads(lines[0])
+        self.assertEqual(list(first), ARTICLE_VIEW_EXPORT_FIELDS)
+        self.assertEqual(first['city'], 'İstanbul')
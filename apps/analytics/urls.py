@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import dashboard_stats, admin_dashboard
+from .views import dashboard_stats, admin_dashboard, export_article_views
 
 urlpatterns = [
     path('dashboard/', dashboard_stats, name='dashboard-stats'),
     path('admin-dashboard/', admin_dashboard, name='admin-dashboard'),
+    path('export/views/', export_article_views, name='export-article-views'),
 ]
@@ -5,8 +5,14 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.db.models import Count, Sum, Avg, Q, F
 from django.utils import timezone
 from datetime import timedelta
+from utils.export import parse_export_params, stream_export
 from .models import ArticleView, PopularArticle
 
+ARTICLE_VIEW_EXPORT_FIELDS = [
+    'id', 'article_id', 'user_id', 'ip_address', 'user_agent', 'referrer',
+    'device_type', 'country', 'city', 'viewed_at',
+]
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -190,6 +196,29 @@ def admin_dashboard(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_article_views(request):
+    """
+    Ham görüntülenme kayıtlarını CSV/NDJSON olarak stream eder
+
+    GET /analytics/export/views/?start_date=2026-01-01&end_date=2026-01-31&file_format=ndjson&compress=1
+    """
+    options = parse_export_params(request)
+    views = ArticleView.objects.filter(
+        viewed_at__gte=options['start_date'],
+        viewed_at__lte=options['end_date']
+    ).order_by('id')
+
+    return stream_export(
+        views,
+        ARTICLE_VIEW_EXPORT_FIELDS,
+        filename=f"article_views_{options['start_date']:%Y%m%d}_{options['end_date']:%Y%m%d}",
+        file_format=options['file_format'],
+        compress=options['compress'],
+    )
+
+
 def calculate_percentage_change(current, previous):
     """Yüzde değişim hesapla"""
     if previous == 0:
@@ -182,30 +182,19 @@ class ArticleViewSet(viewsets.ModelViewSet):
         Returns: List of popular articles
         """
         period = request.query_params.get('period', 'weekly')
+        if period not in ('daily', 'weekly', 'monthly'):
+            period = 'weekly'
         
-        # Period'a göre filtrele
-        if period == 'daily':
-            from datetime import timedelta
-            from django.utils import timezone
-            start_date = timezone.now() - timedelta(days=1)
-        elif period == 'monthly':
-            from datetime import timedelta
-            from django.utils import timezone
-            start_date = timezone.now() - timedelta(days=30)
-        else:  # weekly (default)
-            from datetime import timedelta
-            from django.utils import timezone
-            start_date = timezone.now() - timedelta(days=7)
-        
+        # update_popular_articles görevinin ürettiği sıralamadan oku
         popular_articles = Article.objects.filter(
             status='published',
-            published_at__gte=start_date
+            popularity_records__period=period
         ).select_related(
             'author',
             'category'
         ).prefetch_related(
             'tags'
-        ).order_by('-views_count')[:20]
+        ).order_by('-popularity_records__score')[:20]
         
         serializer = self.get_serializer(popular_articles, many=True)
         return Response(serializer.data)
@@ -1,21 +1,37 @@
 from django.contrib import admin
+from .feed import invalidate_feed
 from .models import Comment, CommentLike
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('content_short', 'user', 'article', 'status', 'created_at')
-    list_filter = ('status', 'is_pinned', 'created_at')
+    list_display = ('content_short', 'user', 'article', 'status', 'spam_score', 'auto_moderated', 'created_at')
+    list_filter = ('status', 'auto_moderated', 'is_pinned', 'created_at')
+    list_select_related = ('user', 'article')
     search_fields = ('content', 'user__username', 'email', 'name')
-    actions = ['approve_comments', 'reject_comments']
+    readonly_fields = ('spam_score', 'moderation_signals')
+    actions = ['approve_comments', 'reject_comments', 'mark_spam']
     
     def content_short(self, obj):
         return obj.content[:50]
     
+    def save_model(self, request, obj, form, change):
+        # Editörün kararı otomatik kararın yerine geçer ve eğitimde kullanılır
+        if 'status' in form.changed_data:
+            obj.auto_moderated = False
+        super().save_model(request, obj, form, change)
+
     def approve_comments(self, request, queryset):
-        queryset.update(status='approved')
+        invalidate_feed(queryset.values_list('article_id', flat=True))
+        queryset.update(status='approved', auto_moderated=False)
     
     def reject_comments(self, request, queryset):
-        queryset.update(status='rejected')
+        invalidate_feed(queryset.values_list('article_id', flat=True))
+        queryset.update(status='rejected', auto_moderated=False)
+
+    def mark_spam(self, request, queryset):
+        invalidate_feed(queryset.values_list('article_id', flat=True))
+        queryset.update(status='spam', auto_moderated=False)
+    mark_spam.short_description = 'Spam olarak işaretle'
 
 @admin.register(CommentLike)
 class CommentLikeAdmin(admin.ModelAdmin):
@@ -4,3 +4,6 @@ class CommentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.comments'
     verbose_name = 'Yorumlar'
+
+    def ready(self):
+        import apps.comments.signals
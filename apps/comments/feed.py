@@ -0,0 +1,94 @@
+"""
+Per-article comment feed.
+
+Top-level approved comments of an article are listed pinned first, then
+newest first, ordered by (is_pinned, created_at, id) descending. Pages are
+cut with keyset pagination: the cursor carries the last row's sort key and
+the next page starts strictly after it, so deep pages cost the same as the
+first one (comment_article_feed_idx covers the filter and the order).
+
+The first page of the default size is stored pre-serialized in the cache
+and dropped whenever an approved comment of the article changes.
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment
+
+FEED_ORDERING = ('-is_pinned', '-created_at', '-id')
+
+
+def feed_cache_key(article_id):
+    return f'comments:feed:{article_id}'
+
+
+def feed_cache_timeout():
+    return settings.CACHE_TTL.get('COMMENT_FEED', 60 * 10)
+
+
+def invalidate_feed(article_ids):
+    """Makalelerin önbellekteki ilk sayfasını işlem tamamlanınca siler"""
+    keys = [feed_cache_key(article_id) for article_id in set(article_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def encode_cursor(comment):
+    position = [int(comment.is_pinned), comment.created_at.isoformat(), comment.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Cursor'daki sıralama anahtarı
+
+    Raises:
+        ValueError: Cursor geçersiz
+    """
+    try:
+        pinned, created_at, comment_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if created_at is None or not isinstance(comment_id, int):
+        raise ValueError('Invalid cursor')
+    return bool(pinned), created_at, comment_id
+
+
+def feed_queryset(article_id):
+    return Comment.objects.filter(
+        article_id=article_id,
+        parent=None,
+        status='approved'
+    ).select_related('user').order_by(*FEED_ORDERING)
+
+
+def feed_page(article_id, cursor=None, limit=10):
+    """
+    Makalenin bir sayfa üst yorumu
+
+    Returns:
+        tuple: (yorumlar, sonraki sayfanın cursor'ı veya None)
+    """
+    comments = feed_queryset(article_id)
+    if cursor:
+        pinned, created_at, comment_id = decode_cursor(cursor)
+        # (is_pinned, created_at, id) < cursor, hepsi azalan sırada
+        after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id)
+        if pinned:
+            comments = comments.filter(Q(is_pinned=False) | Q(is_pinned=True) & after)
+        else:
+            comments = comments.filter(after, is_pinned=False)
+
+    page = list(comments[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1])
+    return page, None
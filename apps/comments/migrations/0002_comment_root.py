@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_roots(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    parents = dict(Comment.objects.filter(parent__isnull=False).values_list('id', 'parent_id'))
+
+    def root_of(comment_id):
+        while comment_id in parents:
+            comment_id = parents[comment_id]
+        return comment_id
+
+    replies = [Comment(id=comment_id, root_id=root_of(comment_id)) for comment_id in parents]
+    Comment.objects.bulk_update(replies, ['root'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread', to='comments.comment'),
+        ),
+        migrations.RunPython(fill_roots, migrations.RunPython.noop),
+    ]
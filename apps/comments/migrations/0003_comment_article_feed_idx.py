@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_article_article_type'),
+        ('comments', '0002_comment_root'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'status', '-is_pinned', '-created_at', '-id'], name='comment_article_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_article_article_type'),
+        ('comments', '0003_comment_article_feed_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='auto_moderated',
+            field=models.BooleanField(default=False, verbose_name='Otomatik Moderasyon'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='moderation_signals',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Moderasyon Sinyalleri'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='spam_score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Spam Skoru'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', '-created_at'], name='comment_status_created_idx'),
+        ),
+    ]
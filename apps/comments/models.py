@@ -14,6 +14,8 @@ class Comment(models.Model):
     article = models.ForeignKey('articles.Article', on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Yanıtın bağlı olduğu en üst yorum (üst yorumlarda boş); tüm alt ağaç tek sorguyla okunur
+    root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='thread', editable=False)
     name = models.CharField(max_length=100, blank=True, verbose_name='İsim')
     email = models.EmailField(blank=True, verbose_name='Email')
     content = models.TextField(verbose_name='Yorum')
@@ -23,6 +25,10 @@ class Comment(models.Model):
     likes_count = models.PositiveIntegerField(default=0)
     dislikes_count = models.PositiveIntegerField(default=0)
     is_pinned = models.BooleanField(default=False)
+    # Otomatik moderasyon (moderation.py)
+    spam_score = models.FloatField(null=True, blank=True, editable=False, verbose_name='Spam Skoru')
+    moderation_signals = models.CharField(max_length=255, blank=True, editable=False, verbose_name='Moderasyon Sinyalleri')
+    auto_moderated = models.BooleanField(default=False, verbose_name='Otomatik Moderasyon')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -30,10 +36,55 @@ class Comment(models.Model):
         verbose_name = 'Yorum'
         verbose_name_plural = 'Yorumlar'
         ordering = ['-created_at']
+        indexes = [
+            # Makale yorum akışı (feed.py): filtre + sıralama
+            models.Index(fields=['article', 'status', '-is_pinned', '-created_at', '-id'], name='comment_article_feed_idx'),
+            # Moderasyon kuyruğu ve yönetim paneli listesi
+            models.Index(fields=['status', '-created_at'], name='comment_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user or self.name} - {self.article.title[:50]}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # save() yanıtın başka bir yoruma taşındığını anlayabilsin diye
+        instance._saved_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        moved = not adding and (update_fields is None or 'parent' in update_fields) and (
+            self.parent_id != getattr(self, '_saved_parent_id', self.parent_id)
+        )
+        old_root_id = self.root_id
+
+        if moved or (self.parent_id and not self.root_id):
+            self.root_id = (self.parent.root_id or self.parent_id) if self.parent_id else None
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'root'}
+        super().save(*args, **kwargs)
+        self._saved_parent_id = self.parent_id
+
+        if moved and self.root_id != old_root_id:
+            self._move_descendants(old_root_id or self.pk)
+
+    def _move_descendants(self, old_root_id):
+        """Taşınan yorumun alt yanıtlarını yeni üst yoruma bağlar (eski başlık tek sorguda okunur)"""
+        children = {}
+        for comment_id, parent_id in Comment.objects.filter(root_id=old_root_id).values_list('id', 'parent_id'):
+            children.setdefault(parent_id, []).append(comment_id)
+
+        descendants, stack = set(), [self.pk]
+        while stack:
+            replies = [reply for reply in children.get(stack.pop(), []) if reply not in descendants]
+            descendants.update(replies)
+            stack.extend(replies)
+        if descendants:
+            Comment.objects.filter(id__in=descendants).update(root_id=self.root_id or self.pk)
+
 class CommentLike(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='user_likes')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
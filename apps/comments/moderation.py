@@ -0,0 +1,329 @@
+"""
+Automatic comment moderation.
+
+Every new comment is scored by moderate() (moderate_comments task) from
+four signals, combined as log-odds:
+
+* Naive Bayes over word unigrams and bigrams, trained offline by
+  train_model() on comments that editors marked approved or spam. The
+  model is a plain dict of per-token log-likelihood ratios kept in the
+  cache, so inference is a dictionary lookup per token.
+* Link density: number of links and their share of the words.
+* Duplicate content: a MinHash signature of the word 3-gram shingles,
+  bucketed with LSH bands in Redis, finds recent near-identical comments
+  (on any article) in a few set lookups.
+* Velocity: comments per IP and per user in the last VELOCITY_WINDOW
+  seconds, counted in Redis buckets.
+
+Comments above the spam threshold are marked spam, comments below the
+approve threshold (with no links, duplicates or velocity hits) are
+approved, everything else stays pending for editors. Statuses are written
+with one UPDATE per outcome. Automatic decisions are flagged with
+auto_moderated and are not used for training.
+"""
+
+import hashlib
+import logging
+import math
+import random
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+MODERATION_KEY_PREFIX = 'news:comments'
+MODEL_CACHE_KEY = 'comments:spam_model'
+
+# Eğitimde kullanılan en fazla örnek ve model sözlüğündeki en fazla terim
+MAX_TRAINING_SAMPLES = 20000
+MAX_FEATURES = 50000
+MIN_SAMPLES_PER_CLASS = 20
+# Bir yorumdan en fazla bu kadar terim puanlanır
+MAX_TOKENS = 400
+
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+MINHASH_MIN_WORDS = 8
+DUPLICATE_SIMILARITY = 0.8
+DUPLICATE_TTL = 7 * 24 * 60 * 60
+
+# settings.COMMENT_MODERATION ile değiştirilebilir
+DEFAULT_SETTINGS = {
+    'SPAM_ABOVE': 0.98,
+    'APPROVE_BELOW': 0.05,
+    'VELOCITY_WINDOW': 10 * 60,
+    'VELOCITY_LIMIT': 5,
+}
+
+# Kural sinyallerinin log-odds katkıları
+LINK_WEIGHT = 0.75
+LINK_DENSITY_WEIGHT = 3.0
+LINK_DENSITY_LIMIT = 0.2
+DUPLICATE_WEIGHT = 2.0
+VELOCITY_WEIGHT = 1.5
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+URL_RE = re.compile(r'(?:https?://|www\.)([^\s/<>"\']+)', re.IGNORECASE)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def moderation_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'COMMENT_MODERATION', {})}
+
+
+# --- Özellikler ---
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def tokens(text):
+    """Naive Bayes terimleri: kelimeler, kelime ikilileri ve bağlantı alan adları"""
+    text_words = words(URL_RE.sub(' ', text))[:MAX_TOKENS]
+    result = text_words + [f'{a} {b}' for a, b in zip(text_words, text_words[1:])]
+    result.extend(f'url:{domain.lower()}' for domain in URL_RE.findall(text))
+    return result
+
+
+def link_stats(text):
+    """(bağlantı sayısı, bağlantıların kelimelere oranı)"""
+    links = len(URL_RE.findall(text))
+    return links, links / max(len(words(text)), 1)
+
+
+def minhash(text):
+    """Kelime 3'lülerinin MinHash imzası; kısa metinlerde None"""
+    text_words = words(text)
+    if len(text_words) < MINHASH_MIN_WORDS:
+        return None
+    shingles = {' '.join(text_words[i:i + 3]) for i in range(len(text_words) - 2)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+# --- Model ---
+
+def train_model(samples):
+    """
+    Çok terimli Naive Bayes modeli
+
+    Args:
+        samples: (metin, spam mı) çiftleri
+
+    Returns:
+        dict: prior (spam log-odds), weights {terim: log oran}, örnek sayıları; yeterli örnek yoksa None
+    """
+    counts = {True: Counter(), False: Counter()}
+    documents = Counter()
+    for text, is_spam in samples:
+        counts[is_spam].update(tokens(text))
+        documents[is_spam] += 1
+
+    if documents[True] < MIN_SAMPLES_PER_CLASS or documents[False] < MIN_SAMPLES_PER_CLASS:
+        return None
+
+    vocabulary = [token for token, _ in (counts[True] + counts[False]).most_common(MAX_FEATURES)]
+    spam_total = sum(counts[True][token] for token in vocabulary) + len(vocabulary)
+    ham_total = sum(counts[False][token] for token in vocabulary) + len(vocabulary)
+    weights = {
+        token: math.log((counts[True][token] + 1) / spam_total) - math.log((counts[False][token] + 1) / ham_total)
+        for token in vocabulary
+    }
+    return {
+        'prior': math.log(documents[True] / documents[False]),
+        'weights': weights,
+        'samples': {'spam': documents[True], 'approved': documents[False]},
+        'trained_at': timezone.now().isoformat(),
+    }
+
+
+def train_from_database():
+    """Editörlerin onayladığı/spam işaretlediği son yorumlarla modeli eğitip önbelleğe yazar"""
+    from .models import Comment
+
+    samples = Comment.objects.filter(
+        status__in=['approved', 'spam'],
+        auto_moderated=False
+    ).order_by('-id').values_list('content', 'status')[:MAX_TRAINING_SAMPLES]
+    model = train_model((content, status == 'spam') for content, status in samples.iterator())
+    if model is not None:
+        cache.set(MODEL_CACHE_KEY, model, None)
+    return model
+
+
+def load_model():
+    return cache.get(MODEL_CACHE_KEY)
+
+
+def bayes_log_odds(model, text):
+    if not model:
+        return 0.0
+    weights = model['weights']
+    return model['prior'] + sum(weights.get(token, 0.0) for token in tokens(text))
+
+
+# --- Redis sinyalleri ---
+
+def _band_keys(signature):
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [
+        f'{MODERATION_KEY_PREFIX}:lsh:{band}:' + hashlib.blake2b(
+            repr(signature[band * rows:(band + 1) * rows]).encode(), digest_size=8
+        ).hexdigest()
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def _signature_key(comment_id):
+    return f'{MODERATION_KEY_PREFIX}:minhash:{comment_id}'
+
+
+def count_duplicates(client, comment_id, signature):
+    """İmzayı kaydeder ve benzer son yorumların sayısını döndürür"""
+    band_keys = _band_keys(signature)
+    candidates = {int(member) for member in client.sunion(band_keys)} - {comment_id}
+
+    duplicates = 0
+    if candidates:
+        candidates = sorted(candidates)
+        stored = client.mget([_signature_key(candidate) for candidate in candidates])
+        for value in stored:
+            if not value:
+                continue
+            other = [int(part) for part in value.decode().split(',')]
+            if sum(x == y for x, y in zip(signature, other)) / MINHASH_PERMUTATIONS >= DUPLICATE_SIMILARITY:
+                duplicates += 1
+
+    pipe = client.pipeline(transaction=False)
+    pipe.set(_signature_key(comment_id), ','.join(map(str, signature)), ex=DUPLICATE_TTL)
+    for key in band_keys:
+        pipe.sadd(key, comment_id)
+        pipe.expire(key, DUPLICATE_TTL)
+    pipe.execute()
+    return duplicates
+
+
+def record_velocity(client, comment, window):
+    """Yorumun IP ve kullanıcı sayaçlarını artırır; pencere içindeki en yüksek sayı"""
+    bucket = int(comment.created_at.timestamp() // window)
+    keys = []
+    if comment.ip_address:
+        keys.append(f'{MODERATION_KEY_PREFIX}:velocity:ip:{comment.ip_address}:{bucket}')
+    if comment.user_id:
+        keys.append(f'{MODERATION_KEY_PREFIX}:velocity:user:{comment.user_id}:{bucket}')
+    if not keys:
+        return 0
+
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.incr(key)
+        pipe.expire(key, window * 2)
+    return max(pipe.execute()[::2])
+
+
+# --- Puanlama ---
+
+def score_comment(comment, model, client, options):
+    """
+    Returns:
+        tuple: (spam olasılığı, sinyaller sözlüğü)
+    """
+    text = comment.content or ''
+    signals = {'bayes': round(bayes_log_odds(model, text), 2)}
+    links, density = link_stats(text)
+    signals['links'] = links
+
+    log_odds = signals['bayes'] + LINK_WEIGHT * min(links, 5)
+    if links and density >= LINK_DENSITY_LIMIT:
+        log_odds += LINK_DENSITY_WEIGHT
+
+    if client is not None:
+        try:
+            signature = minhash(text)
+            signals['duplicates'] = count_duplicates(client, comment.id, signature) if signature else 0
+            signals['velocity'] = record_velocity(client, comment, options['VELOCITY_WINDOW'])
+        except Exception as e:
+            logger.warning(f"Comment moderation signals unavailable: {str(e)}")
+            client = None
+
+    log_odds += DUPLICATE_WEIGHT * min(signals.get('duplicates', 0), 3)
+    log_odds += VELOCITY_WEIGHT * min(max(signals.get('velocity', 0) - options['VELOCITY_LIMIT'], 0), 4)
+
+    probability = 1 / (1 + math.exp(-max(min(log_odds, 30), -30)))
+    return probability, signals
+
+
+def decide(probability, signals, options):
+    """'spam', 'approved' veya None (editöre kalır)"""
+    if probability >= options['SPAM_ABOVE']:
+        return 'spam'
+    clean = not signals.get('links') and not signals.get('duplicates') \
+        and signals.get('velocity', 0) <= options['VELOCITY_LIMIT']
+    if probability <= options['APPROVE_BELOW'] and clean:
+        return 'approved'
+    return None
+
+
+def moderate(comment_ids):
+    """
+    Bekleyen, henüz puanlanmamış yorumları puanlar ve kesin olanların durumunu günceller
+
+    Returns:
+        dict: scored, approved, spam
+    """
+    from .feed import invalidate_feed
+    from .models import Comment
+
+    comments = list(Comment.objects.filter(
+        id__in=comment_ids,
+        status='pending',
+        spam_score__isnull=True
+    ).only('id', 'article_id', 'user_id', 'content', 'ip_address', 'created_at').order_by('id'))
+    if not comments:
+        return {'scored': 0, 'approved': 0, 'spam': 0}
+
+    options = moderation_settings()
+    model = load_model()
+    try:
+        client = _redis()
+    except Exception as e:
+        logger.warning(f"Comment moderation signals unavailable: {str(e)}")
+        client = None
+
+    outcomes = {'approved': [], 'spam': []}
+    for comment in comments:
+        probability, signals = score_comment(comment, model, client, options)
+        comment.spam_score = round(probability, 4)
+        comment.moderation_signals = ' '.join(f'{key}={value}' for key, value in signals.items())
+        outcome = decide(probability, signals, options)
+        if outcome:
+            outcomes[outcome].append(comment)
+
+    Comment.objects.bulk_update(comments, ['spam_score', 'moderation_signals'], batch_size=500)
+    for outcome, decided in outcomes.items():
+        if decided:
+            Comment.objects.filter(
+                id__in=[comment.id for comment in decided],
+                status='pending'
+            ).update(status=outcome, auto_moderated=True)
+    invalidate_feed(comment.article_id for comment in outcomes['approved'])
+
+    return {'scored': len(comments), 'approved': len(outcomes['approved']), 'spam': len(outcomes['spam'])}
@@ -0,0 +1,92 @@
+"""
+Comment reactions (like / dislike).
+
+A user has at most one CommentLike row per comment (is_like True/False).
+set_reaction() locks that row, moves it to the requested state and applies
+the difference to Comment.likes_count / dislikes_count with a single F()
+update, so repeated or concurrent requests never count twice and the
+counter update does not overwrite other fields of the comment.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Comment, CommentLike
+
+LIKE = 'like'
+DISLIKE = 'dislike'
+
+
+def _state(reaction):
+    if reaction is None:
+        return None
+    return LIKE if reaction.is_like else DISLIKE
+
+
+def _locked_reaction(comment_id, user_id):
+    return CommentLike.objects.select_for_update().filter(comment_id=comment_id, user_id=user_id).first()
+
+
+def set_reaction(comment_id, user_id, state):
+    """
+    Kullanıcının yoruma tepkisini ayarlar
+
+    Args:
+        state: LIKE, DISLIKE veya None (tepkiyi kaldır)
+
+    Returns:
+        tuple: (önceki durum, güncel likes_count, güncel dislikes_count)
+    """
+    with transaction.atomic():
+        reaction = _locked_reaction(comment_id, user_id)
+        if reaction is None and state is not None:
+            try:
+                with transaction.atomic():
+                    reaction = CommentLike.objects.create(comment_id=comment_id, user_id=user_id, is_like=state == LIKE)
+                previous = None
+            except IntegrityError:
+                # Aynı kullanıcının eşzamanlı isteği satırı önce oluşturdu
+                reaction = _locked_reaction(comment_id, user_id)
+                previous = _state(reaction)
+                reaction.is_like = state == LIKE
+                reaction.save(update_fields=['is_like'])
+        else:
+            previous = _state(reaction)
+            if state is None and reaction is not None:
+                reaction.delete()
+            elif state is not None and previous != state:
+                reaction.is_like = state == LIKE
+                reaction.save(update_fields=['is_like'])
+
+        likes_delta = (state == LIKE) - (previous == LIKE)
+        dislikes_delta = (state == DISLIKE) - (previous == DISLIKE)
+        comment = Comment.objects.filter(pk=comment_id)
+        if likes_delta or dislikes_delta:
+            comment.update(
+                likes_count=Greatest(F('likes_count') + likes_delta, 0),
+                dislikes_count=Greatest(F('dislikes_count') + dislikes_delta, 0)
+            )
+        likes_count, dislikes_count = comment.values_list('likes_count', 'dislikes_count').get()
+
+    return previous, likes_count, dislikes_count
+
+
+def toggle_reaction(comment_id, user_id, state):
+    """
+    Aynı tepki tekrar gönderilirse kaldırır, aksi halde ayarlar
+
+    Returns:
+        tuple: (güncel durum, likes_count, dislikes_count)
+    """
+    with transaction.atomic():
+        current = _state(_locked_reaction(comment_id, user_id))
+        new_state = None if current == state else state
+        _, likes_count, dislikes_count = set_reaction(comment_id, user_id, new_state)
+    return new_state, likes_count, dislikes_count
+
+
+def user_reactions(user_id, comment_ids):
+    """Kullanıcının verilen yorumlara tepkileri {comment_id: LIKE | DISLIKE}, tek sorgu"""
+    rows = CommentLike.objects.filter(user_id=user_id, comment_id__in=comment_ids).values_list('comment_id', 'is_like')
+    return {comment_id: LIKE if is_like else DISLIKE for comment_id, is_like in rows}
@@ -1,5 +1,14 @@
 from rest_framework import serializers
 from .models import Comment, CommentLike
+from .tree import attach_replies
+
+
+class CommentListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        attach_replies(comments)
+        return super().to_representation(comments)
+
 
 class CommentSerializer(serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
@@ -7,13 +16,18 @@ class CommentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Comment
-        fields = '__all__'
-        read_only_fields = ('user', 'likes_count', 'dislikes_count', 'ip_address', 'user_agent', 'created_at', 'updated_at')
+        # Moderasyon sinyalleri istemciye gösterilmez
+        exclude = ('spam_score', 'moderation_signals', 'auto_moderated')
+        list_serializer_class = CommentListSerializer
+        read_only_fields = ('user', 'root', 'status', 'is_pinned', 'likes_count', 'dislikes_count', 'ip_address', 'user_agent', 'created_at', 'updated_at')
     
     def get_user_name(self, obj):
         return obj.user.get_full_name() if obj.user else obj.name
     
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.filter(status='approved'), many=True).data
-        return []
+        # Yanıtlar attach_replies() ile önceden yüklenir; tek yorumda tek sorgu yapılır
+        if not hasattr(obj, 'tree_replies'):
+            attach_replies([obj])
+        if not obj.tree_replies:
+            return []
+        return CommentSerializer(obj.tree_replies, many=True, context=self.context).data
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .feed import invalidate_feed
+from .models import Comment
+
+# Beğeni sayaçları önbellekteki ilk sayfayı geçersiz kılmaz (süre dolunca yenilenir)
+COUNTER_FIELDS = {'likes_count', 'dislikes_count'}
+
+
+@receiver(post_save, sender=Comment)
+def comment_post_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    # Onay bekleyen yeni yorum akışta görünmez
+    if created and instance.status != 'approved':
+        return
+    invalidate_feed([instance.article_id])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_post_delete(sender, instance, **kwargs):
+    invalidate_feed([instance.article_id])
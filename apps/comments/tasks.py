@@ -0,0 +1,89 @@
+"""
+Celery tasks for comments application.
+"""
+
+from celery import shared_task
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODERATION_BATCH_SIZE = 500
+# Tarama başına en fazla parti; kalanlar bir sonraki taramaya kalır
+MODERATION_MAX_BATCHES = 20
+
+
+@shared_task(bind=True, max_retries=3)
+def moderate_comments(self, comment_ids):
+    """
+    Score new comments for spam and auto-approve / auto-spam the clear cases.
+    Queued by the comment create endpoint after commit.
+    """
+    try:
+        from .moderation import moderate
+
+        return moderate(comment_ids)
+
+    except Exception as exc:
+        logger.error(f"Error moderating comments {comment_ids}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=30)
+
+
+@shared_task(bind=True, max_retries=3)
+def moderate_pending_comments(self):
+    """
+    Score pending comments that were never scored (queue outages, comments
+    created outside the API, the existing backlog) in batches.
+    Runs every 5 minutes.
+    """
+    try:
+        from .models import Comment
+        from .moderation import moderate
+
+        # Yeni yorumlar önce kendi görevleriyle puanlanır
+        cutoff = timezone.now() - timedelta(minutes=2)
+        totals = {'scored': 0, 'approved': 0, 'spam': 0}
+        after = 0
+        for _ in range(MODERATION_MAX_BATCHES):
+            ids = list(Comment.objects.filter(
+                status='pending',
+                spam_score__isnull=True,
+                created_at__lt=cutoff,
+                id__gt=after
+            ).order_by('id').values_list('id', flat=True)[:MODERATION_BATCH_SIZE])
+            if not ids:
+                break
+            for key, value in moderate(ids).items():
+                totals[key] += value
+            after = ids[-1]
+
+        if totals['scored']:
+            logger.info(f"Moderated pending comments: {totals}")
+        return totals
+
+    except Exception as exc:
+        logger.error(f"Error moderating pending comments: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def train_spam_model(self):
+    """
+    Retrain the comment spam model from comments editors approved or marked
+    as spam. Runs nightly; the model is kept in the cache.
+    """
+    try:
+        from .moderation import train_from_database
+
+        model = train_from_database()
+        if model is None:
+            logger.info("Not enough labelled comments to train the spam model")
+            return "Not enough labelled comments"
+
+        logger.info(f"Trained comment spam model: {model['samples']}, {len(model['weights'])} features")
+        return f"Trained spam model: {model['samples']}"
+
+    except Exception as exc:
+        logger.error(f"Error training comment spam model: {str(exc)}")
+        raise self.retry(exc=exc, countdown=300)
@@ -0,0 +1,46 @@
+"""
+Comment thread loader.
+
+Every reply stores the id of its top-level comment (Comment.root), so all
+approved comments of any number of threads are fetched with one query.
+attach_replies() groups them by parent id and hands each comment its
+approved children as `tree_replies`, which CommentSerializer renders
+without touching the database again. Replies under a comment that is not
+approved are not reachable from the root and are left out, as before.
+"""
+
+from .models import Comment
+
+
+def load_threads(root_ids):
+    """Verilen üst yorumların onaylı yanıtları, üst yorum id'sine göre gruplu {parent_id: [Comment]}"""
+    children = {}
+    if not root_ids:
+        return children
+
+    replies = Comment.objects.filter(
+        root_id__in=root_ids,
+        status='approved'
+    ).select_related('user').order_by('-created_at', '-id')
+    for reply in replies:
+        children.setdefault(reply.parent_id, []).append(reply)
+    return children
+
+
+def attach_replies(comments):
+    """
+    Yorumlara (ve tüm alt yanıtlarına) onaylı yanıtlarını `tree_replies` olarak ekler
+
+    Yorumlar farklı makalelere/başlıklara ait olabilir; yanıtlar tek sorguda okunur.
+    """
+    comments = [comment for comment in comments if not hasattr(comment, 'tree_replies')]
+    if not comments:
+        return comments
+
+    children = load_threads({comment.root_id or comment.id for comment in comments})
+    for replies in children.values():
+        for reply in replies:
+            reply.tree_replies = children.get(reply.id, [])
+    for comment in comments:
+        comment.tree_replies = children.get(comment.id, [])
+    return comments
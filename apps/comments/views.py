@@ -1,36 +1,102 @@
-from rest_framework import viewsets
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from utils.permissions import CanModerateComments
 from utils.pagination import CommentPagination
 from utils.helpers import get_client_ip
-from utils.throttling import CommentRateThrottle
-from .models import Comment, CommentLike
+from utils.throttling import CommentRateThrottle, ReadRateThrottle, WriteRateThrottle
+from .feed import feed_cache_key, feed_cache_timeout, feed_page
+from .models import Comment
+from .reactions import DISLIKE, LIKE, toggle_reaction, user_reactions
 from .serializers import CommentSerializer
+from .tasks import moderate_comments
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.filter(parent=None, status='approved')
+    queryset = Comment.objects.filter(parent=None, status='approved').select_related('user')
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = CommentPagination
-    throttle_classes = [CommentRateThrottle]  # Rate limiting for comments
+    throttle_classes = [CommentRateThrottle, ReadRateThrottle]  # Rate limiting for comments
     
     def perform_create(self, serializer):
-        serializer.save(
+        comment = serializer.save(
             user=self.request.user if self.request.user.is_authenticated else None,
             ip_address=get_client_ip(self.request),
             user_agent=self.request.META.get('HTTP_USER_AGENT', '')[:255]
         )
+        if comment.status == 'pending':
+            transaction.on_commit(lambda: moderate_comments.delay([comment.id]))
     
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticatedOrReadOnly])
+    @action(detail=False, methods=['get'], url_path=r'article/(?P<article_id>[0-9]+)', throttle_classes=[ReadRateThrottle])
+    def article_feed(self, request, article_id=None):
+        """
+        Makalenin onaylı yorumları (sabitlenenler önce, en yeni önce)
+
+        Sayfalama cursor ile yapılır: yanıttaki 'next' değeri ?cursor= olarak gönderilir.
+        Varsayılan boyuttaki ilk sayfa önbellekten döner.
+        """
+        cursor = request.query_params.get('cursor')
+        paginator = CommentPagination()
+        try:
+            limit = min(int(request.query_params.get('page_size', paginator.page_size)), paginator.max_page_size)
+        except ValueError:
+            limit = paginator.page_size
+        limit = max(limit, 1)
+
+        cacheable = not cursor and limit == paginator.page_size
+        if cacheable:
+            cached_data = cache.get(feed_cache_key(article_id))
+            if cached_data is not None:
+                return Response(cached_data)
+
+        try:
+            comments, next_cursor = feed_page(article_id, cursor, limit)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {
+            'next': next_cursor,
+            'results': self.get_serializer(comments, many=True).data,
+        }
+        if cacheable:
+            cache.set(feed_cache_key(article_id), data, feed_cache_timeout())
+        return Response(data)
+
+    def _react(self, request, pk, state):
+        comment = get_object_or_404(Comment.objects.only('id'), pk=pk, status='approved')
+        reaction, likes_count, dislikes_count = toggle_reaction(comment.id, request.user.id, state)
+        return Response({
+            'status': {LIKE: 'liked', DISLIKE: 'disliked'}.get(reaction, 'removed'),
+            'reaction': reaction,
+            'likes_count': likes_count,
+            'dislikes_count': dislikes_count,
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[WriteRateThrottle])
     def like(self, request, pk=None):
-        comment = self.get_object()
-        CommentLike.objects.update_or_create(
-            comment=comment,
-            user=request.user,
-            defaults={'is_like': True}
-        )
-        comment.likes_count += 1
-        comment.save()
-        return Response({'status': 'liked'})
+        """Yorumu beğenir; zaten beğenilmişse beğeniyi kaldırır"""
+        return self._react(request, pk, LIKE)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[WriteRateThrottle])
+    def dislike(self, request, pk=None):
+        """Yorumu beğenmez; zaten beğenilmemişse tepkiyi kaldırır"""
+        return self._react(request, pk, DISLIKE)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated], throttle_classes=[ReadRateThrottle])
+    def reactions(self, request):
+        """
+        Kullanıcının verilen yorumlara tepkileri (?ids=1,2,3)
+
+        Önbellekteki yorum sayfaları kullanıcıdan bağımsızdır; tepkiler bu uç noktadan tek sorguda alınır.
+        """
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'ids must be a comma separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > 200:
+            return Response({'error': 'At most 200 ids are allowed'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(user_reactions(request.user.id, ids))
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from utils import throttling
+
+
+class Command(BaseCommand):
+    help = 'DRF önbellek throttle\'ı ile Redis GCRA throttle\'ını karşılaştırır (istek başına gecikme; önbellek django_redis olmalı)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Her throttle için istek sayısı')
+        parser.add_argument('--clients', type=int, default=50, help='Farklı istemci (IP) sayısı')
+        parser.add_argument('--rate', default='1000/min', help="Sınır (ör. '1000/min'); reddedilen istekler de ölçülür")
+
+    def handle(self, *args, **options):
+        rate = options['rate']
+
+        class CacheThrottle(SimpleRateThrottle):
+            scope = 'benchmark-cache'
+
+            def get_rate(self):
+                return rate
+
+            def get_cache_key(self, request, view):
+                return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+        class RedisThrottle(throttling.RedisRateThrottle):
+            scope = 'benchmark-redis'
+
+            def get_rate(self):
+                return rate
+
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = Request(factory.get('/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        try:
+            throttling._redis().ping()
+        except Exception as e:
+            raise CommandError(f'Redis is required for the comparison: {e}')
+
+        for name, throttle_class in (('drf-cache', CacheThrottle), ('redis-gcra', RedisThrottle)):
+            keys = {throttle_class().get_cache_key(request, None) for request in requests}
+            cache.delete_many(list(keys))
+            throttling._redis().delete(*keys)
+
+            timings = []
+            allowed = 0
+            for i in range(options['requests']):
+                request = requests[i % len(requests)]
+                started = time.perf_counter()
+                allowed += throttle_class().allow_request(request, None)
+                timings.append(time.perf_counter() - started)
+
+            cache.delete_many(list(keys))
+            throttling._redis().delete(*keys)
+
+            timings.sort()
+            total = sum(timings)
+            self.stdout.write(
+                f"{name}: {options['requests'] / total:.0f} req/s, "
+                f"p50 {statistics.median(timings) * 1000:.3f} ms, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.3f} ms, "
+                f"{allowed} allowed"
+            )
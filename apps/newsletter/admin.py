@@ -1,12 +1,26 @@
 from django.contrib import admin
-from .models import Newsletter, NewsletterSubscription
+from .models import Newsletter, NewsletterSubscription, NewsletterIssue, NewsletterIssueChunk
 
 @admin.register(Newsletter)
 class NewsletterAdmin(admin.ModelAdmin):
-    list_display = ('name', 'frequency', 'is_active', 'created_at')
+    list_display = ('name', 'frequency', 'send_time', 'is_active', 'created_at')
     list_filter = ('frequency', 'is_active')
 
 @admin.register(NewsletterSubscription)
 class NewsletterSubscriptionAdmin(admin.ModelAdmin):
     list_display = ('email', 'newsletter', 'is_verified', 'is_active', 'subscribed_at')
     list_filter = ('is_verified', 'is_active', 'newsletter')
+
+class NewsletterIssueChunkInline(admin.TabularInline):
+    model = NewsletterIssueChunk
+    extra = 0
+    can_delete = False
+    fields = ('first_id', 'last_id', 'status', 'sent_count', 'failed_count', 'updated_at')
+    readonly_fields = fields
+
+@admin.register(NewsletterIssue)
+class NewsletterIssueAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'newsletter', 'issue_date', 'status', 'recipient_count', 'sent_count', 'failed_count', 'completed_at')
+    list_filter = ('status', 'newsletter')
+    readonly_fields = ('cursor', 'recipient_count', 'sent_count', 'failed_count', 'created_at', 'updated_at', 'completed_at')
+    inlines = [NewsletterIssueChunkInline]
@@ -0,0 +1,292 @@
+"""
+Newsletter delivery benchmark.
+
+SMTPSink is a minimal asyncio SMTP server bound to the loopback interface,
+running in a background thread. It accepts everything by default and can
+inject failures: temporary errors (421 on MAIL, the relay closes the
+session), dropped connections and rejected recipients (550 on RCPT).
+
+run_benchmark() seeds a throw-away newsletter with N verified
+subscriptions, creates an issue, points the SMTP email backend at the sink
+and runs the real fan-out path: plan_issue() for the coordinator and
+send_chunk() for every chunk, with the same retry policy as the
+send_newsletter_chunk task. Worker threads keep their SMTP connection
+across chunks, so smtp_connections shows the reuse a worker gets. No
+network access is needed; the benchmark_newsletter command runs it inside
+utils.benchmark.benchmark_environment(), against a throw-away test database.
+"""
+
+import asyncio
+import resource
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection as db_connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+
+BENCHMARK_HTML = (
+    '<html><body><h1>Benchmark</h1><p>Merhaba %%name%% (%%email%%)</p>'
+    + '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>' * 40
+    + '</body></html>'
+)
+
+
+class SMTPSink:
+    """Arka planda çalışan yerel SMTP sunucusu (yalnızca sayar, mesajları saklamaz)"""
+
+    def __init__(self, fail_every=0, drop_every=0, reject_every=0):
+        self.fail_every = fail_every
+        self.drop_every = drop_every
+        self.reject_every = reject_every
+
+        self.connections = 0
+        self.messages = 0
+        self.bytes = 0
+        self.deliveries = Counter()
+        self.failures = Counter()
+        self._mail_commands = 0
+        self._rcpt_commands = 0
+
+        self.port = None
+        self._sessions = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        async def shutdown():
+            # İşçilerin açık bıraktığı oturumlar da kapatılır
+            self._server.close()
+            for session in self._sessions:
+                session.cancel()
+            await asyncio.gather(*self._sessions, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @staticmethod
+    def _every(n, count):
+        return n and count % n == 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        session = asyncio.current_task()
+        self._sessions.add(session)
+        recipients = []
+        writer.write(b'220 localhost benchmark sink\r\n')
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode('ascii', 'replace').strip()
+                verb = command[:4].upper()
+
+                if verb in ('EHLO', 'HELO'):
+                    writer.write(b'250-localhost\r\n250 8BITMIME\r\n')
+                elif verb == 'MAIL':
+                    self._mail_commands += 1
+                    if self._every(self.drop_every, self._mail_commands):
+                        self.failures['dropped'] += 1
+                        return
+                    if self._every(self.fail_every, self._mail_commands):
+                        self.failures['temporary'] += 1
+                        writer.write(b'421 Service not available, try again later\r\n')
+                        await writer.drain()
+                        return
+                    recipients = []
+                    writer.write(b'250 OK\r\n')
+                elif verb == 'RCPT':
+                    self._rcpt_commands += 1
+                    if self._every(self.reject_every, self._rcpt_commands):
+                        self.failures['rejected'] += 1
+                        writer.write(b'550 Mailbox unavailable\r\n')
+                    else:
+                        recipients.append(command.split(':', 1)[-1].strip().strip('<>'))
+                        writer.write(b'250 OK\r\n')
+                elif verb == 'DATA':
+                    writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                    await writer.drain()
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b'.\r\n':
+                            break
+                        self.bytes += len(data)
+                    self.messages += 1
+                    self.deliveries.update(recipients)
+                    recipients = []
+                    writer.write(b'250 OK queued\r\n')
+                elif verb in ('RSET', 'NOOP'):
+                    recipients = []
+                    writer.write(b'250 OK\r\n')
+                elif verb == 'QUIT':
+                    writer.write(b'221 Bye\r\n')
+                    await writer.drain()
+                    return
+                else:
+                    writer.write(b'502 Command not implemented\r\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+
+
+def peak_rss_mb():
+    """Sürecin şimdiye kadarki en yüksek bellek kullanımı (Linux'ta ru_maxrss KB cinsinden)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed_newsletter(recipients):
+    """Verilen sayıda doğrulanmış aboneye sahip geçici bülten ve sayısı"""
+    from .builder import compress_content, html_to_text
+    from .models import Newsletter, NewsletterIssue, NewsletterSubscription
+
+    newsletter = Newsletter.objects.create(
+        name=f'benchmark-{uuid.uuid4().hex[:8]}',
+        frequency='daily',
+        is_active=False
+    )
+    for start in range(0, recipients, 5000):
+        NewsletterSubscription.objects.bulk_create([
+            NewsletterSubscription(
+                email=f'user{i}@benchmark.invalid',
+                newsletter=newsletter,
+                is_verified=True
+            )
+            for i in range(start, min(start + 5000, recipients))
+        ])
+
+    issue = NewsletterIssue.objects.create(
+        newsletter=newsletter,
+        issue_date=timezone.now().date(),
+        subject='Benchmark %%email%%',
+        content=compress_content(BENCHMARK_HTML, html_to_text(BENCHMARK_HTML)),
+    )
+    return newsletter, issue
+
+
+def _send_with_retries(chunk_id, max_retries, attempts):
+    """send_newsletter_chunk görevinin tekrar deneme davranışı (beklemeden)"""
+    from .delivery import chunk_ledger, made_progress, reset_connection, send_chunk
+    from .models import NewsletterIssueChunk
+
+    # SMTP bağlantısı işçide olduğu gibi parçalar arasında paylaşılır, yalnızca hatada yenilenir
+    retries = 0
+    try:
+        while True:
+            attempts[chunk_id] += 1
+            chunk = NewsletterIssueChunk.objects.select_related('issue').defer('issue__content').get(pk=chunk_id)
+            delivered = chunk_ledger(chunk).count()
+            try:
+                return send_chunk(chunk)
+            except Exception:
+                reset_connection()
+                if made_progress(chunk, delivered):
+                    retries = 0
+                elif retries == max_retries:
+                    raise
+                else:
+                    retries += 1
+    finally:
+        db_connection.close()
+
+
+def run_benchmark(recipients, concurrency=1, fail_every=0, drop_every=0, reject_every=0):
+    """
+    Sink'e karşı gönderim hattını çalıştırır
+
+    Returns:
+        dict: Süre, mesaj/sn, en yüksek RSS, açılan SMTP bağlantısı,
+              enjekte edilen hatalar, tekrar denemeler ve mükerrer gönderimler
+    """
+    from .delivery import plan_issue
+    from .models import NewsletterDelivery, NewsletterIssue
+    from .tasks import send_newsletter_chunk
+
+    rss_before = peak_rss_mb()
+    newsletter, issue = seed_newsletter(recipients)
+    chunk_ids = []
+    attempts = Counter()
+    errors = []
+
+    sink = SMTPSink(fail_every=fail_every, drop_every=drop_every, reject_every=reject_every)
+    try:
+        with sink, override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=sink.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        ):
+            started = time.perf_counter()
+            plan_issue(issue, lambda chunk_id, countdown: chunk_ids.append(chunk_id))
+            planned = time.perf_counter()
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [
+                    executor.submit(_send_with_retries, chunk_id, send_newsletter_chunk.max_retries, attempts)
+                    for chunk_id in chunk_ids
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(str(e))
+            finished = time.perf_counter()
+
+        issue = NewsletterIssue.objects.get(pk=issue.pk)
+        # Sayının sent_count/failed_count alanları yalnızca tüm parçalar bitince yazılır
+        ledger = dict(
+            NewsletterDelivery.objects.filter(issue=issue).values_list('status').annotate(total=Count('id')).order_by()
+        )
+        elapsed = finished - started
+        return {
+            'recipients': recipients,
+            'chunks': len(chunk_ids),
+            'concurrency': concurrency,
+            'plan_seconds': round(planned - started, 3),
+            'send_seconds': round(finished - planned, 3),
+            'messages': sink.messages,
+            'messages_per_second': round(sink.messages / elapsed, 1) if elapsed else 0,
+            'megabytes_sent': round(sink.bytes / 1024 / 1024, 1),
+            'smtp_connections': sink.connections,
+            'injected_failures': dict(sink.failures),
+            'chunk_retries': sum(attempts.values()) - len(attempts),
+            'failed_chunks': len(errors),
+            'duplicate_deliveries': sum(count - 1 for count in sink.deliveries.values() if count > 1),
+            'issue_status': issue.status,
+            'ledger_sent': ledger.get('sent', 0),
+            'ledger_failed': ledger.get('failed', 0),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'peak_rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+        }
+    finally:
+        newsletter.delete()
@@ -0,0 +1,152 @@
+"""
+Newsletter issue builder.
+
+An issue is rendered exactly once: the articles are resolved in a fixed
+number of queries (select_related / prefetch_related), the HTML template is
+rendered and a plaintext alternative is derived from it. Both are stored
+zlib-compressed on the NewsletterIssue row and in the cache under the
+newsletter + date key, so delivery workers only fetch the bytes by
+reference.
+
+Recipient-specific parts are rendered as %%placeholder%% markers
+(the template sees them as {{ recipient.email }} etc.) and filled in per
+message with a single regex substitution instead of a template render.
+"""
+
+import html
+import json
+import re
+import zlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_tags
+
+ISSUE_CACHE_TIMEOUT = 2 * 24 * 60 * 60
+# Süreç içinde tutulan en fazla açılmış sayı içeriği
+MAX_LOADED_ISSUES = 16
+
+PLACEHOLDER_RE = re.compile(r'%%(\w+)%%')
+# Şablonda {{ recipient.<alan> }} olarak kullanılır
+RECIPIENT_PLACEHOLDERS = {
+    'email': '%%email%%',
+    'name': '%%name%%',
+}
+
+_loaded = {}
+
+
+def issue_articles(newsletter, since, limit):
+    """Sayıya girecek makaleler (şablondaki yazar/kategori/etiket erişimleri ek sorgu yapmaz)"""
+    from apps.articles.models import Article
+
+    articles = Article.objects.filter(
+        status='published',
+        published_at__gte=since
+    ).select_related(
+        'author__user', 'category', 'featured_image'
+    ).prefetch_related('tags')
+    if newsletter.category_id:
+        articles = articles.filter(category_id=newsletter.category_id)
+    return list(articles.order_by('-published_at')[:limit])
+
+
+def html_to_text(content):
+    """HTML içerikten düz metin alternatifi"""
+    content = re.sub(r'(?is)<(script|style).*?</\1>', '', content)
+    content = re.sub(r'(?i)<br\s*/?>|</(p|div|h[1-6]|li|tr)>', '\n', content)
+    text = html.unescape(strip_tags(content))
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def compress_content(html_content, text_content):
+    return zlib.compress(json.dumps({'html': html_content, 'text': text_content}).encode(), 6)
+
+
+def decompress_content(blob):
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def cache_key(newsletter_id, issue_date):
+    return f'newsletter:issue:{newsletter_id}:{issue_date.isoformat()}'
+
+
+def build_issue(newsletter, issue_date, articles, template, subject):
+    """
+    Sayıyı oluşturur (aynı bülten + tarih için zaten varsa dokunmaz)
+
+    Args:
+        articles: issue_articles() çıktısı
+        template: HTML şablonu
+        subject: Konu satırı (yer tutucu içerebilir)
+
+    Returns:
+        tuple: (NewsletterIssue, created)
+    """
+    from .models import NewsletterIssue
+
+    context = {
+        'newsletter': newsletter,
+        'articles': articles,
+        'date': issue_date,
+        'recipient': RECIPIENT_PLACEHOLDERS,
+    }
+    html_content = render_to_string(template, context)
+    content = compress_content(html_content, html_to_text(html_content))
+
+    issue, created = NewsletterIssue.objects.get_or_create(
+        newsletter=newsletter,
+        issue_date=issue_date,
+        defaults={'subject': subject, 'content': content}
+    )
+    if created:
+        cache.set(cache_key(newsletter.id, issue_date), content, ISSUE_CACHE_TIMEOUT)
+    return issue, created
+
+
+def skip_issue(newsletter, issue_date, reason):
+    """
+    Gönderilmeyecek gün için 'skipped' sayı kaydı (zamanlayıcı bülteni o gün tekrar seçmez)
+
+    Returns:
+        tuple: (NewsletterIssue, created)
+    """
+    from .models import NewsletterIssue
+
+    return NewsletterIssue.objects.get_or_create(
+        newsletter=newsletter,
+        issue_date=issue_date,
+        defaults={'subject': reason[:255], 'content': b'', 'status': 'skipped'}
+    )
+
+
+def issue_content(issue):
+    """
+    Sayının açılmış içeriği {'html': ..., 'text': ...}
+
+    Sırasıyla süreç içi sözlük, önbellek ve veritabanına bakar; issue
+    nesnesinin content alanı yüklenmemiş (defer) olabilir.
+    """
+    from .models import NewsletterIssue
+
+    if issue.pk in _loaded:
+        return _loaded[issue.pk]
+
+    key = cache_key(issue.newsletter_id, issue.issue_date)
+    blob = cache.get(key)
+    if blob is None:
+        blob = NewsletterIssue.objects.filter(pk=issue.pk).values_list('content', flat=True).get()
+        cache.set(key, bytes(blob), ISSUE_CACHE_TIMEOUT)
+
+    if len(_loaded) >= MAX_LOADED_ISSUES:
+        _loaded.clear()
+    _loaded[issue.pk] = decompress_content(blob)
+    return _loaded[issue.pk]
+
+
+def personalize(content, values, is_html=False):
+    """Yer tutucuları alıcı değerleriyle doldurur; bilinmeyen yer tutucular olduğu gibi kalır"""
+    if is_html:
+        values = {key: escape(value) for key, value in values.items()}
+    return PLACEHOLDER_RE.sub(lambda match: str(values.get(match.group(1), match.group(0))), content)
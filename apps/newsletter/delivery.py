@@ -0,0 +1,323 @@
+"""
+Newsletter fan-out.
+
+An issue (NewsletterIssue) is rendered once (builder.py) and then
+delivered in chunks:
+
+* plan_issue() streams the issue's subscription ids in primary-key order
+  (keyset pagination, no OFFSET) and records a NewsletterIssueChunk of up
+  to NEWSLETTER_CHUNK_SIZE recipients for each page, handing it to the
+  send_newsletter_chunk task. The last enqueued id is saved on the issue,
+  so a crashed coordinator continues where it stopped.
+* send_chunk() sends one chunk over a per-worker SMTP connection that is
+  kept open between chunks, personalizing the shared rendered content by
+  placeholder substitution, and writes a NewsletterDelivery row for every
+  recipient. Recipients that already have a ledger row are skipped, so a
+  retried or re-enqueued chunk never mails anyone twice. Permanent (5xx)
+  rejections of a single message are recorded as failed; connection
+  problems and temporary (4xx) errors abort the chunk for a retry. The
+  chunk's updated_at is refreshed with every ledger batch, so a long
+  chunk is never mistaken for an abandoned one.
+* complete_issue() marks the issue sent once no chunk is pending.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from smtplib import (
+    SMTPConnectError, SMTPRecipientsRefused, SMTPResponseException, SMTPSenderRefused,
+    SMTPServerDisconnected,
+)
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import BadHeaderError, EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .builder import issue_content, personalize
+
+logger = logging.getLogger(__name__)
+
+NEWSLETTER_CHUNK_SIZE = 1000
+# Defter satırları bu kadar gönderimde bir yazılır; çökmede en fazla bu kadar tekrar olur
+LEDGER_BATCH_SIZE = 100
+# Bu süredir ilerlemeyen sayı/parça yeniden kuyruğa alınır. Görev kilitlerinin
+# süresinden (tasks.NEWSLETTER_LOCK_TIMEOUT) çok daha uzun olmalı: çalışan bir
+# parça her defter partisinde updated_at'i tazeler, çökmüş bir görevin kilidi
+# ise yeniden kuyruğa alınmadan önce çoktan düşmüş olur.
+STALE_AFTER = timedelta(hours=2)
+
+_local = threading.local()
+
+
+def recipients(newsletter_id):
+    """Bültenin gönderim yapılacak abonelikleri"""
+    from .models import NewsletterSubscription
+
+    return NewsletterSubscription.objects.filter(
+        newsletter_id=newsletter_id,
+        is_active=True,
+        is_verified=True
+    )
+
+
+# --- SMTP ---
+
+def get_connection():
+    """
+    İş parçacığı (gevent'te greenlet) başına açık tutulan e-posta bağlantısı
+
+    Parçalar arasında aynı SMTP oturumu kullanılır; her mesajda yeniden
+    bağlanıp TLS el sıkışması yapılmaz.
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = mail.get_connection(fail_silently=False)
+        _local.connection = connection
+    connection.open()
+    return connection
+
+
+def reset_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def send_message(message):
+    """Mesajı ortak bağlantıdan gönderir; sunucu boştaki bağlantıyı kapattıysa bir kez yeniden bağlanır"""
+    try:
+        return get_connection().send_messages([message])
+    except SMTPServerDisconnected:
+        reset_connection()
+        return get_connection().send_messages([message])
+
+
+# --- Fan-out ---
+
+def plan_issue(issue, enqueue, spacing=0):
+    """
+    Aboneleri id sırasıyla tarayıp parçalara böler
+
+    Args:
+        issue: NewsletterIssue
+        enqueue: (parça id'si, gecikme saniyesi) ile çağrılır
+        spacing: Ardışık parçalar arasındaki süre (gönderim penceresine yayma)
+
+    Returns:
+        int: Bu çalıştırmada oluşturulan parça sayısı
+    """
+    from .models import NewsletterIssue, NewsletterIssueChunk
+
+    NewsletterIssue.objects.filter(pk=issue.pk, status='pending').update(status='enqueuing', updated_at=timezone.now())
+
+    after = issue.cursor
+    planned = 0
+    while True:
+        ids = list(
+            recipients(issue.newsletter_id).filter(id__gt=after).order_by('id').values_list('id', flat=True)[:NEWSLETTER_CHUNK_SIZE]
+        )
+        if not ids:
+            break
+
+        countdown = planned * spacing
+        with transaction.atomic():
+            chunk = NewsletterIssueChunk.objects.create(
+                issue=issue,
+                first_id=ids[0],
+                last_id=ids[-1],
+                not_before=timezone.now() + timedelta(seconds=countdown)
+            )
+            NewsletterIssue.objects.filter(pk=issue.pk).update(
+                cursor=ids[-1],
+                recipient_count=F('recipient_count') + len(ids),
+                updated_at=timezone.now()
+            )
+        enqueue(chunk.id, countdown)
+        planned += 1
+        after = ids[-1]
+
+        if len(ids) < NEWSLETTER_CHUNK_SIZE:
+            break
+
+    NewsletterIssue.objects.filter(pk=issue.pk, status='enqueuing').update(status='sending', updated_at=timezone.now())
+    complete_issue(issue.pk)
+    return planned
+
+
+def _write_ledger(rows):
+    from .models import NewsletterDelivery
+
+    if rows:
+        NewsletterDelivery.objects.bulk_create(rows, ignore_conflicts=True)
+        rows.clear()
+
+
+def permanent_failure(exc):
+    """
+    Tek bir mesaja/alıcıya özel kalıcı hata mı (deftere 'failed' yazılır)
+
+    Bağlantı hataları, gönderenin reddedilmesi ve 4xx geçici hatalar
+    kalıcı sayılmaz; görev bunları tekrar dener.
+    """
+    if isinstance(exc, (BadHeaderError, ValueError)):
+        # Geçersiz başlık/adres: tekrar denemek sonucu değiştirmez
+        return True
+    if isinstance(exc, (SMTPServerDisconnected, SMTPConnectError, SMTPSenderRefused)):
+        return False
+    if isinstance(exc, SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def chunk_ledger(chunk):
+    """Parçanın abone aralığındaki defter satırları"""
+    from .models import NewsletterDelivery
+
+    return NewsletterDelivery.objects.filter(
+        issue_id=chunk.issue_id,
+        subscription_id__gte=chunk.first_id,
+        subscription_id__lte=chunk.last_id
+    )
+
+
+def made_progress(chunk, delivered):
+    """
+    Başarısız deneme deftere yeni satır yazdı mı
+
+    Args:
+        delivered: Denemeden önceki defter satırı sayısı (None: deneme başlamadı)
+    """
+    if chunk is None or delivered is None:
+        return False
+    try:
+        return chunk_ledger(chunk).count() > delivered
+    except Exception:
+        return False
+
+
+def send_chunk(chunk, heartbeat=None):
+    """
+    Parçadaki henüz gönderilmemiş abonelere sayıyı gönderir
+
+    SMTP bağlantı hataları ve geçici (4xx) hatalar yukarı fırlatılır (görev
+    tekrar dener); alıcının reddedilmesi, mesajın 5xx ile geri çevrilmesi
+    gibi kişiye özel kalıcı hatalar deftere 'failed' olarak yazılır.
+
+    Args:
+        chunk: NewsletterIssueChunk
+        heartbeat: Her defter partisinden sonra çağrılır (ör. görev kilidini uzatmak için)
+
+    Returns:
+        dict: {'sent': n, 'failed': n} (parçanın toplamı)
+    """
+    from .models import NewsletterDelivery, NewsletterIssueChunk
+
+    issue = chunk.issue
+    ledger = chunk_ledger(chunk)
+    pending = list(
+        recipients(issue.newsletter_id).filter(
+            id__gte=chunk.first_id,
+            id__lte=chunk.last_id
+        ).exclude(
+            id__in=ledger.values('subscription_id')
+        ).order_by('id').values_list('id', 'email', 'user__first_name')
+    )
+    content = issue_content(issue)
+
+    rows = []
+    try:
+        for subscription_id, email, name in pending:
+            values = {'email': email, 'name': name or ''}
+            message = EmailMultiAlternatives(
+                personalize(issue.subject, values),
+                personalize(content['text'], values),
+                settings.DEFAULT_FROM_EMAIL,
+                [email]
+            )
+            message.attach_alternative(personalize(content['html'], values, is_html=True), 'text/html')
+            try:
+                send_message(message)
+                rows.append(NewsletterDelivery(issue_id=issue.pk, subscription_id=subscription_id, status='sent'))
+            except Exception as e:
+                if not permanent_failure(e):
+                    raise
+                rows.append(NewsletterDelivery(
+                    issue_id=issue.pk, subscription_id=subscription_id, status='failed', error=str(e)[:255]
+                ))
+            if len(rows) >= LEDGER_BATCH_SIZE:
+                _write_ledger(rows)
+                NewsletterIssueChunk.objects.filter(pk=chunk.pk).update(updated_at=timezone.now())
+                if heartbeat is not None:
+                    heartbeat()
+    finally:
+        # Yarıda kesilse bile gönderilenler deftere yazılır
+        _write_ledger(rows)
+
+    totals = ledger.aggregate(
+        sent=Count('id', filter=Q(status='sent')),
+        failed=Count('id', filter=Q(status='failed'))
+    )
+    NewsletterIssueChunk.objects.filter(pk=chunk.pk).update(
+        status='done',
+        sent_count=totals['sent'],
+        failed_count=totals['failed'],
+        updated_at=timezone.now()
+    )
+    complete_issue(issue.pk)
+    return totals
+
+
+def complete_issue(issue_id):
+    """Bekleyen parça kalmadıysa sayıyı gönderildi olarak işaretler"""
+    from .models import NewsletterIssue, NewsletterIssueChunk
+
+    chunks = NewsletterIssueChunk.objects.filter(issue_id=issue_id)
+    if chunks.filter(status='pending').exists():
+        return False
+
+    totals = chunks.aggregate(sent=Sum('sent_count'), failed=Sum('failed_count'))
+    completed = NewsletterIssue.objects.filter(pk=issue_id, status='sending').update(
+        status='sent',
+        sent_count=totals['sent'] or 0,
+        failed_count=totals['failed'] or 0,
+        completed_at=timezone.now(),
+        updated_at=timezone.now()
+    )
+    if completed:
+        logger.info(f"Newsletter issue {issue_id} sent: {totals['sent'] or 0} delivered, {totals['failed'] or 0} failed")
+    return bool(completed)
+
+
+def stale_work(now=None):
+    """
+    Çökmüş koordinatör/parça görevlerinden kalan işler
+
+    Returns:
+        tuple: (yeniden planlanacak sayı id'leri, yeniden kuyruğa alınacak parça id'leri)
+    """
+    from .models import NewsletterIssue, NewsletterIssueChunk
+
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    issue_ids = list(NewsletterIssue.objects.filter(
+        status__in=['pending', 'enqueuing'],
+        updated_at__lt=cutoff
+    ).values_list('id', flat=True))
+    chunk_ids = list(NewsletterIssueChunk.objects.filter(
+        Q(not_before__isnull=True) | Q(not_before__lt=cutoff),
+        status='pending',
+        updated_at__lt=cutoff,
+        issue__status__in=['enqueuing', 'sending']
+    ).values_list('id', flat=True))
+
+    # Aynı işin bir sonraki taramada tekrar seçilmemesi için
+    NewsletterIssueChunk.objects.filter(id__in=chunk_ids).update(updated_at=timezone.now())
+    return issue_ids, chunk_ids
@@ -0,0 +1,152 @@
+"""
+Bulk newsletter subscription import.
+
+import_subscriptions() consumes a CSV stream row by row and works in
+batches of IMPORT_BATCH_SIZE addresses: emails are normalized (trimmed,
+lower-cased, validated), deduplicated inside the batch, checked against the
+existing (email, newsletter) rows with one query and inserted with
+bulk_create(ignore_conflicts=True). Each batch runs in one transaction
+holding a row lock on the newsletter, which the subscribe view takes as
+well, so the rows found after the insert are exactly the ones this batch
+created. Only the current batch is kept in memory, so file size does not
+matter. Verification mails for the new rows are queued per batch, after
+the batch commits.
+"""
+
+import csv
+import logging
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+VERIFY_SALT = 'newsletter.verify'
+# cleanup_unverified_subscriptions ile aynı süre
+VERIFY_MAX_AGE = 7 * 24 * 60 * 60
+EMAIL_MAX_LENGTH = 254
+
+
+def normalize_email(value):
+    """Küçük harfe çevrilmiş geçerli e-posta adresi, geçersizse None"""
+    email = (value or '').strip().lower()
+    if not email or len(email) > EMAIL_MAX_LENGTH:
+        return None
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def iter_emails(stream):
+    """
+    CSV akışından e-posta değerleri
+
+    İlk satırda 'email' başlığı varsa o sütun, yoksa ilk sütun okunur.
+    """
+    reader = csv.reader(stream)
+    column = 0
+    for line_number, row in enumerate(reader):
+        if not row:
+            continue
+        if line_number == 0:
+            header = [cell.strip().lower() for cell in row]
+            if 'email' in header or 'e-posta' in header:
+                column = header.index('email') if 'email' in header else header.index('e-posta')
+                continue
+        yield row[column] if len(row) > column else ''
+
+
+def verification_token(subscription_id):
+    return signing.dumps(subscription_id, salt=VERIFY_SALT)
+
+
+def verify_token(token):
+    """
+    Token'daki abonelik id'si
+
+    Raises:
+        signing.BadSignature: Token geçersiz veya süresi dolmuş
+    """
+    return signing.loads(token, salt=VERIFY_SALT, max_age=VERIFY_MAX_AGE)
+
+
+def _import_batch(batch, newsletter_id, verified, enqueue_verification, stats):
+    from django.db import transaction
+    from .models import Newsletter, NewsletterSubscription
+
+    # Bülten satırı kilitlenir; abone ekleyen diğer yazıcılar (içe aktarma, abone ol) sırayla
+    # ilerler, böylece insert öncesi ve sonrası sorgular yalnızca bu partinin satırlarını görür
+    with transaction.atomic():
+        Newsletter.objects.select_for_update().filter(pk=newsletter_id).exists()
+
+        existing = set(NewsletterSubscription.objects.filter(
+            newsletter_id=newsletter_id,
+            email__in=batch
+        ).values_list('email', flat=True))
+        new = batch - existing
+        stats['existing'] += len(existing)
+        ids = []
+
+        if new:
+            NewsletterSubscription.objects.bulk_create(
+                [NewsletterSubscription(email=email, newsletter_id=newsletter_id, is_verified=verified) for email in new],
+                batch_size=IMPORT_BATCH_SIZE,
+                ignore_conflicts=True
+            )
+            ids = list(NewsletterSubscription.objects.filter(
+                newsletter_id=newsletter_id,
+                email__in=new
+            ).values_list('id', flat=True))
+            stats['created'] += len(ids)
+            stats['existing'] += len(new) - len(ids)
+
+    # Doğrulama görevleri commit edilmiş satırları görmeli
+    if ids and not verified and enqueue_verification:
+        enqueue_verification(ids)
+        stats['verification_queued'] += len(ids)
+
+
+def import_subscriptions(emails, newsletter_id, verified=False, enqueue_verification=None, progress=None,
+                         batch_size=IMPORT_BATCH_SIZE):
+    """
+    E-posta akışını bültene abone eder
+
+    Args:
+        emails: Ham e-posta değerleri (ör. iter_emails() çıktısı)
+        verified: Adresler zaten doğrulanmış sayılsın (mevcut listenin taşınması)
+        enqueue_verification: Yeni doğrulanmamış abonelik id listesiyle çağrılır
+        progress: Her partiden sonra istatistik sözlüğüyle çağrılır
+
+    Returns:
+        dict: read, invalid, duplicates (dosya içinde), existing, created, verification_queued
+    """
+    stats = dict.fromkeys(('read', 'invalid', 'duplicates', 'existing', 'created', 'verification_queued'), 0)
+    batch = set()
+
+    for value in emails:
+        stats['read'] += 1
+        email = normalize_email(value)
+        if email is None:
+            stats['invalid'] += 1
+            continue
+        if email in batch:
+            stats['duplicates'] += 1
+            continue
+        batch.add(email)
+
+        if len(batch) >= batch_size:
+            _import_batch(batch, newsletter_id, verified, enqueue_verification, stats)
+            batch = set()
+            if progress:
+                progress(dict(stats))
+
+    if batch:
+        _import_batch(batch, newsletter_id, verified, enqueue_verification, stats)
+    if progress:
+        progress(dict(stats))
+
+    return stats
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.newsletter.benchmark import run_benchmark
+from utils.benchmark import benchmark_environment
+
+
+class Command(BaseCommand):
+    help = 'Bülten gönderim hattını geçici test veritabanında, yerel bir SMTP sink\'e karşı ölçer (ağ erişimi gerekmez)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=5000, help='Oluşturulacak abone sayısı')
+        parser.add_argument('--concurrency', type=int, default=1, help='Aynı anda gönderilen parça sayısı (iş parçacığı)')
+        parser.add_argument('--fail-every', type=int, default=0, help='Her N. mesajda 421 döndürüp bağlantıyı kapat')
+        parser.add_argument('--drop-every', type=int, default=0, help='Her N. mesajda bağlantıyı yanıtsız kapat')
+        parser.add_argument('--reject-every', type=int, default=0, help='Her N. alıcıyı 550 ile reddet')
+        parser.add_argument('--min-rate', type=float, default=0, help='Mesaj/sn bu değerin altındaysa hata ver (CI)')
+        parser.add_argument('--json', action='store_true', help='Sonucu JSON olarak yaz')
+
+    def handle(self, *args, **options):
+        if options['subscribers'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--subscribers and --concurrency must be positive')
+
+        with benchmark_environment():
+            result = run_benchmark(
+                options['subscribers'],
+                concurrency=options['concurrency'],
+                fail_every=options['fail_every'],
+                drop_every=options['drop_every'],
+                reject_every=options['reject_every'],
+            )
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            for key, value in result.items():
+                self.stdout.write(f'{key}: {value}')
+
+        problems = []
+        if result['duplicate_deliveries']:
+            problems.append(f"{result['duplicate_deliveries']} duplicate deliveries")
+        if result['failed_chunks'] or result['issue_status'] != 'sent':
+            problems.append(f"issue {result['issue_status']}, {result['failed_chunks']} chunks gave up")
+        if result['ledger_sent'] + result['ledger_failed'] != result['recipients']:
+            problems.append(f"ledger covers {result['ledger_sent'] + result['ledger_failed']} of {result['recipients']} recipients")
+        if options['min_rate'] and result['messages_per_second'] < options['min_rate']:
+            problems.append(f"{result['messages_per_second']} msg/s is below {options['min_rate']}")
+        if problems:
+            raise CommandError('; '.join(problems))
+
+        self.stdout.write(self.style.SUCCESS(f"{result['messages_per_second']} messages/s"))
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.newsletter.importer import IMPORT_BATCH_SIZE, import_subscriptions, iter_emails
+from apps.newsletter.models import Newsletter
+from apps.newsletter.tasks import send_verification_emails
+
+
+class Command(BaseCommand):
+    help = 'CSV dosyasından bültene toplu abone aktarır (dosya satır satır okunur)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV dosyası ('-' ile standart girdi)")
+        parser.add_argument('--newsletter', type=int, required=True, help='Bülten id')
+        parser.add_argument('--verified', action='store_true', help='Adresler doğrulanmış sayılsın, doğrulama e-postası gönderilmesin')
+        parser.add_argument('--no-verification-email', action='store_true', help='Doğrulama e-postalarını kuyruğa alma')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not Newsletter.objects.filter(pk=options['newsletter']).exists():
+            raise CommandError(f"Newsletter {options['newsletter']} not found")
+
+        def progress(stats):
+            self.stdout.write(
+                f"{stats['read']} read, {stats['created']} created, {stats['existing']} existing, "
+                f"{stats['duplicates']} duplicates, {stats['invalid']} invalid"
+            )
+
+        enqueue = None if options['no_verification_email'] else send_verification_emails.delay
+        try:
+            stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with stream:
+            stats = import_subscriptions(
+                iter_emails(stream),
+                options['newsletter'],
+                verified=options['verified'],
+                enqueue_verification=enqueue,
+                progress=progress,
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']} subscriptions, {stats['verification_queued']} verification emails queued"
+        ))
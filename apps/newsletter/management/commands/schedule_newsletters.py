@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from apps.newsletter.scheduling import dry_run, send_window
+from apps.newsletter.tasks import schedule_newsletters
+
+
+class Command(BaseCommand):
+    help = 'Gönderim zamanı gelen bültenleri başlatır (--dry-run ile yalnızca raporlar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Gönderim yapmadan alıcı sayılarını ve tahmini zamanları göster')
+        parser.add_argument('--window', type=int, help='Gönderim penceresi (saniye, varsayılan: NEWSLETTER_SEND_WINDOW)')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            self.stdout.write(schedule_newsletters.delay().id)
+            self.stdout.write(self.style.SUCCESS('Newsletter scheduling queued'))
+            return
+
+        window = options['window'] if options['window'] is not None else send_window()
+        report = dry_run(window=window)
+        if not report:
+            self.stdout.write('No newsletters due')
+            return
+
+        for row in report:
+            self.stdout.write(
+                f"{row['name']} ({row['frequency']}): {row['recipients']} recipients in {row['chunks']} chunks, "
+                f"every {row['chunk_spacing_seconds']}s, "
+                f"{row['estimated_start']:%H:%M} - {row['estimated_last_chunk']:%H:%M}"
+            )
+        total = sum(row['recipients'] for row in report)
+        self.stdout.write(self.style.SUCCESS(f"{len(report)} newsletters, {total} recipients over {window}s"))
@@ -0,0 +1,104 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('sent', 'Gönderildi'), ('failed', 'Başarısız')], max_length=20, verbose_name='Durum')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Hata')),
+                ('delivered_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Newsletter Gönderimi',
+                'verbose_name_plural': 'Newsletter Gönderimleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsletterIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_date', models.DateField(verbose_name='Sayı Tarihi')),
+                ('subject', models.CharField(max_length=255, verbose_name='Konu')),
+                ('html_content', models.TextField(verbose_name='HTML İçerik')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('enqueuing', 'Kuyruğa Alınıyor'), ('sending', 'Gönderiliyor'), ('sent', 'Gönderildi')], default='pending', max_length=20, verbose_name='Durum')),
+                ('cursor', models.BigIntegerField(default=0, verbose_name='Son Abone ID')),
+                ('recipient_count', models.PositiveIntegerField(default=0, verbose_name='Alıcı Sayısı')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='Gönderilen')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Başarısız')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Newsletter Sayısı',
+                'verbose_name_plural': 'Newsletter Sayıları',
+                'ordering': ['-issue_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsletterIssueChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_id', models.BigIntegerField()),
+                ('last_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('done', 'Tamamlandı')], default='pending', max_length=20)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Gönderim Parçası',
+                'verbose_name_plural': 'Gönderim Parçaları',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscription',
+            index=models.Index(fields=['newsletter', 'id'], name='newsletter__newslet_04efe7_idx'),
+        ),
+        migrations.AddField(
+            model_name='newsletterdelivery',
+            name='subscription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='newsletter.newslettersubscription'),
+        ),
+        migrations.AddField(
+            model_name='newsletterissue',
+            name='newsletter',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='newsletter.newsletter'),
+        ),
+        migrations.AddField(
+            model_name='newsletterdelivery',
+            name='issue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='newsletter.newsletterissue'),
+        ),
+        migrations.AddField(
+            model_name='newsletterissuechunk',
+            name='issue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='newsletter.newsletterissue'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='newsletterissue',
+            unique_together={('newsletter', 'issue_date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='newsletterdelivery',
+            unique_together={('issue', 'subscription')},
+        ),
+        migrations.AddIndex(
+            model_name='newsletterissuechunk',
+            index=models.Index(fields=['issue', 'status'], name='newsletter__issue_i_1fce6f_idx'),
+        ),
+    ]
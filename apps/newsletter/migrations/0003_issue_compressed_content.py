@@ -0,0 +1,33 @@
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def compress_existing(apps, schema_editor):
+    NewsletterIssue = apps.get_model('newsletter', 'NewsletterIssue')
+    for issue in NewsletterIssue.objects.all().iterator():
+        content = json.dumps({'html': issue.html_content, 'text': ''}).encode()
+        issue.content = zlib.compress(content, 6)
+        issue.save(update_fields=['content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0002_issue_delivery_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletterissue',
+            name='content',
+            field=models.BinaryField(default=b'', verbose_name='İçerik'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_existing, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='newsletterissue',
+            name='html_content',
+        ),
+    ]
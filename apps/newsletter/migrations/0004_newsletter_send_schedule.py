@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:56
+
+import datetime
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0003_issue_compressed_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletter',
+            name='send_day_of_month',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(28)], verbose_name='Ayın Günü (Aylık)'),
+        ),
+        migrations.AddField(
+            model_name='newsletter',
+            name='send_time',
+            field=models.TimeField(default=datetime.time(8, 0), verbose_name='Gönderim Saati'),
+        ),
+        migrations.AddField(
+            model_name='newsletter',
+            name='send_weekday',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Pazartesi'), (1, 'Salı'), (2, 'Çarşamba'), (3, 'Perşembe'), (4, 'Cuma'), (5, 'Cumartesi'), (6, 'Pazar')], default=0, verbose_name='Gönderim Günü (Haftalık)'),
+        ),
+        migrations.AddField(
+            model_name='newsletterissuechunk',
+            name='not_before',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
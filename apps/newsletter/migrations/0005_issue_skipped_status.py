@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0004_newsletter_send_schedule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsletterissue',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Bekliyor'), ('enqueuing', 'Kuyruğa Alınıyor'), ('sending', 'Gönderiliyor'), ('sent', 'Gönderildi'), ('skipped', 'Atlandı')], default='pending', max_length=20, verbose_name='Durum'),
+        ),
+    ]
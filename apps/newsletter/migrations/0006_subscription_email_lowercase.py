@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    NewsletterSubscription = apps.get_model('newsletter', 'NewsletterSubscription')
+    NewsletterDelivery = apps.get_model('newsletter', 'NewsletterDelivery')
+
+    subscriptions = NewsletterSubscription.objects.exclude(email=Lower('email')).order_by('id')
+    for subscription in subscriptions.iterator():
+        email = subscription.email.strip().lower()
+        keep = NewsletterSubscription.objects.filter(
+            newsletter_id=subscription.newsletter_id,
+            email=email
+        ).first()
+        if keep is None:
+            NewsletterSubscription.objects.filter(pk=subscription.pk).update(email=email)
+            continue
+
+        # Aynı adresin küçük harfli kaydı zaten var: iki kayıt birleştirilir
+        if subscription.is_verified and not keep.is_verified:
+            NewsletterSubscription.objects.filter(pk=keep.pk).update(is_verified=True)
+        delivered = NewsletterDelivery.objects.filter(subscription_id=keep.pk).values('issue_id')
+        NewsletterDelivery.objects.filter(subscription_id=subscription.pk).exclude(
+            issue_id__in=delivered
+        ).update(subscription_id=keep.pk)
+        subscription.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0005_issue_skipped_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
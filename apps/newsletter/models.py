@@ -1,3 +1,6 @@
+from datetime import time
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 class Newsletter(models.Model):
@@ -7,11 +10,30 @@ class Newsletter(models.Model):
         ('monthly', 'Aylık'),
     ]
     
+    WEEKDAY_CHOICES = [
+        (0, 'Pazartesi'),
+        (1, 'Salı'),
+        (2, 'Çarşamba'),
+        (3, 'Perşembe'),
+        (4, 'Cuma'),
+        (5, 'Cumartesi'),
+        (6, 'Pazar'),
+    ]
+    
     name = models.CharField(max_length=200, verbose_name='Bülten Adı')
     description = models.TextField(blank=True, verbose_name='Açıklama')
     category = models.ForeignKey('categories.Category', on_delete=models.SET_NULL, null=True, blank=True)
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, verbose_name='Sıklık')
     template = models.TextField(blank=True, verbose_name='Email Şablonu')
+    
+    # Gönderim zamanı (schedule_newsletters bu saatten sonraki ilk çalışmada gönderir)
+    send_time = models.TimeField(default=time(8, 0), verbose_name='Gönderim Saati')
+    send_weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, default=0, verbose_name='Gönderim Günü (Haftalık)')
+    send_day_of_month = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1), MaxValueValidator(28)],
+        verbose_name='Ayın Günü (Aylık)'
+    )
     is_active = models.BooleanField(default=True, verbose_name='Aktif')
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -32,3 +54,87 @@ class NewsletterSubscription(models.Model):
         verbose_name = 'Newsletter Aboneliği'
         verbose_name_plural = 'Newsletter Abonelikleri'
         unique_together = ['email', 'newsletter']
+        indexes = [
+            # Gönderimde aboneler id sırasıyla (keyset) taranır
+            models.Index(fields=['newsletter', 'id']),
+        ]
+
+class NewsletterIssue(models.Model):
+    """Bir bültenin belirli bir güne ait sayısı (bir kez oluşturulur, parça parça gönderilir)"""
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('enqueuing', 'Kuyruğa Alınıyor'),
+        ('sending', 'Gönderiliyor'),
+        ('sent', 'Gönderildi'),
+        # Gönderilecek makale/abone yoktu; bülten o gün tekrar denenmez
+        ('skipped', 'Atlandı'),
+    ]
+    
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.CASCADE, related_name='issues')
+    issue_date = models.DateField(verbose_name='Sayı Tarihi')
+    subject = models.CharField(max_length=255, verbose_name='Konu')
+    # zlib ile sıkıştırılmış {'html', 'text'} (bkz. builder.py)
+    content = models.BinaryField(verbose_name='İçerik')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Durum')
+    
+    # Koordinatörün kuyruğa aldığı son abone id'si (yarıda kalırsa buradan devam eder)
+    cursor = models.BigIntegerField(default=0, verbose_name='Son Abone ID')
+    recipient_count = models.PositiveIntegerField(default=0, verbose_name='Alıcı Sayısı')
+    sent_count = models.PositiveIntegerField(default=0, verbose_name='Gönderilen')
+    failed_count = models.PositiveIntegerField(default=0, verbose_name='Başarısız')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Newsletter Sayısı'
+        verbose_name_plural = 'Newsletter Sayıları'
+        unique_together = ['newsletter', 'issue_date']
+        ordering = ['-issue_date']
+    
+    def __str__(self):
+        return self.subject
+
+class NewsletterIssueChunk(models.Model):
+    """Tek görevde gönderilen abone aralığı (first_id..last_id)"""
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('done', 'Tamamlandı'),
+    ]
+    
+    issue = models.ForeignKey(NewsletterIssue, on_delete=models.CASCADE, related_name='chunks')
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Gönderim penceresine yayılan parçanın planlanan başlangıcı
+    not_before = models.DateTimeField(null=True, blank=True)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Gönderim Parçası'
+        verbose_name_plural = 'Gönderim Parçaları'
+        indexes = [
+            models.Index(fields=['issue', 'status']),
+        ]
+
+class NewsletterDelivery(models.Model):
+    """Gönderim defteri: abone başına bir satır, tekrar denemelerde aynı kişiye ikinci kez gönderilmez"""
+    STATUS_CHOICES = [
+        ('sent', 'Gönderildi'),
+        ('failed', 'Başarısız'),
+    ]
+    
+    issue = models.ForeignKey(NewsletterIssue, on_delete=models.CASCADE, related_name='deliveries')
+    subscription = models.ForeignKey(NewsletterSubscription, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name='Durum')
+    error = models.CharField(max_length=255, blank=True, verbose_name='Hata')
+    delivered_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Newsletter Gönderimi'
+        verbose_name_plural = 'Newsletter Gönderimleri'
+        unique_together = ['issue', 'subscription']
@@ -0,0 +1,110 @@
+"""
+Newsletter scheduling.
+
+schedule_newsletters runs every few minutes and picks the newsletters that
+are due: past their send time today, on their weekday (weekly) or day of
+month (monthly), and without an issue for today yet. Each issue is built by
+its own task, which then starts the issue's delivery with its chunks spread
+evenly over NEWSLETTER_SEND_WINDOW seconds, so a large newsletter does not
+hit the mail relay all at once. Days with nothing to send are recorded as
+skipped issues, so they stop being due.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .delivery import NEWSLETTER_CHUNK_SIZE, recipients
+
+# Sıklığa göre sayı içeriği: makale aralığı, makale sayısı, şablon, konu
+ISSUE_FORMATS = {
+    'daily': {
+        'lookback': timedelta(hours=24),
+        'limit': 10,
+        'template': 'newsletter/daily_newsletter.html',
+        'subject': '{name} - {now:%d.%m.%Y}',
+    },
+    'weekly': {
+        'lookback': timedelta(days=7),
+        'limit': 20,
+        'template': 'newsletter/weekly_newsletter.html',
+        'subject': '{name} - Haftalık Özet ({now:%d.%m.%Y})',
+    },
+    'monthly': {
+        'lookback': timedelta(days=30),
+        'limit': 30,
+        'template': 'newsletter/monthly_newsletter.html',
+        'subject': '{name} - Aylık Özet ({now:%B %Y})',
+    },
+}
+
+
+def send_window():
+    return getattr(settings, 'NEWSLETTER_SEND_WINDOW', 60 * 60)
+
+
+def is_due(newsletter, now):
+    """Bülten bugün gönderilmeli ve gönderim saati geçti mi"""
+    if now.time() < newsletter.send_time:
+        return False
+    if newsletter.frequency == 'weekly':
+        return now.weekday() == newsletter.send_weekday
+    if newsletter.frequency == 'monthly':
+        return now.day == newsletter.send_day_of_month
+    return True
+
+
+def due_newsletters(now=None):
+    """Bugünkü sayısı henüz oluşturulmamış, gönderim zamanı gelmiş bültenler"""
+    from .models import Newsletter
+
+    now = now or timezone.now()
+    candidates = Newsletter.objects.filter(
+        is_active=True,
+        send_time__lte=now.time()
+    ).exclude(
+        issues__issue_date=now.date()
+    ).select_related('category').order_by('id')
+    return [newsletter for newsletter in candidates if is_due(newsletter, now)]
+
+
+def chunk_spacing(recipient_count, window=None):
+    """
+    Parçaların kuyruğa alınma aralığı (saniye)
+
+    Sayının parçaları pencereye eşit dağıtılır: ilk parça hemen, son parça
+    pencerenin sonuna doğru gönderilir. Tek parçalık sayılar beklemez.
+    """
+    window = send_window() if window is None else window
+    chunks = math.ceil(recipient_count / NEWSLETTER_CHUNK_SIZE)
+    if chunks <= 1 or window <= 0:
+        return 0
+    return window / chunks
+
+
+def dry_run(now=None, window=None):
+    """
+    Gönderim yapmadan, şu an çalışsa hangi bültenlerin ne zaman gideceğini raporlar
+
+    Returns:
+        list: Her bülten için alıcı/parça sayısı ve tahmini başlangıç/bitiş
+    """
+    now = now or timezone.now()
+    report = []
+    for newsletter in due_newsletters(now):
+        count = recipients(newsletter.id).count()
+        chunks = math.ceil(count / NEWSLETTER_CHUNK_SIZE)
+        spacing = chunk_spacing(count, window)
+        report.append({
+            'newsletter': newsletter.id,
+            'name': newsletter.name,
+            'frequency': newsletter.frequency,
+            'recipients': count,
+            'chunks': chunks,
+            'chunk_spacing_seconds': round(spacing, 1),
+            'estimated_start': now,
+            'estimated_last_chunk': now + timedelta(seconds=spacing * max(chunks - 1, 0)),
+        })
+    return report
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .importer import normalize_email
 from .models import Newsletter, NewsletterSubscription
 
 class NewsletterSerializer(serializers.ModelSerializer):
@@ -10,3 +11,10 @@ class NewsletterSubscriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsletterSubscription
         fields = ('email', 'newsletter')
+
+    def validate_email(self, value):
+        # İçe aktarma ile aynı biçim: (email, newsletter) tekilliği büyük/küçük harfe takılmasın
+        email = normalize_email(value)
+        if email is None:
+            raise serializers.ValidationError('Enter a valid email address.')
+        return email
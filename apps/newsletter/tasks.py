@@ -3,248 +3,298 @@ Celery tasks for newsletter application.
 """
 
 from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
 from django.utils import timezone
-from django.core.mail import send_mass_mail
-from django.template.loader import render_to_string
-from datetime import timedelta
+from datetime import date, timedelta
+import io
 import logging
 
+from utils.cache_utils import acquire_lock, extend_lock, release_lock
+from .builder import build_issue, issue_articles, skip_issue
+from .delivery import (
+    chunk_ledger, made_progress, plan_issue, recipients, reset_connection, send_chunk, send_message,
+)
+from .importer import import_subscriptions, iter_emails, verification_token
+from .scheduling import ISSUE_FORMATS, chunk_spacing, due_newsletters
+from .scheduling import dry_run as dry_run_report
+
 logger = logging.getLogger(__name__)
 
 
+NEWSLETTER_LOCK_TIMEOUT = 30 * 60
+IMPORT_PROGRESS_TIMEOUT = 24 * 60 * 60
+CLEANUP_BATCH_SIZE = 1000
+
+
+def import_progress_key(job_id):
+    return f'newsletter:import:{job_id}'
+
+
 @shared_task(bind=True, max_retries=3)
-def send_daily_newsletter(self):
+def schedule_newsletters(self, dry_run=False):
     """
-    Send daily newsletter to subscribers.
-    Runs every day at 08:00 AM.
+    Start every newsletter that is due (any frequency, per-newsletter send
+    time). Runs every 5 minutes.
+
+    Each issue is built by its own task, which then starts that issue's
+    delivery with its chunks spread over NEWSLETTER_SEND_WINDOW, so one
+    failing build does not hold back the others.
+
+    Args:
+        dry_run: Only report recipient counts and estimated send times
     """
     try:
-        from .models import Newsletter, NewsletterSubscription
-        from apps.articles.models import Article
-        
-        # Get daily newsletters
-        daily_newsletters = Newsletter.objects.filter(
-            frequency='daily',
-            is_active=True
+        if dry_run:
+            return dry_run_report()
+
+        today = timezone.now().date().isoformat()
+        newsletter_ids = [newsletter.id for newsletter in due_newsletters()]
+        if not newsletter_ids:
+            return "No newsletters due"
+
+        for newsletter_id in newsletter_ids:
+            build_newsletter_issue.delay(newsletter_id, today)
+
+        logger.info(f"Building {len(newsletter_ids)} newsletter issues")
+        return f"Building {len(newsletter_ids)} newsletter issues"
+
+    except Exception as exc:
+        logger.error(f"Error scheduling newsletters: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def build_newsletter_issue(self, newsletter_id, issue_date):
+    """
+    Render one newsletter issue (HTML + plaintext, compressed) and start
+    its delivery.
+
+    A day with no articles or no subscribers is recorded as a skipped
+    issue, so the newsletter is not rebuilt every scheduler run and sent
+    late once something appears.
+
+    Returns:
+        dict: {'issue': id, 'recipients': n}, or None if there is nothing
+              to send (no articles, no subscribers, or already built)
+    """
+    from .models import Newsletter
+
+    try:
+        newsletter = Newsletter.objects.select_related('category').get(pk=newsletter_id)
+        issue_format = ISSUE_FORMATS[newsletter.frequency]
+        now = timezone.now()
+        day = date.fromisoformat(issue_date)
+
+        articles = issue_articles(newsletter, now - issue_format['lookback'], issue_format['limit'])
+        if not articles:
+            logger.info(f"No articles for newsletter {newsletter_id}")
+            skip_issue(newsletter, day, 'No articles')
+            return None
+
+        recipient_count = recipients(newsletter_id).count()
+        if not recipient_count:
+            logger.info(f"No subscribers for newsletter {newsletter_id}")
+            skip_issue(newsletter, day, 'No subscribers')
+            return None
+
+        issue, created = build_issue(
+            newsletter,
+            day,
+            articles,
+            template=issue_format['template'],
+            subject=issue_format['subject'].format(name=newsletter.name, now=now),
         )
-        
-        for newsletter in daily_newsletters:
-            # Get articles from last 24 hours
-            yesterday = timezone.now() - timedelta(hours=24)
-            
-            if newsletter.category:
-                articles = Article.objects.filter(
-                    category=newsletter.category,
-                    status='published',
-                    published_at__gte=yesterday
-                ).order_by('-published_at')[:10]
-            else:
-                articles = Article.objects.filter(
-                    status='published',
-                    published_at__gte=yesterday
-                ).order_by('-published_at')[:10]
-            
-            if not articles:
-                logger.info(f"No articles for newsletter {newsletter.id}")
-                continue
-            
-            # Get subscribers
-            subscriptions = NewsletterSubscription.objects.filter(
-                newsletter=newsletter,
-                is_active=True,
-                is_verified=True
-            ).values_list('email', flat=True)
-            
-            if not subscriptions:
-                logger.info(f"No subscribers for newsletter {newsletter.id}")
-                continue
-            
-            # Prepare email content
-            context = {
-                'newsletter': newsletter,
-                'articles': articles,
-                'date': timezone.now().date(),
-            }
-            
-            html_message = render_to_string(
-                'newsletter/daily_newsletter.html',
-                context
-            )
-            
-            # Send emails
-            subject = f"{newsletter.name} - {timezone.now().strftime('%d.%m.%Y')}"
-            
-            # Batch send emails
-            emails = [
-                (subject, html_message, 'noreply@example.com', [email])
-                for email in subscriptions
-            ]
-            
-            send_mass_mail(emails, fail_silently=True)
-            
-            logger.info(f"Sent daily newsletter {newsletter.id} to {len(subscriptions)} subscribers")
-        
-        return f"Daily newsletters sent successfully"
-    
+        if not created:
+            return None
+
+        send_newsletter_issue.delay(issue.id, spacing=chunk_spacing(recipient_count))
+        return {'issue': issue.id, 'recipients': recipient_count}
+
+    except Newsletter.DoesNotExist:
+        return None
+
     except Exception as exc:
-        logger.error(f"Error sending daily newsletter: {str(exc)}")
-        raise self.retry(exc=exc, countdown=300)
+        logger.error(f"Error building newsletter {newsletter_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
 
 
 @shared_task(bind=True, max_retries=3)
-def send_weekly_newsletter(self):
+def send_newsletter_issue(self, issue_id, spacing=0):
     """
-    Send weekly newsletter to subscribers.
-    Runs every Monday at 08:00 AM.
+    Fan-out coordinator for one newsletter issue.
+
+    Streams the issue's subscribers by id and enqueues one
+    send_newsletter_chunk task per NEWSLETTER_CHUNK_SIZE recipients.
+    Continues from the issue's cursor if a previous run stopped midway.
+
+    Args:
+        spacing: Seconds between consecutive chunks (see chunk_spacing)
     """
+    from .models import NewsletterIssue
+
+    lock_key = f'newsletter:issue:{issue_id}:plan'
+    token = acquire_lock(lock_key, NEWSLETTER_LOCK_TIMEOUT)
+    if token is None:
+        return f"Issue {issue_id} is already being planned"
+
     try:
-        from .models import Newsletter, NewsletterSubscription
-        from apps.articles.models import Article
-        
-        # Get weekly newsletters
-        weekly_newsletters = Newsletter.objects.filter(
-            frequency='weekly',
-            is_active=True
+        issue = NewsletterIssue.objects.get(pk=issue_id)
+        planned = plan_issue(
+            issue,
+            lambda chunk_id, countdown: send_newsletter_chunk.apply_async((chunk_id,), countdown=countdown),
+            spacing=spacing
         )
-        
-        for newsletter in weekly_newsletters:
-            # Get articles from last 7 days
-            last_week = timezone.now() - timedelta(days=7)
-            
-            if newsletter.category:
-                articles = Article.objects.filter(
-                    category=newsletter.category,
-                    status='published',
-                    published_at__gte=last_week
-                ).order_by('-published_at')[:20]
-            else:
-                articles = Article.objects.filter(
-                    status='published',
-                    published_at__gte=last_week
-                ).order_by('-published_at')[:20]
-            
-            if not articles:
-                logger.info(f"No articles for weekly newsletter {newsletter.id}")
-                continue
-            
-            # Get subscribers
-            subscriptions = NewsletterSubscription.objects.filter(
-                newsletter=newsletter,
-                is_active=True,
-                is_verified=True
-            ).values_list('email', flat=True)
-            
-            if not subscriptions:
-                logger.info(f"No subscribers for weekly newsletter {newsletter.id}")
-                continue
-            
-            # Prepare email content
-            context = {
-                'newsletter': newsletter,
-                'articles': articles,
-                'date': timezone.now().date(),
-            }
-            
-            html_message = render_to_string(
-                'newsletter/weekly_newsletter.html',
-                context
-            )
-            
-            # Send emails
-            subject = f"{newsletter.name} - Haftalık Özet ({timezone.now().strftime('%d.%m.%Y')})"
-            
-            emails = [
-                (subject, html_message, 'noreply@example.com', [email])
-                for email in subscriptions
-            ]
-            
-            send_mass_mail(emails, fail_silently=True)
-            
-            logger.info(f"Sent weekly newsletter {newsletter.id} to {len(subscriptions)} subscribers")
-        
-        return f"Weekly newsletters sent successfully"
-    
+        return f"Planned {planned} chunks for issue {issue_id}"
+
+    except NewsletterIssue.DoesNotExist:
+        return f"Issue {issue_id} not found"
+
+    except Exception as exc:
+        logger.error(f"Error planning newsletter issue {issue_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+    finally:
+        release_lock(lock_key, token)
+
+
+@shared_task(bind=True, max_retries=5)
+def send_newsletter_chunk(self, chunk_id):
+    """
+    Send one chunk (up to NEWSLETTER_CHUNK_SIZE recipients) of an issue.
+
+    Recipients already in the delivery ledger are skipped, so retries and
+    re-enqueued chunks never send an email twice. An attempt that moved the
+    ledger forward before failing does not use up the retry budget, so a
+    large chunk behind a relay with occasional 4xx errors still finishes.
+    """
+    from .models import NewsletterIssueChunk
+
+    lock_key = f'newsletter:chunk:{chunk_id}'
+    token = acquire_lock(lock_key, NEWSLETTER_LOCK_TIMEOUT)
+    if token is None:
+        return f"Chunk {chunk_id} is already being sent"
+
+    def heartbeat():
+        # Kilit düştüyse parçayı başka bir worker almış olabilir; göndermeyi bırak
+        if not extend_lock(lock_key, token, NEWSLETTER_LOCK_TIMEOUT):
+            raise RuntimeError(f"Lost the lock of chunk {chunk_id}")
+
+    chunk = delivered = None
+    try:
+        chunk = NewsletterIssueChunk.objects.select_related('issue').defer('issue__content').filter(pk=chunk_id).first()
+        if chunk is None or chunk.status == 'done':
+            return f"Chunk {chunk_id} has nothing to send"
+
+        delivered = chunk_ledger(chunk).count()
+        totals = send_chunk(chunk, heartbeat=heartbeat)
+        return f"Chunk {chunk_id}: {totals['sent']} sent, {totals['failed']} failed"
+
     except Exception as exc:
-        logger.error(f"Error sending weekly newsletter: {str(exc)}")
-        raise self.retry(exc=exc, countdown=300)
+        # Bağlantı bozulmuş olabilir; bir sonraki deneme yeniden bağlanır
+        reset_connection()
+        logger.error(f"Error sending newsletter chunk {chunk_id}: {str(exc)}")
+        if made_progress(chunk, delivered):
+            # Deftere yazan deneme hakkı tüketmez: bütçe bu denemeden itibaren yenilenir
+            raise self.retry(exc=exc, countdown=60, max_retries=self.request.retries + self.max_retries)
+        raise self.retry(exc=exc, countdown=60 * (self.request.retries + 1))
+
+    finally:
+        release_lock(lock_key, token)
 
 
 @shared_task(bind=True, max_retries=3)
-def send_monthly_newsletter(self):
+def resume_newsletter_issues(self):
     """
-    Send monthly newsletter to subscribers.
-    Runs on the first day of each month at 08:00 AM.
+    Re-enqueue newsletter work left behind by crashed workers.
+    Runs every 15 minutes.
     """
     try:
-        from .models import Newsletter, NewsletterSubscription
-        from apps.articles.models import Article
-        
-        # Get monthly newsletters
-        monthly_newsletters = Newsletter.objects.filter(
-            frequency='monthly',
+        issue_ids, chunk_ids = stale_work()
+
+        for issue_id in issue_ids:
+            send_newsletter_issue.delay(issue_id)
+        for chunk_id in chunk_ids:
+            send_newsletter_chunk.delay(chunk_id)
+
+        if issue_ids or chunk_ids:
+            logger.info(f"Resumed {len(issue_ids)} newsletter issues and {len(chunk_ids)} chunks")
+        return f"Resumed {len(issue_ids)} issues and {len(chunk_ids)} chunks"
+
+    except Exception as exc:
+        logger.error(f"Error resuming newsletter issues: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_verification_emails(self, subscription_ids):
+    """
+    Send double opt-in verification emails to a chunk of subscriptions
+    (at most IMPORT_BATCH_SIZE ids) over the shared SMTP connection.
+    Already verified subscriptions are skipped.
+    """
+    try:
+        from .models import NewsletterSubscription
+
+        subscriptions = NewsletterSubscription.objects.filter(
+            id__in=subscription_ids,
+            is_verified=False,
             is_active=True
-        )
-        
-        for newsletter in monthly_newsletters:
-            # Get articles from last 30 days
-            last_month = timezone.now() - timedelta(days=30)
-            
-            if newsletter.category:
-                articles = Article.objects.filter(
-                    category=newsletter.category,
-                    status='published',
-                    published_at__gte=last_month
-                ).order_by('-published_at')[:30]
-            else:
-                articles = Article.objects.filter(
-                    status='published',
-                    published_at__gte=last_month
-                ).order_by('-published_at')[:30]
-            
-            if not articles:
-                logger.info(f"No articles for monthly newsletter {newsletter.id}")
-                continue
-            
-            # Get subscribers
-            subscriptions = NewsletterSubscription.objects.filter(
-                newsletter=newsletter,
-                is_active=True,
-                is_verified=True
-            ).values_list('email', flat=True)
-            
-            if not subscriptions:
-                logger.info(f"No subscribers for monthly newsletter {newsletter.id}")
-                continue
-            
-            # Prepare email content
-            context = {
-                'newsletter': newsletter,
-                'articles': articles,
-                'date': timezone.now().date(),
-            }
-            
-            html_message = render_to_string(
-                'newsletter/monthly_newsletter.html',
-                context
+        ).select_related('newsletter').only('id', 'email', 'newsletter__name')
+
+        sent = 0
+        for subscription in subscriptions.iterator():
+            link = f"{settings.FRONTEND_URL}/newsletter/verify/{verification_token(subscription.id)}"
+            message = EmailMultiAlternatives(
+                f"{subscription.newsletter.name} - Aboneliğinizi onaylayın",
+                f"{subscription.newsletter.name} bültenine aboneliğinizi onaylamak için bağlantıya tıklayın:\n{link}",
+                settings.DEFAULT_FROM_EMAIL,
+                [subscription.email]
             )
-            
-            # Send emails
-            subject = f"{newsletter.name} - Aylık Özet ({timezone.now().strftime('%B %Y')})"
-            
-            emails = [
-                (subject, html_message, 'noreply@example.com', [email])
-                for email in subscriptions
-            ]
-            
-            send_mass_mail(emails, fail_silently=True)
-            
-            logger.info(f"Sent monthly newsletter {newsletter.id} to {len(subscriptions)} subscribers")
-        
-        return f"Monthly newsletters sent successfully"
-    
+            send_message(message)
+            sent += 1
+
+        return f"Sent {sent} verification emails"
+
     except Exception as exc:
-        logger.error(f"Error sending monthly newsletter: {str(exc)}")
-        raise self.retry(exc=exc, countdown=300)
+        reset_connection()
+        logger.error(f"Error sending verification emails: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def import_subscriptions_file(self, job_id, path, newsletter_id, verified=False):
+    """
+    Import a stored CSV upload (see NewsletterImportView) into a newsletter.
+
+    Progress is kept in the cache under import_progress_key(job_id). The
+    import is idempotent, so a retry simply skips the rows already created.
+    """
+    def report(stats, state='running'):
+        cache.set(import_progress_key(job_id), dict(stats, state=state), IMPORT_PROGRESS_TIMEOUT)
+
+    try:
+        with default_storage.open(path, 'rb') as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+            stats = import_subscriptions(
+                iter_emails(stream),
+                newsletter_id,
+                verified=verified,
+                enqueue_verification=send_verification_emails.delay,
+                progress=report,
+            )
+
+        report(stats, state='done')
+        default_storage.delete(path)
+        logger.info(f"Imported subscriptions for newsletter {newsletter_id}: {stats}")
+        return stats
+
+    except Exception as exc:
+        cache.set(import_progress_key(job_id), {'state': 'failed', 'error': str(exc)}, IMPORT_PROGRESS_TIMEOUT)
+        logger.error(f"Error importing subscriptions from {path}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
 
 
 @shared_task(bind=True, max_retries=3)
@@ -252,17 +302,27 @@ def cleanup_unverified_subscriptions(self):
     """
     Remove unverified subscriptions older than 7 days.
     Runs every day at 03:00 AM.
+
+    Deletes in id batches so a large backlog (e.g. after a bulk import)
+    never loads every row into one delete collector.
     """
     try:
         from .models import NewsletterSubscription
         
         # Delete unverified subscriptions older than 7 days
         cutoff_date = timezone.now() - timedelta(days=7)
-        
-        deleted_count, _ = NewsletterSubscription.objects.filter(
+        stale = NewsletterSubscription.objects.filter(
             is_verified=False,
             subscribed_at__lt=cutoff_date
-        ).delete()
+        )
+        
+        deleted_count = 0
+        while True:
+            ids = list(stale.order_by('id').values_list('id', flat=True)[:CLEANUP_BATCH_SIZE])
+            if not ids:
+                break
+            deleted, _ = NewsletterSubscription.objects.filter(id__in=ids).delete()
+            deleted_count += deleted
         
         logger.info(f"Deleted {deleted_count} unverified subscriptions")
         return f"Deleted {deleted_count} unverified subscriptions"
@@ -1,11 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NewsletterViewSet, NewsletterSubscriptionCreateView
+from .views import (
+    NewsletterViewSet, NewsletterSubscriptionCreateView, NewsletterVerifyView,
+    NewsletterImportView, NewsletterImportStatusView
+)
 
 router = DefaultRouter()
 router.register(r'', NewsletterViewSet, basename='newsletter')
 
+# Sabit yollar router'ın detay kalıbından (<pk>/) önce gelmeli
 urlpatterns = [
-    path('', include(router.urls)),
     path('subscribe/', NewsletterSubscriptionCreateView.as_view(), name='subscribe'),
+    path('verify/', NewsletterVerifyView.as_view(), name='verify'),
+    path('import/', NewsletterImportView.as_view(), name='import'),
+    path('import/<str:job_id>/', NewsletterImportStatusView.as_view(), name='import-status'),
+    path('', include(router.urls)),
 ]
@@ -1,9 +1,18 @@
-from rest_framework import viewsets, generics
+import uuid
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.views import APIView
+from .importer import verify_token
 from .models import Newsletter, NewsletterSubscription
 from .serializers import NewsletterSerializer, NewsletterSubscriptionSerializer
+from .tasks import import_progress_key, import_subscriptions_file, send_verification_emails
 
 class NewsletterViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Newsletter.objects.filter(is_active=True)
@@ -16,6 +25,67 @@ class NewsletterSubscriptionCreateView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     
     def perform_create(self, serializer):
-        serializer.save(
-            user=self.request.user if self.request.user.is_authenticated else None
-        )
+        # Toplu içe aktarmanın partileriyle aynı kilit (bkz. importer._import_batch)
+        with transaction.atomic():
+            Newsletter.objects.select_for_update().filter(pk=serializer.validated_data['newsletter'].pk).exists()
+            subscription = serializer.save(
+                user=self.request.user if self.request.user.is_authenticated else None
+            )
+        transaction.on_commit(lambda: send_verification_emails.delay([subscription.id]))
+
+class NewsletterVerifyView(APIView):
+    """Doğrulama e-postasındaki token ile aboneliği onayla"""
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        try:
+            subscription_id = verify_token(str(request.data.get('token', '')))
+        except signing.BadSignature:
+            return Response({'error': 'Invalid or expired token'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        updated = NewsletterSubscription.objects.filter(pk=subscription_id, is_active=True).update(is_verified=True)
+        if not updated:
+            return Response({'error': 'Subscription not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'subscription verified'})
+
+class NewsletterImportView(APIView):
+    """
+    CSV'den toplu abone içe aktarma (yönetici)
+    
+    multipart: file (CSV, 'email' başlıklı veya tek sütun), newsletter,
+    verified (true ise doğrulama e-postası gönderilmez). Dosya depoya
+    yazılır ve arka planda işlenir; ilerleme durum adresinden izlenir.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            newsletter_id = int(request.data.get('newsletter', ''))
+        except ValueError:
+            return Response({'error': 'newsletter must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Newsletter.objects.filter(pk=newsletter_id).exists():
+            return Response({'error': 'Newsletter not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        verified = str(request.data.get('verified', '')).lower() in ('1', 'true', 'yes')
+        job_id = uuid.uuid4().hex
+        # Yükleme parça parça diske yazılır, belleğe alınmaz
+        path = default_storage.save(f'newsletter_imports/{job_id}.csv', upload)
+        
+        cache.set(import_progress_key(job_id), {'state': 'queued'}, 24 * 60 * 60)
+        import_subscriptions_file.delay(job_id, path, newsletter_id, verified)
+        
+        return Response({'job_id': job_id}, status=status.HTTP_202_ACCEPTED)
+
+class NewsletterImportStatusView(APIView):
+    """İçe aktarma işinin ilerlemesi"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, job_id):
+        progress = cache.get(import_progress_key(job_id))
+        if progress is None:
+            return Response({'error': 'Import job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(progress)
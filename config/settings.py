@@ -14,6 +14,7 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv(
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver (websocket desteği)
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -23,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.sites',
     
     # Third party apps
+    'channels',
     'rest_framework',
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
@@ -68,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'utils.throttling.RateLimitHeadersMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -96,6 +99,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 REST_AUTH = {
     'USE_JWT': True,
@@ -174,6 +178,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Sites Framework
 SITE_ID = 1
 
+# Reverse proxies whose X-Forwarded-For entries are trusted (IPs or CIDR ranges).
+# The client IP is the right-most X-Forwarded-For address not in this list.
+TRUSTED_PROXIES = config(
+    'TRUSTED_PROXIES',
+    default='127.0.0.1/32,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16',
+    cast=Csv()
+)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000', cast=Csv())
 CORS_ALLOW_CREDENTIALS = True
@@ -188,6 +200,12 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+CORS_EXPOSE_HEADERS = [
+    'retry-after',
+    'x-ratelimit-limit',
+    'x-ratelimit-remaining',
+    'x-ratelimit-reset',
+]
 
 # REST Framework Settings
 REST_FRAMEWORK = {
@@ -210,8 +228,8 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'utils.throttling.AnonRateThrottle',
+        'utils.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         # Anonymous users (not logged in)
@@ -227,6 +245,7 @@ REST_FRAMEWORK = {
         'auth': '20/hour',            # Login/register attempts
         'read': '300/hour',           # Read-only endpoints (relaxed)
         'write': '50/hour',           # Write operations
+        'beacon': '120/min',          # Ad tracking beacons (event batches)
 
         # Premium users (higher limits)
         'premium': '5000/hour',       # Premium/subscriber users
@@ -284,6 +303,16 @@ CACHES = {
     }
 }
 
+# Channels (canlı dashboard websocketleri)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [config('CHANNEL_LAYER_URL', default='redis://127.0.0.1:6379/2')],
+        },
+    },
+}
+
 # Cache Time Settings (seconds)
 CACHE_TTL = {
     'ARTICLE_LIST': 60 * 5,  # 5 minutes
@@ -292,8 +321,39 @@ CACHE_TTL = {
     'POPULAR_ARTICLES': 60 * 10,  # 10 minutes
     'TRENDING_TAGS': 60 * 15,  # 15 minutes
     'HOME_PAGE': 60 * 5,  # 5 minutes
+    'COMMENT_FEED': 60 * 10,  # 10 minutes, dropped on moderation
+}
+
+# Popularity score weights (apps.analytics.tasks.update_popular_articles)
+POPULARITY_SCORE_WEIGHTS = {
+    'views': 1.0,
+    'shares': 5.0,
+    'likes': 3.0,
+    'comments': 4.0,
+}
+
+# Ad invalid-traffic filter: events per minute (apps.advertisements.fraud)
+AD_IVT_RATE_LIMITS = {
+    'impression': {'visitor': 60, 'ip': 300, 'subnet': 3000},
+    'click': {'visitor': 5, 'ip': 20, 'subnet': 200},
+}
+
+# Share of AdBlock detections also stored as raw AdBlockDetection rows
+# (apps.advertisements.adblock); 0 keeps only the daily counters
+AD_ADBLOCK_RAW_SAMPLE_RATE = config('AD_ADBLOCK_RAW_SAMPLE_RATE', default=0.0, cast=float)
+
+# Comment auto-moderation (apps.comments.moderation): spam probability
+# thresholds and per IP / user comment velocity
+COMMENT_MODERATION = {
+    'SPAM_ABOVE': 0.98,
+    'APPROVE_BELOW': 0.05,
+    'VELOCITY_WINDOW': 10 * 60,
+    'VELOCITY_LIMIT': 5,
 }
 
+# Newsletter chunks are spread over this many seconds (apps.newsletter.scheduling)
+NEWSLETTER_SEND_WINDOW = config('NEWSLETTER_SEND_WINDOW', default=60 * 60, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://127.0.0.1:6379/1')
 CELERY_RESULT_BACKEND = config('CELERY_BROKER_URL', default='redis://127.0.0.1:6379/1')
@@ -304,6 +364,9 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes (soft limit before hard limit)
+# Redis broker redelivers unacked tasks after this; must exceed the longest countdown
+# (newsletter chunks are delayed up to NEWSLETTER_SEND_WINDOW)
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': NEWSLETTER_SEND_WINDOW + 60 * 60}
 
 # Worker optimization for high traffic
 CELERY_WORKER_PREFETCH_MULTIPLIER = 4  # Number of tasks to prefetch per worker
@@ -331,7 +394,14 @@ CELERY_TASK_ROUTES = {
     'apps.analytics.tasks.record_article_view': {'queue': 'high_priority'},  # Fast tracking
     'apps.analytics.tasks.update_popular_articles': {'queue': 'low_priority'},  # Background job
     'apps.analytics.tasks.cleanup_old_views': {'queue': 'low_priority'},
+    'apps.analytics.tasks.update_author_statistics': {'queue': 'low_priority'},
     'apps.newsletter.tasks.*': {'queue': 'low_priority'},  # Newsletter tasks
+    'apps.advertisements.tasks.rollup_ad_daily_stats': {'queue': 'low_priority'},
+    'apps.advertisements.tasks.flush_ad_events': {'queue': 'high_priority'},
+    'apps.advertisements.tasks.reconcile_ad_revenue': {'queue': 'low_priority'},
+    'apps.advertisements.tasks.flush_adblock_stats': {'queue': 'low_priority'},
+    'apps.comments.tasks.moderate_pending_comments': {'queue': 'low_priority'},
+    'apps.comments.tasks.train_spam_model': {'queue': 'low_priority'},
 }
 
 # Queue definitions
@@ -355,9 +425,46 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.analytics.tasks.update_trending_tags',
         'schedule': crontab(minute='*/15'),  # Her 15 dakikada bir
     },
-    'send-daily-newsletter': {
-        'task': 'apps.newsletter.tasks.send_daily_newsletter',
-        'schedule': crontab(hour=8, minute=0),  # Her gün saat 08:00
+    'schedule-newsletters': {
+        'task': 'apps.newsletter.tasks.schedule_newsletters',
+        'schedule': crontab(minute='*/5'),  # Her 5 dakikada bir (gönderim saati gelen bültenler)
+    },
+    'resume-newsletter-issues': {
+        'task': 'apps.newsletter.tasks.resume_newsletter_issues',
+        'schedule': crontab(minute='*/15'),  # Her 15 dakikada bir
+    },
+    'update-author-statistics': {
+        'task': 'apps.analytics.tasks.update_author_statistics',
+        'schedule': crontab(minute=5),  # Her saat başı (xx:05)
+    },
+    'flush-ad-events': {
+        'task': 'apps.advertisements.tasks.flush_ad_events',
+        'schedule': timedelta(seconds=10),  # Her 10 saniyede bir
+    },
+    'rollup-ad-daily-stats': {
+        'task': 'apps.advertisements.tasks.rollup_ad_daily_stats',
+        'schedule': crontab(minute='*/15'),  # Her 15 dakikada bir (bugün)
+    },
+    'finalize-ad-daily-stats': {
+        'task': 'apps.advertisements.tasks.rollup_ad_daily_stats',
+        'schedule': crontab(hour=0, minute=20),  # Her gece 00:20 (dün)
+        'kwargs': {'days_ago': 1},
+    },
+    'flush-adblock-stats': {
+        'task': 'apps.advertisements.tasks.flush_adblock_stats',
+        'schedule': crontab(minute='*/5'),  # Her 5 dakikada bir
+    },
+    'reconcile-ad-revenue': {
+        'task': 'apps.advertisements.tasks.reconcile_ad_revenue',
+        'schedule': crontab(hour=1, minute=0),  # Her gece 01:00 (dün)
+    },
+    'moderate-pending-comments': {
+        'task': 'apps.comments.tasks.moderate_pending_comments',
+        'schedule': crontab(minute='*/5'),  # Her 5 dakikada bir
+    },
+    'train-comment-spam-model': {
+        'task': 'apps.comments.tasks.train_spam_model',
+        'schedule': crontab(hour=3, minute=30),  # Her gece 03:30
     },
     'cleanup-old-views': {
         'task': 'apps.analytics.tasks.cleanup_old_views',
@@ -0,0 +1,33 @@
+"""
+Helpers for the benchmark management commands.
+
+benchmark_environment() runs a benchmark against a throw-away test
+database (created with the project's migrations and destroyed afterwards)
+and a local-memory cache, so seeding thousands of rows never touches the
+configured database or the shared Redis cache. Safe to run in CI.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import override_settings
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+@contextmanager
+def benchmark_environment(alias='default', verbosity=0):
+    """Geçici test veritabanı ve süreç içi önbellek; çıkışta veritabanı silinir"""
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
@@ -3,6 +3,7 @@ from django.conf import settings
 from functools import wraps
 import hashlib
 import json
+import secrets
 
 
 def generate_cache_key(prefix, *args, **kwargs):
@@ -72,6 +73,70 @@ def get_or_set_cache(key, callback, timeout=None):
     return data
 
 
+# KEYS: lock key; ARGV: owner token, [timeout in ms]
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _lock_script(source, key, *args):
+    """
+    Run a compare-and-set lock script on Redis; None if the cache is not Redis
+    """
+    try:
+        from django_redis import get_redis_connection
+        client = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+    return client.eval(source, 1, cache.make_key(key), *args)
+
+
+def acquire_lock(key, timeout):
+    """
+    Take a cache lock owned by a random token
+
+    Returns:
+        int: The owner token, or None if the lock is held elsewhere
+    """
+    # Integers are stored unpickled by django_redis, so the scripts can compare them
+    token = secrets.randbits(62) + 1
+    return token if cache.add(key, token, timeout) else None
+
+
+def extend_lock(key, token, timeout):
+    """
+    Reset the lock's timeout if it is still owned by token
+
+    Returns:
+        bool: False if the lock expired or was taken over
+    """
+    result = _lock_script(EXTEND_LOCK_SCRIPT, key, token, int(timeout * 1000))
+    if result is None:
+        if cache.get(key) != token:
+            return False
+        return cache.touch(key, timeout)
+    return bool(result)
+
+
+def release_lock(key, token):
+    """
+    Delete the lock only if it is still owned by token (an expired lock
+    taken over by another worker is left alone)
+    """
+    result = _lock_script(RELEASE_LOCK_SCRIPT, key, token)
+    if result is None and cache.get(key) == token:
+        cache.delete(key)
+
+
 class CacheManager:
     """
     Centralized cache management
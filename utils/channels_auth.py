@@ -0,0 +1,72 @@
+"""
+JWT authentication for websocket connections
+
+Browsers cannot send an Authorization header on a websocket handshake, so
+the access token is taken from the query string (?token=<access>) or from
+the subprotocol list (Sec-WebSocket-Protocol: jwt, <access>). A valid
+token sets scope['user'] and scope['token_exp']; otherwise the session
+user from AuthMiddlewareStack is kept. Consumers that use the subprotocol
+form must accept with scope['subprotocol'] so the browser completes the
+handshake.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+JWT_SUBPROTOCOL = 'jwt'
+
+
+def get_raw_token(scope):
+    """Query string ya da subprotocol listesinden ham erişim token'ı"""
+    subprotocols = scope.get('subprotocols') or []
+    if JWT_SUBPROTOCOL in subprotocols:
+        index = subprotocols.index(JWT_SUBPROTOCOL)
+        if index + 1 < len(subprotocols):
+            return subprotocols[index + 1], JWT_SUBPROTOCOL
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    token = query.get('token', [None])[0]
+    return token, None
+
+
+@database_sync_to_async
+def authenticate_token(raw_token):
+    """
+    Erişim token'ını doğrular
+
+    Returns:
+        tuple: (user, son geçerlilik zamanı) ya da token geçersizse (None, None)
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None, None
+
+    if not user.is_active:
+        return None, None
+    return user, validated.get('exp')
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Token verilmişse scope['user']'ı token sahibiyle değiştirir"""
+
+    async def __call__(self, scope, receive, send):
+        raw_token, subprotocol = get_raw_token(scope)
+        if raw_token:
+            user, exp = await authenticate_token(raw_token)
+            if user is not None:
+                scope = dict(scope, user=user, token_exp=exp, subprotocol=subprotocol)
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    """Oturum kimlik doğrulaması + JWT (JWT öncelikli)"""
+    return AuthMiddlewareStack(JWTAuthMiddleware(inner))
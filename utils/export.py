@@ -0,0 +1,158 @@
+"""
+Streaming export helpers for large analytics tables
+Rows are read through server-side cursors and written out as CSV or NDJSON
+chunk by chunk, so memory stays flat regardless of the row count
+"""
+
+import csv
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Encoded bytes collected before a chunk is handed to the client
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """csv.writer için satırı saklamak yerine geri döndüren dosya benzeri nesne"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(rows, fields):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def _buffered(lines, size=EXPORT_BUFFER_SIZE):
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _parse_boundary(value, name, end_of_day=False):
+    # Yalnızca tarih verilirse günün başı/sonu (parse_datetime tarihleri de gece yarısı olarak kabul eder)
+    try:
+        day = parse_date(value)
+        parsed = None if day else parse_datetime(value)
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if parsed is None:
+        raise ValidationError({name: 'Geçersiz tarih formatı (YYYY-MM-DD veya ISO 8601).'})
+    # USE_TZ=False: saat dilimi belirtilen değerler yerel saate çevrilir
+    if timezone.is_aware(parsed):
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+def parse_export_params(request):
+    """
+    Export query parametrelerini okur
+
+    Query Parameters:
+    - start_date: Başlangıç (YYYY-MM-DD veya ISO 8601, varsayılan: son 24 saat)
+    - end_date: Bitiş (varsayılan: şimdi)
+    - file_format: csv veya ndjson (varsayılan: csv)
+    - compress: gzip ile sıkıştır (1/true)
+
+    Returns:
+        dict: start_date, end_date, file_format, compress
+    """
+    params = request.query_params
+
+    end_date = params.get('end_date')
+    end_date = _parse_boundary(end_date, 'end_date', end_of_day=True) if end_date else timezone.now()
+
+    start_date = params.get('start_date')
+    start_date = _parse_boundary(start_date, 'start_date') if start_date else end_date - timedelta(days=1)
+
+    if start_date > end_date:
+        raise ValidationError({'start_date': 'start_date, end_date değerinden büyük olamaz.'})
+
+    file_format = params.get('file_format', 'csv')
+    if file_format not in EXPORT_CONTENT_TYPES:
+        raise ValidationError({'file_format': f"Desteklenen formatlar: {', '.join(EXPORT_CONTENT_TYPES)}"})
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'file_format': file_format,
+        'compress': params.get('compress', '').lower() in ('1', 'true', 'gzip'),
+    }
+
+
+def stream_export(queryset, fields, filename, file_format='csv', compress=False):
+    """
+    Queryset'i CSV/NDJSON olarak stream eden response oluşturur
+
+    Args:
+        queryset: Dışa aktarılacak queryset
+        fields: Kolon listesi (values_list alanları)
+        filename: Uzantısız dosya adı
+        file_format: 'csv' veya 'ndjson'
+        compress: True ise çıktı gzip ile sıkıştırılır
+
+    Returns:
+        StreamingHttpResponse
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if file_format == 'ndjson':
+        lines = _ndjson_lines(rows, fields)
+    else:
+        lines = _csv_lines(rows, fields)
+
+    content = _buffered(lines)
+    content_type = EXPORT_CONTENT_TYPES[file_format]
+    filename = f'{filename}.{file_format}'
+
+    if compress:
+        content = _gzipped(content)
+        content_type = 'application/gzip'
+        filename = f'{filename}.gz'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
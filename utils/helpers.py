@@ -1,4 +1,8 @@
+import ipaddress
 import re
+from functools import lru_cache
+
+from django.conf import settings
 from django.utils.text import slugify
 from bs4 import BeautifulSoup
 
@@ -212,21 +216,48 @@ def format_number(number, decimal_places=0):
         return str(number)
 
 
+@lru_cache(maxsize=1)
+def _trusted_proxies(proxies):
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies if proxy.strip())
+
+
+def _is_trusted_proxy(ip):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies(tuple(settings.TRUSTED_PROXIES)))
+
+
 def get_client_ip(request):
     """
     İstek yapan client'ın IP adresini alır
-    
+
+    X-Forwarded-For'un ilk değeri istemcinin kendi yazdığı bir değer
+    olabilir. Bu yüzden yalnızca bağlantı güvenilir bir proxy'den
+    (settings.TRUSTED_PROXIES) geliyorsa başlık sağdan sola okunur ve
+    güvenilir olmayan ilk adres döner; aksi halde REMOTE_ADDR kullanılır.
+
     Args:
         request: Django request objesi
-    
+
     Returns:
         str: IP adresi
     """
+    ip = request.META.get('REMOTE_ADDR')
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0].strip()
-    else:
-        ip = request.META.get('REMOTE_ADDR')
+    if not x_forwarded_for or not _is_trusted_proxy(ip):
+        return ip
+
+    for hop in reversed([hop.strip() for hop in x_forwarded_for.split(',') if hop.strip()]):
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            # Bozuk değer: ona kadar gelinen son geçerli adres kullanılır
+            break
+        ip = hop
+        if not _is_trusted_proxy(hop):
+            break
     return ip
 
 
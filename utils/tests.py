@@ -0,0 +1,110 @@
+"""
+Tests for the Redis GCRA throttles and rate limit headers (throttling.py).
+"""
+
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from . import throttling
+
+
+class MinuteThrottle(throttling.RedisRateThrottle):
+    scope = 'test'
+    rate = '3/min'
+
+
+class ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [MinuteThrottle]
+
+    def get(self, request):
+        return Response({'status': 'ok'})
+
+
+urlpatterns = [path('throttled/', ThrottledView.as_view())]
+
+
+class GCRATest(TestCase):
+    NOW = 1_800_000_000.0
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(throttling, '_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        throttling._gcra_script = None
+
+    def test_burst_then_one_request_per_interval(self):
+        results = [throttling.gcra('key', 3, 60, now=self.NOW) for _ in range(4)]
+
+        self.assertEqual([allowed for allowed, *_ in results], [True, True, True, False])
+        self.assertEqual([remaining for _, remaining, *_ in results], [2, 1, 0, 0])
+        # 3/dk: her 20 saniyede bir hak açılır
+        self.assertAlmostEqual(results[-1][2], 20, places=3)
+        self.assertAlmostEqual(results[-1][3], 60, places=3)
+
+        self.assertFalse(throttling.gcra('key', 3, 60, now=self.NOW + 19)[0])
+        self.assertEqual(throttling.gcra('key', 3, 60, now=self.NOW + 20)[:2], (True, 0))
+        # Kota dolduktan sonra tekrar tam burst
+        self.assertEqual(throttling.gcra('key', 3, 60, now=self.NOW + 200)[:2], (True, 2))
+
+    def test_key_expires_when_quota_is_full_again(self):
+        throttling.gcra('key', 3, 60, now=self.NOW)
+        self.assertLessEqual(self.redis.pttl('key'), 20 * 1000)
+
+
+@override_settings(ROOT_URLCONF='utils.tests')
+class RedisRateThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(throttling, '_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        throttling._gcra_script = None
+
+    def get(self):
+        return self.client.get('/throttled/', secure=True)
+
+    def test_headers_and_retry_after(self):
+        responses = [self.get() for _ in range(4)]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 429])
+        self.assertEqual([response['X-RateLimit-Remaining'] for response in responses], ['2', '1', '0', '0'])
+        self.assertEqual(responses[0]['X-RateLimit-Limit'], '3')
+        self.assertEqual(responses[0]['X-RateLimit-Reset'], '20')
+        self.assertEqual(responses[-1]['Retry-After'], '20')
+
+    def test_non_redis_cache_falls_back_to_drf(self):
+        with mock.patch.object(throttling, '_redis', side_effect=NotImplementedError):
+            throttling._gcra_script = None
+            responses = [self.get() for _ in range(4)]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 429])
+        self.assertEqual([response['X-RateLimit-Remaining'] for response in responses], ['2', '1', '0', '0'])
+        self.assertEqual(responses[-1]['Retry-After'], '60')
+
+    def test_unavailable_redis_does_not_block(self):
+        with mock.patch.object(throttling, '_redis', side_effect=ConnectionError):
+            throttling._gcra_script = None
+            responses = [self.get() for _ in range(5)]
+
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertNotIn('X-RateLimit-Limit', responses[0])
+
+    def test_read_throttle_ignores_writes(self):
+        factory = APIRequestFactory()
+        throttle = throttling.ReadRateThrottle()
+        view = ThrottledView()
+
+        self.assertIsNone(throttle.get_cache_key(ThrottledView().initialize_request(factory.post('/')), view))
+        self.assertIsNotNone(throttle.get_cache_key(ThrottledView().initialize_request(factory.get('/')), view))
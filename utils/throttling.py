@@ -1,20 +1,186 @@
 """
 Custom throttling classes for API rate limiting
 Provides granular control over different endpoint types
+
+All throttles share one Redis backend: a GCRA (generic cell rate
+algorithm) limiter run as a single Lua script. Each key stores one
+timestamp, the theoretical arrival time, instead of DRF's list of request
+timestamps that is read and rewritten through the cache on every request.
+A rate of N/period allows a burst of N and then one request every
+period / N, which behaves like a sliding window without its per-request
+memory. Requests are keyed by user when authenticated and by client IP
+otherwise. RateLimitHeadersMiddleware reports the tightest limit of the
+request as X-RateLimit-* headers. If Redis is not available (e.g. a
+non-Redis cache in development) the DRF cache implementation is used.
+"""
+
+import logging
+import math
+import time
+
+from django_redis import get_redis_connection
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_KEY_PREFIX = 'news:throttle'
+
+# KEYS: anahtar
+# ARGV: şimdi (sn), istekler arası süre (sn), sınır
+# Dönüş: {izin (1/0), kalan hak, tekrar deneme süresi, kotanın dolma süresi}
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+-- Kayan nokta hatalarına karşı küçük tolerans
+local capacity = interval * limit + 0.000001
+
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+if new_tat - now > capacity then
+    return {0, 0, tostring(new_tat - now - capacity), tostring(tat - now)}
+end
+
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, math.floor((capacity - (new_tat - now)) / interval), '0', tostring(new_tat - now)}
 """
 
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+_gcra_script = None
+
 
+def _redis():
+    return get_redis_connection('default')
+
+
+def gcra(key, limit, period, now=None):
+    """
+    İsteği limite göre kontrol eder ve kabul edilirse kotadan düşer
 
-class CommentRateThrottle(AnonRateThrottle):
+    Returns:
+        tuple: (izin verildi mi, kalan hak, tekrar deneme süresi (sn), kotanın tamamen dolma süresi (sn))
+    """
+    global _gcra_script
+
+    if _gcra_script is None:
+        _gcra_script = _redis().register_script(GCRA_SCRIPT)
+    allowed, remaining, retry_after, reset = _gcra_script(
+        keys=[key],
+        args=[now or time.time(), period / limit, limit]
+    )
+    return bool(allowed), int(remaining), float(retry_after), float(reset)
+
+
+class RedisRateThrottle(SimpleRateThrottle):
+    """
+    Redis GCRA tabanlı throttle; giriş yapmış kullanıcıda kullanıcıya, aksi halde IP'ye göre sayar
+    """
+    cache_format = THROTTLE_KEY_PREFIX + ':%(scope)s:%(ident)s'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed, remaining, self.retry_after, reset = gcra(self.key, self.num_requests, self.duration)
+        except NotImplementedError:
+            # Önbellek Redis değil
+            allowed = super().allow_request(request, view)
+            remaining = max(self.num_requests - len(self.history), 0)
+            reset = self.duration - (self.now - self.history[-1]) if self.history else 0
+            self.retry_after = None
+        except Exception as e:
+            # Sınırlayıcı çalışamazsa istek engellenmez
+            logger.warning(f"Rate limiter unavailable: {str(e)}")
+            return True
+
+        self.record_state(request, remaining, reset)
+        return allowed
+
+    def record_state(self, request, remaining, reset):
+        """İsteğin en dar limitini yanıt başlıkları için saklar"""
+        # DRF Request ya da doğrudan Django HttpRequest (ör. beacon görünümü)
+        request = getattr(request, '_request', request)
+        state = getattr(request, 'rate_limit', None)
+        if state is None or remaining < state['remaining']:
+            request.rate_limit = {
+                'limit': self.num_requests,
+                'remaining': remaining,
+                'reset': math.ceil(reset),
+            }
+
+    def wait(self):
+        if getattr(self, 'retry_after', None) is not None:
+            return self.retry_after
+        return super().wait()
+
+
+class RateLimitHeadersMiddleware:
+    """
+    API yanıtlarına X-RateLimit-Limit / Remaining / Reset başlıklarını ekler
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        state = getattr(request, 'rate_limit', None)
+        if state:
+            response['X-RateLimit-Limit'] = str(state['limit'])
+            response['X-RateLimit-Remaining'] = str(state['remaining'])
+            response['X-RateLimit-Reset'] = str(state['reset'])
+        return response
+
+
+class AnonRateThrottle(RedisRateThrottle):
+    """
+    General API access for anonymous users (authenticated users are not counted)
+    """
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request, view)
+
+
+class UserRateThrottle(RedisRateThrottle):
+    """
+    General API access, per user (per IP for anonymous requests)
+    """
+    scope = 'user'
+
+
+class CommentRateThrottle(RedisRateThrottle):
     """
     Strict rate limiting for comment endpoints
-    Prevents spam and abuse
+    Prevents spam and abuse (only writes are counted)
     """
     scope = 'comment'
 
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        return super().get_cache_key(request, view)
 
-class AuthRateThrottle(AnonRateThrottle):
+
+class AuthRateThrottle(RedisRateThrottle):
     """
     Rate limiting for authentication endpoints
     Prevents brute force attacks
@@ -22,20 +188,34 @@ class AuthRateThrottle(AnonRateThrottle):
     scope = 'auth'
 
 
-class ReadRateThrottle(AnonRateThrottle):
+class ReadRateThrottle(RedisRateThrottle):
     """
     Relaxed rate limiting for read-only endpoints
+    Only reads are counted, so a viewset can combine it with a write throttle
     """
     scope = 'read'
 
+    def get_cache_key(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return None
+        return super().get_cache_key(request, view)
+
 
-class WriteRateThrottle(AnonRateThrottle):
+class WriteRateThrottle(RedisRateThrottle):
     """
     Moderate rate limiting for write operations
     """
     scope = 'write'
 
 
+class BeaconRateThrottle(RedisRateThrottle):
+    """
+    Rate limiting for the sendBeacon endpoint (plain Django view, keyed by IP)
+    Each beacon carries a batch of events, so the limit is per request
+    """
+    scope = 'beacon'
+
+
 class BurstRateThrottle(UserRateThrottle):
     """
     Short burst protection for authenticated users